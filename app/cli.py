@@ -0,0 +1,316 @@
+"""无界面的命令行入口，供定时任务与批处理使用。
+
+    python -m app fetch --days 30
+    python -m app fetch --pairs EUR/CNY,JPY/CNY
+    python -m app refresh --incremental
+    python -m app export --format csv --last 60 --output usd_cny.csv
+    python -m app export --resolution monthly --format csv
+    python -m app convert-format data/usd_cny_base.json data/usd_cny_base.db
+    python -m app stats --json
+
+与图形界面共用 ``BaseRatesService`` 与各存储后端，但不导入 Tk / pywebview。
+成功时返回 0，数据或网络错误返回 1，参数错误返回 2。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, TextIO
+
+from app.config import APP_PATHS, DEFAULT_BASE_DAYS, TRACKED_PAIRS_TEXT, load_env_defaults, parse_currency_pairs
+from app.models.rate import RatesSnapshot
+from app.repository.factory import create_pair_repository, create_repository
+from app.services.base_rates_service import KEEP_ALL_DAYS, BaseRatesRefreshError, BaseRatesService
+
+if TYPE_CHECKING:
+    from app.services.providers import ProviderChain
+
+EXPORT_FORMATS = ("json", "csv")
+EXPORT_RESOLUTIONS = ("daily", "weekly", "monthly", "quarterly", "yearly")
+CSV_HEADER = ("date", "open", "close", "high", "low", "amplitude")
+
+
+class CliError(Exception):
+    """命令执行失败，消息直接输出到标准错误。"""
+
+
+def _env(name: str, default: str = "") -> str:
+    return os.getenv(name) or load_env_defaults().get(name, default)
+
+
+def _create_client(args: argparse.Namespace) -> ProviderChain:
+    from app.services.providers import configured_providers, create_provider_chain, load_credentials, parse_provider_names
+
+    credentials = load_credentials(ALPHAVANTAGE_API_KEY=args.api_key or "")
+    try:
+        order = parse_provider_names(args.providers) if args.providers else None
+        if not configured_providers(credentials, order):
+            raise CliError("没有可用的数据源：请设置 ALPHAVANTAGE_API_KEY（或 --api-key），或 NOWAPI_APPKEY 与 NOWAPI_SIGN。")
+    except ValueError as exc:
+        raise CliError(str(exc)) from exc
+
+    from app.services.rate_limiter import get_default_limiter
+    from app.services.response_cache import ResponseCache
+
+    def on_wait(seconds: float) -> None:
+        print(f"请求排队中，预计等待 {seconds:.0f} 秒…", file=sys.stderr)
+
+    hedge_after = args.hedge_after_ms / 1000 if args.hedge_after_ms else None
+    return create_provider_chain(
+        credentials,
+        order,
+        cache=None if args.no_cache else ResponseCache(),
+        limiter=get_default_limiter(),
+        on_wait=on_wait,
+        hedge_after=hedge_after,
+    )
+
+
+def _service(args: argparse.Namespace) -> BaseRatesService:
+    storage = args.storage
+    return BaseRatesService(
+        repository=create_repository(storage),
+        pair_repository_factory=lambda from_symbol, to_symbol: create_pair_repository(from_symbol, to_symbol, storage),
+    )
+
+
+def _load(service: BaseRatesService, args: argparse.Namespace) -> RatesSnapshot:
+    """按 --start/--end 或 --last 读取快照，未指定时读取全部。"""
+    if args.start or args.end:
+        snapshot = service.load_range(args.start or 0, args.end or 99991231)
+    elif args.last:
+        snapshot = service.load_latest(args.last)
+    else:
+        snapshot = service.load_snapshot()
+    if snapshot is None or snapshot.is_empty():
+        raise CliError(f"{args.storage or APP_PATHS.base_rates_file} 中没有可用的基础数据。")
+    return snapshot
+
+
+def _summary(snapshot: RatesSnapshot) -> Dict[str, Any]:
+    columns = snapshot.columns
+    latest = snapshot.latest_bar()
+    return {
+        "source": snapshot.source,
+        "fetched_at": snapshot.fetched_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "trading_days": snapshot.trading_days(),
+        "first_date": str(columns.dates[0]) if columns else None,
+        "last_date": latest.date if latest else None,
+        "last_close": latest.close_price if latest else None,
+        "min_low": min(columns.low) if columns else None,
+        "max_high": max(columns.high) if columns else None,
+    }
+
+
+def _report(snapshot: RatesSnapshot, prefix: str) -> None:
+    print(f"{prefix}：{snapshot.trading_days()} 个交易日（{snapshot.date_span()}，来源 {snapshot.source}）")
+
+
+def cmd_fetch(args: argparse.Namespace) -> int:
+    client = _create_client(args)
+    service = _service(args)
+    if args.pairs is None:
+        snapshot = service.refresh_snapshot(client, outputsize=args.outputsize, days=args.days or DEFAULT_BASE_DAYS)
+        _report(snapshot, "基础数据已写入")
+        return 0
+
+    try:
+        pairs = parse_currency_pairs(args.pairs or TRACKED_PAIRS_TEXT)
+    except ValueError as exc:
+        raise CliError(str(exc)) from exc
+    failed = 0
+    for result in service.refresh_pairs(client, pairs, outputsize=args.outputsize, days=args.days or DEFAULT_BASE_DAYS):
+        label = "/".join(result.pair)
+        if result.ok:
+            _report(result.snapshot, f"{label} 已写入")
+        else:
+            failed += 1
+            print(f"{label} 失败：{result.error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_refresh(args: argparse.Namespace) -> int:
+    client = _create_client(args)
+    service = _service(args)
+    if not args.incremental:
+        snapshot = service.refresh_snapshot(client, outputsize="full", days=args.days or KEEP_ALL_DAYS)
+        _report(snapshot, "已重新拉取完整历史并覆盖写入")
+        return 0
+
+    result = service.refresh_incremental(client, days=args.days or DEFAULT_BASE_DAYS)
+    note = "（接口限流，使用了过期缓存）" if result.stale else ""
+    print(f"新增或修订 {result.delta.trading_days()} 个交易日（{result.outputsize}）{note}")
+    _report(result.snapshot, "最近数据")
+    return 0
+
+
+def _write_csv(snapshot: RatesSnapshot, stream: TextIO) -> None:
+    import csv
+
+    columns = snapshot.columns
+    writer = csv.writer(stream, lineterminator="\n")
+    writer.writerow(CSV_HEADER)
+    for label, open_price, close_price, high_price, low_price, amplitude in zip(
+        snapshot.date_labels(), columns.open, columns.close, columns.high, columns.low, columns.amplitude
+    ):
+        writer.writerow(
+            (label, f"{open_price:.4f}", f"{close_price:.4f}", f"{high_price:.4f}", f"{low_price:.4f}", f"{amplitude:.2f}")
+        )
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    service = _service(args)
+    snapshot = _load(service, args)
+    if args.resolution != "daily":
+        from app.services.rollups import select_view
+
+        # 未限定范围时已读取完整日线，可直接用于校验或重建聚合；导出为只读操作，不写回缓存文件。
+        ranged = args.start or args.end or args.last
+        rollups = service.load_rollups(None if ranged else snapshot, persist=False)
+        snapshot, _ = select_view(snapshot, args.resolution, rollups=rollups)
+    output = args.output
+    stream = sys.stdout if output is None else output.open("w", encoding="utf-8", newline="")
+    try:
+        if args.format == "csv":
+            _write_csv(snapshot, stream)
+        else:
+            json.dump(snapshot.to_storage(), stream, ensure_ascii=False, indent=2)
+            stream.write("\n")
+    except OSError as exc:
+        raise CliError(f"导出失败：{exc}") from exc
+    finally:
+        if output is not None:
+            stream.close()
+    if output is not None:
+        _report(snapshot, f"已导出到 {output}")
+    return 0
+
+
+def cmd_compact(args: argparse.Namespace) -> int:
+    _service(args).compact_storage()
+    print(f"已将增量日志合并回 {args.storage or APP_PATHS.base_rates_file}")
+    return 0
+
+
+def cmd_convert_format(args: argparse.Namespace) -> int:
+    from app.repository.convert import convert_snapshot
+
+    if args.source.resolve() == args.target.resolve():
+        raise CliError("源文件与目标文件相同。")
+    try:
+        snapshot = convert_snapshot(args.source, args.target)
+    except (RuntimeError, ValueError) as exc:
+        raise CliError(f"转换失败：{exc}") from exc
+    _report(snapshot, f"已转换 {args.source} → {args.target}")
+    return 0
+
+
+def cmd_stats(args: argparse.Namespace) -> int:
+    snapshot = _load(_service(args), args)
+    summary = _summary(snapshot)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return 0
+    labels = {
+        "source": "数据来源",
+        "fetched_at": "更新时间",
+        "trading_days": "交易日数",
+        "first_date": "起始日期",
+        "last_date": "最新日期",
+        "last_close": "最新收盘",
+        "min_low": "区间最低",
+        "max_high": "区间最高",
+    }
+    for key, label in labels.items():
+        print(f"{label}：{summary[key]}")
+    return 0
+
+
+def _add_range_options(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("数据范围")
+    group.add_argument("--start", help="起始日期（YYYYMMDD 或 YYYY-MM-DD）")
+    group.add_argument("--end", help="结束日期（含）")
+    group.add_argument("--last", type=int, help="仅取最近 N 个交易日")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app", description="汇率基础数据命令行工具（无界面）。")
+    parser.add_argument(
+        "--storage",
+        type=Path,
+        help=f"基础数据文件，扩展名决定存储后端（默认 {APP_PATHS.base_rates_file}，可用 BASE_RATES_PATH 配置）",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="命令")
+
+    network = argparse.ArgumentParser(add_help=False)
+    network.add_argument("--api-key", help="Alpha Vantage API Key（默认读取 ALPHAVANTAGE_API_KEY）")
+    network.add_argument("--providers", help="数据源顺序，如 nowapi,alpha_vantage（默认读取 RATE_PROVIDERS）")
+    network.add_argument(
+        "--hedge-after-ms",
+        type=int,
+        help="当前数据源超过该毫秒数未返回时并行请求下一个（默认读取 PROVIDER_HEDGE_AFTER_MS）",
+    )
+    network.add_argument(
+        "--days",
+        type=int,
+        help=f"写入或输出的交易日数（fetch 与增量刷新默认 {DEFAULT_BASE_DAYS}，完整刷新默认保留全部历史）",
+    )
+    network.add_argument("--no-cache", action="store_true", help="不使用本地响应缓存")
+
+    fetch = subparsers.add_parser("fetch", parents=[network], help="拉取最近的日线并覆盖写入存储")
+    fetch.add_argument(
+        "--outputsize",
+        choices=("compact", "full"),
+        default=_env("ALPHAVANTAGE_OUTPUTSIZE", "compact"),
+        help="接口返回范围（默认 compact）",
+    )
+    fetch.add_argument(
+        "--pairs",
+        nargs="?",
+        const="",
+        help="批量拉取货币对并分别写入各自的存储，如 EUR/CNY,JPY/CNY；不带值时使用 TRACKED_PAIRS",
+    )
+    fetch.set_defaults(handler=cmd_fetch)
+
+    refresh = subparsers.add_parser("refresh", parents=[network], help="更新本地数据")
+    refresh.add_argument("--incremental", action="store_true", help="仅拉取本地最后一个交易日之后的数据并追加写入")
+    refresh.set_defaults(handler=cmd_refresh)
+
+    export = subparsers.add_parser("export", help="导出本地数据")
+    export.add_argument("--format", choices=EXPORT_FORMATS, default="json", help="导出格式（默认 json，即 d/o/c/h/l/am 明文格式）")
+    export.add_argument("--output", type=Path, help="输出文件（默认标准输出）")
+    export.add_argument(
+        "--resolution",
+        choices=EXPORT_RESOLUTIONS,
+        default="daily",
+        help="按周期聚合后导出（默认 daily；其余周期读取与数据文件同目录的 *.rollups 缓存）",
+    )
+    _add_range_options(export)
+    export.set_defaults(handler=cmd_export)
+
+    compact = subparsers.add_parser("compact", help="把 *.journal 增量日志合并回主文件")
+    compact.set_defaults(handler=cmd_compact)
+
+    convert = subparsers.add_parser("convert-format", help="在 JSON / SQLite / 二进制存储之间转换")
+    convert.add_argument("source", type=Path, help="源文件")
+    convert.add_argument("target", type=Path, help="目标文件，扩展名决定格式（.json / .json.gz / .db / .bin）")
+    convert.set_defaults(handler=cmd_convert_format)
+
+    stats = subparsers.add_parser("stats", help="输出本地数据概况")
+    stats.add_argument("--json", action="store_true", help="以 JSON 输出")
+    _add_range_options(stats)
+    stats.set_defaults(handler=cmd_stats)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except (CliError, BaseRatesRefreshError) as exc:
+        print(f"错误：{exc}", file=sys.stderr)
+        return 1
@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Tuple
 
 
 @dataclass(frozen=True)
@@ -11,12 +11,71 @@ class AppPaths:
     root: Path
     data_dir: Path
     base_rates_file: Path
+    base_rates_backend: str
 
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 DEFAULT_DATA_DIR = ROOT_DIR / "data"
 DEFAULT_BASE_RATES_FILE = DEFAULT_DATA_DIR / "usd_cny_base.json"
 DEFAULT_BASE_DAYS = int(os.getenv("DEFAULT_BASE_DAYS", "30"))
+DEFAULT_CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR", str(DEFAULT_DATA_DIR / ".cache"))).expanduser()
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# 批量刷新时跟踪的货币对，格式如 "EUR/CNY,JPY/CNY"。
+TRACKED_PAIRS_TEXT = os.getenv("TRACKED_PAIRS", "USD/CNY,EUR/CNY,JPY/CNY,HKD/CNY,GBP/CNY")
+# 图表叠加的技术指标，以分号分隔，如 "sma:20;bollinger:20,2;rsi:14"。
+CHART_OVERLAYS_TEXT = os.getenv("CHART_OVERLAYS", "")
+ALPHAVANTAGE_PER_MINUTE = int(os.getenv("ALPHAVANTAGE_PER_MINUTE", "5"))
+ALPHAVANTAGE_PER_DAY = int(os.getenv("ALPHAVANTAGE_PER_DAY", "500"))
+AUTO_REFRESH_ENABLED = os.getenv("AUTO_REFRESH_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"}
+# 当日剩余额度低于该值时自动刷新让位于手动操作并退避。
+AUTO_REFRESH_MIN_QUOTA = int(os.getenv("AUTO_REFRESH_MIN_QUOTA", "25"))
+AUTO_REFRESH_GRACE_MINUTES = int(os.getenv("AUTO_REFRESH_GRACE_MINUTES", "10"))
+# 外汇日线在纽约 17:00（约 UTC 22:00）收盘，之后才可能出现新的日线。
+FX_DAILY_CLOSE_UTC_HOUR = int(os.getenv("FX_DAILY_CLOSE_UTC_HOUR", "22"))
+# compact 模式仅返回最近 100 个交易日，缺口超过该值时增量刷新需改用 full。
+INCREMENTAL_COMPACT_MAX_GAP = int(os.getenv("INCREMENTAL_COMPACT_MAX_GAP", "100"))
+# 耗时追踪：关闭后 span 几乎零开销；TRACE_HISTORY 为调试面板保留的最近操作条数。
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"}
+TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", "200"))
+# 数据源按顺序尝试（逗号分隔），缺少凭证的数据源会被跳过。
+RATE_PROVIDERS_TEXT = os.getenv("RATE_PROVIDERS", "alpha_vantage,nowapi")
+# 当前数据源超过该毫秒数仍未返回时并行请求下一个（对冲请求），0 表示仅在失败时切换。
+PROVIDER_HEDGE_AFTER_MS = int(os.getenv("PROVIDER_HEDGE_AFTER_MS", "0"))
+# 单次拉取的总时限（秒），超时后改用过期缓存或报错；0 表示不限。
+PROVIDER_DEADLINE_S = float(os.getenv("PROVIDER_DEADLINE_S", "60"))
+# NowAPI 按日期区间查询，单次请求最多回溯的自然日数。
+NOWAPI_MAX_SPAN_DAYS = int(os.getenv("NOWAPI_MAX_SPAN_DAYS", "3650"))
+# JSON 快照的写入格式：raw（默认）为 d/o/c/h/l/am 明文列表，便于直接阅读与 diff；compact 为整数缩放 + 差分编码，
+# 需显式开启，开启后首次写入会把现有文件改写为 fx-compact/1 格式。读取时两者均可识别。
+JSON_STORAGE_ENCODING = os.getenv("JSON_STORAGE_ENCODING", "raw").strip().lower()
+
+
+# 按文件扩展名选择存储后端。
+STORAGE_BACKENDS: Dict[str, str] = {
+    ".json": "json",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+    ".bin": "binary",
+    ".d2yr": "binary",
+    # 压缩的 JSON 快照，如 usd_cny_base.json.gz（gzip）或 usd_cny_base.json.zz（zlib）。
+    ".gz": "json",
+    ".zz": "json",
+}
+COMPRESSED_SUFFIXES: Dict[str, str] = {".gz": "gzip", ".zz": "zlib"}
+
+
+def parse_currency_pairs(text: str) -> Tuple[Tuple[str, str], ...]:
+    pairs = []
+    for chunk in text.replace(";", ",").split(","):
+        chunk = chunk.strip().upper()
+        if not chunk:
+            continue
+        from_symbol, sep, to_symbol = chunk.partition("/")
+        if not sep or len(from_symbol) != 3 or len(to_symbol) != 3:
+            raise ValueError(f"货币对格式不正确：{chunk}，应为 EUR/CNY 形式。")
+        pairs.append((from_symbol, to_symbol))
+    return tuple(pairs)
 
 
 def resolve_base_rates_path() -> Path:
@@ -26,10 +85,26 @@ def resolve_base_rates_path() -> Path:
     return DEFAULT_BASE_RATES_FILE
 
 
+def resolve_storage_backend(path: Path) -> str:
+    """未识别的扩展名沿用 JSON，与早期仅支持 JSON 时的行为一致。"""
+    return STORAGE_BACKENDS.get(path.suffix.lower(), "json")
+
+
+def storage_suffix(path: Path) -> str:
+    """存储文件的完整扩展名，压缩文件保留内层扩展名（``.json.gz``）。"""
+    suffix = path.suffix.lower()
+    if suffix in COMPRESSED_SUFFIXES:
+        return Path(path.stem).suffix.lower() + suffix
+    return suffix
+
+
+_BASE_RATES_FILE = resolve_base_rates_path()
+
 APP_PATHS = AppPaths(
     root=ROOT_DIR,
     data_dir=DEFAULT_DATA_DIR,
-    base_rates_file=resolve_base_rates_path(),
+    base_rates_file=_BASE_RATES_FILE,
+    base_rates_backend=resolve_storage_backend(_BASE_RATES_FILE),
 )
 
 
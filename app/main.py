@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-from app.repository.base_rates import JsonBaseRatesRepository
+from app.repository.factory import create_repository
 from app.services.base_rates_service import BaseRatesService
 from app.ui.tk_app import RatesApp
 
 
 def create_app() -> RatesApp:
-    repository = JsonBaseRatesRepository()
+    repository = create_repository()
     base_service = BaseRatesService(repository=repository)
     return RatesApp(base_service)
 
@@ -1,8 +1,58 @@
 from __future__ import annotations
 
+import hashlib
+from array import array
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from itertools import accumulate
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+_DATE_TYPECODE = "i"
+_VALUE_TYPECODE = "d"
+
+# 紧凑存储格式：价格按 1e-4（1 pip）、振幅按 0.01 缩放为整数，日期与各列均存相邻差值。
+COMPACT_FORMAT = "fx-compact/1"
+PRICE_SCALE = 10_000
+AMPLITUDE_SCALE = 100
+_COMPACT_COLUMNS = (("o", PRICE_SCALE), ("c", PRICE_SCALE), ("h", PRICE_SCALE), ("l", PRICE_SCALE), ("am", AMPLITUDE_SCALE))
+
+RateRow = Tuple[int, float, float, float, float, float]
+# 列数据：自有的 array，或是共享其缓冲区的只读 memoryview（见 ``RateColumns.view``）。
+Column = Union[array, memoryview]
+
+
+def _amplitude(high_price: float, low_price: float) -> float:
+    amplitude = 0.0
+    if low_price:
+        amplitude = ((high_price - low_price) / low_price) * 100
+    return round(amplitude, 2)
+
+
+def _parse_api_row(date_str: str, values: dict) -> RateRow:
+    try:
+        date_value = int(date_str.replace("-", ""))
+        open_price = float(values["1. open"])
+        high_price = float(values["2. high"])
+        low_price = float(values["3. low"])
+        close_price = float(values["4. close"])
+    except (AttributeError, KeyError, TypeError, ValueError) as exc:
+        raise ValueError("API 返回的数据结构异常。") from exc
+    return date_value, open_price, close_price, high_price, low_price, _amplitude(high_price, low_price)
+
+
+def _parse_storage_row(payload: dict) -> RateRow:
+    try:
+        return (
+            int(payload["d"]),
+            float(payload["o"]),
+            float(payload["c"]),
+            float(payload["h"]),
+            float(payload["l"]),
+            float(payload["am"]),
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError("基础数据格式不正确。") from exc
 
 
 @dataclass(frozen=True)
@@ -16,27 +66,27 @@ class RateBar:
 
     @classmethod
     def from_api(cls, date_str: str, values: dict) -> "RateBar":
-        try:
-            open_price = float(values["1. open"])
-            high_price = float(values["2. high"])
-            low_price = float(values["3. low"])
-            close_price = float(values["4. close"])
-        except (KeyError, ValueError) as exc:
-            raise ValueError("API 返回的数据结构异常。") from exc
-
-        amplitude = 0.0
-        if low_price:
-            amplitude = ((high_price - low_price) / low_price) * 100
+        return cls.from_row(_parse_api_row(date_str, values))
 
+    @classmethod
+    def from_row(cls, row: RateRow) -> "RateBar":
+        date_value, open_price, close_price, high_price, low_price, amplitude = row
         return cls(
-            date=date_str.replace("-", ""),
+            date=str(date_value),
             open_price=open_price,
             close_price=close_price,
             high_price=high_price,
             low_price=low_price,
-            amplitude=round(amplitude, 2),
+            amplitude=amplitude,
         )
 
+    def to_row(self) -> RateRow:
+        try:
+            date_value = int(self.date)
+        except ValueError as exc:
+            raise ValueError("日期需为 YYYYMMDD 格式。") from exc
+        return date_value, self.open_price, self.close_price, self.high_price, self.low_price, self.amplitude
+
     def to_storage_dict(self) -> dict:
         return {
             "d": self.date,
@@ -49,24 +99,191 @@ class RateBar:
 
     @classmethod
     def from_storage_dict(cls, payload: dict) -> "RateBar":
+        return cls.from_row(_parse_storage_row(payload))
+
+
+class RateColumns:
+    """按列存放的日线数据：日期为 int32，价格与振幅为 float64。
+
+    ``view`` 返回的列为 memoryview，与原数组共享缓冲区且只读；需要修改时先 ``copy``。
+    视图存在期间原数组无法扩容，``RatesSnapshot.upsert`` 会在这种情况下改为复制出新列。
+    """
+
+    __slots__ = ("dates", "open", "close", "high", "low", "amplitude")
+
+    def __init__(
+        self,
+        dates: Optional[Column] = None,
+        open_: Optional[Column] = None,
+        close: Optional[Column] = None,
+        high: Optional[Column] = None,
+        low: Optional[Column] = None,
+        amplitude: Optional[Column] = None,
+    ) -> None:
+        self.dates = dates if dates is not None else array(_DATE_TYPECODE)
+        self.open = open_ if open_ is not None else array(_VALUE_TYPECODE)
+        self.close = close if close is not None else array(_VALUE_TYPECODE)
+        self.high = high if high is not None else array(_VALUE_TYPECODE)
+        self.low = low if low is not None else array(_VALUE_TYPECODE)
+        self.amplitude = amplitude if amplitude is not None else array(_VALUE_TYPECODE)
+        size = len(self.dates)
+        if any(len(column) != size for column in self.value_columns()):
+            raise ValueError("列数据长度不一致。")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[RateRow]) -> "RateColumns":
+        columns = cls()
+        for row in rows:
+            columns.append(row)
+        return columns
+
+    def value_columns(self) -> Tuple[Column, Column, Column, Column, Column]:
+        return self.open, self.close, self.high, self.low, self.amplitude
+
+    @property
+    def is_view(self) -> bool:
+        return not isinstance(self.dates, array)
+
+    def view(self, start: int, stop: int) -> "RateColumns":
+        """``[start, stop)`` 行的只读视图，不复制数据。"""
+        return RateColumns(*(memoryview(column)[start:stop] for column in (self.dates, *self.value_columns())))
+
+    def copy(self) -> "RateColumns":
+        """复制为独立的 array 列，可安全修改，也不再引用原缓冲区。"""
+        copied = []
+        for column, typecode in zip((self.dates, *self.value_columns()), (_DATE_TYPECODE,) + (_VALUE_TYPECODE,) * 5):
+            target = array(typecode)
+            target.frombytes(memoryview(column).cast("B"))
+            copied.append(target)
+        return RateColumns(*copied)
+
+    def extend(self, other: "RateColumns") -> None:
+        """就地追加 ``other`` 的全部行；底层数组正被视图引用时抛出 BufferError 且不做任何修改。"""
+        size = len(self)
+        extended = []
         try:
-            return cls(
-                date=str(payload["d"]),
-                open_price=float(payload["o"]),
-                close_price=float(payload["c"]),
-                high_price=float(payload["h"]),
-                low_price=float(payload["l"]),
-                amplitude=float(payload["am"]),
-            )
-        except (KeyError, TypeError, ValueError) as exc:
-            raise ValueError("基础数据格式不正确。") from exc
+            for column, extra in zip((self.dates, *self.value_columns()), (other.dates, *other.value_columns())):
+                column.extend(extra)
+                extended.append(column)
+        except BufferError:
+            for column in extended:
+                del column[size:]
+            raise
+
+    def append(self, row: RateRow) -> None:
+        date_value, open_price, close_price, high_price, low_price, amplitude = row
+        self.dates.append(date_value)
+        self.open.append(open_price)
+        self.close.append(close_price)
+        self.high.append(high_price)
+        self.low.append(low_price)
+        self.amplitude.append(amplitude)
+
+    def row(self, index: int) -> RateRow:
+        return (
+            self.dates[index],
+            self.open[index],
+            self.close[index],
+            self.high[index],
+            self.low[index],
+            self.amplitude[index],
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+
+class RateBarsView(Sequence[RateBar]):
+    """在列存储之上按需构造 RateBar 的只读序列。"""
+
+    __slots__ = ("_columns",)
+
+    def __init__(self, columns: RateColumns) -> None:
+        self._columns = columns
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    @overload
+    def __getitem__(self, index: int) -> RateBar: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[RateBar]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RateBar.from_row(self._columns.row(i)) for i in range(*index.indices(len(self)))]
+        return RateBar.from_row(self._columns.row(index))
+
+    def __iter__(self) -> Iterator[RateBar]:
+        for i in range(len(self)):
+            yield RateBar.from_row(self._columns.row(i))
+
+
+def _delta_encode(values: Iterable[int]) -> List[int]:
+    encoded = []
+    previous = 0
+    for value in values:
+        encoded.append(value - previous)
+        previous = value
+    return encoded
+
+
+def parse_date_key(value: "int | str") -> int:
+    """把 ``20240102``、``"20240102"`` 或 ``"2024-01-02"`` 统一为整数日期键。"""
+    if isinstance(value, int):
+        return value
+    try:
+        return int(str(value).strip().replace("-", ""))
+    except ValueError as exc:
+        raise ValueError("日期需为 YYYYMMDD 或 YYYY-MM-DD 格式。") from exc
+
+
+def _parse_timestamp(value: Optional[str]) -> datetime:
+    if not value:
+        return datetime.utcnow()
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+    except (TypeError, ValueError):
+        return datetime.utcnow()
 
 
-@dataclass
 class RatesSnapshot:
-    source: str
-    fetched_at: datetime
-    bars: List[RateBar]
+    __slots__ = ("source", "fetched_at", "columns", "stale", "_date_labels", "_fingerprint")
+
+    def __init__(
+        self,
+        source: str,
+        fetched_at: datetime,
+        bars: Iterable[RateBar] = (),
+        *,
+        columns: Optional[RateColumns] = None,
+    ) -> None:
+        self.source = source
+        self.fetched_at = fetched_at
+        self.columns = columns if columns is not None else RateColumns.from_rows(bar.to_row() for bar in bars)
+        # 限流等情况下由过期缓存兜底返回时置为 True。
+        self.stale = False
+        self._date_labels: Optional[List[str]] = None
+        self._fingerprint: Optional[Tuple[int, str]] = None
+
+    def __repr__(self) -> str:
+        dates = self.columns.dates
+        span = f"{dates[0]}..{dates[-1]}" if dates else "empty"
+        return f"RatesSnapshot({self.source!r}, {span}, trading_days={len(dates)})"
+
+    def __eq__(self, other: object) -> bool:
+        """按日线内容（``fingerprint``）比较，不比较来源与抓取时间。"""
+        if not isinstance(other, RatesSnapshot):
+            return NotImplemented
+        return self is other or self.fingerprint() == other.fingerprint()
+
+    # 快照可经 upsert 就地修改，不可哈希。
+    __hash__ = None  # type: ignore[assignment]
+
+    @property
+    def bars(self) -> RateBarsView:
+        return RateBarsView(self.columns)
 
     @classmethod
     def from_api_response(cls, payload: dict, days: int) -> "RatesSnapshot":
@@ -75,18 +292,12 @@ class RatesSnapshot:
             raise ValueError("API 未返回有效的日度汇率数据。")
 
         sorted_dates = sorted(time_series.keys())[-max(int(days), 1):]
-        bars = [RateBar.from_api(date_str, time_series[date_str]) for date_str in sorted_dates]
-
-        fetched_at_str = payload.get("fetched_at") or datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-        try:
-            fetched_at = datetime.strptime(fetched_at_str, "%Y-%m-%dT%H:%M:%SZ")
-        except ValueError:
-            fetched_at = datetime.utcnow()
+        columns = RateColumns.from_rows(_parse_api_row(date_str, time_series[date_str]) for date_str in sorted_dates)
 
         return cls(
             source=payload.get("source", "alpha_vantage.FX_DAILY"),
-            fetched_at=fetched_at,
-            bars=bars,
+            fetched_at=_parse_timestamp(payload.get("fetched_at")),
+            columns=columns,
         )
 
     @classmethod
@@ -96,57 +307,196 @@ class RatesSnapshot:
             raise ValueError("基础数据缺少 result 字段。")
 
         bars_payload = result.get("dtList") or []
-        bars = [RateBar.from_storage_dict(item) for item in bars_payload]
-
-        fetched_at_value = result.get("fetched_at")
-        try:
-            fetched_at = datetime.strptime(fetched_at_value, "%Y-%m-%dT%H:%M:%SZ") if fetched_at_value else datetime.utcnow()
-        except ValueError:
-            fetched_at = datetime.utcnow()
+        columns = RateColumns.from_rows(_parse_storage_row(item) for item in bars_payload)
 
         return cls(
             source=result.get("source", "alpha_vantage.FX_DAILY"),
-            fetched_at=fetched_at,
-            bars=bars,
+            fetched_at=_parse_timestamp(result.get("fetched_at")),
+            columns=columns,
         )
 
     def to_storage(self) -> dict:
+        columns = self.columns
         return {
             "success": "1",
             "result": {
                 "source": self.source,
                 "fetched_at": self.fetched_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
-                "dtList": [bar.to_storage_dict() for bar in self.bars],
+                "dtList": [
+                    {
+                        "d": label,
+                        "o": f"{open_price:.4f}",
+                        "c": f"{close_price:.4f}",
+                        "h": f"{high_price:.4f}",
+                        "l": f"{low_price:.4f}",
+                        "am": f"{amplitude:.2f}",
+                    }
+                    for label, open_price, close_price, high_price, low_price, amplitude in zip(
+                        self.date_labels(),
+                        columns.open,
+                        columns.close,
+                        columns.high,
+                        columns.low,
+                        columns.amplitude,
+                    )
+                ],
             },
         }
 
+    @classmethod
+    def from_compact(cls, payload: dict) -> "RatesSnapshot":
+        """解析 ``to_compact`` 生成的紧凑格式。"""
+        if payload.get("format") != COMPACT_FORMAT:
+            raise ValueError(f"不支持的存储格式：{payload.get('format')}")
+        try:
+            dates = array(_DATE_TYPECODE, accumulate(payload["d"]))
+            values = [
+                array(_VALUE_TYPECODE, [value / scale for value in accumulate(payload[key])])
+                for key, scale in _COMPACT_COLUMNS
+            ]
+            columns = RateColumns(dates, *values)
+        except (KeyError, TypeError, OverflowError) as exc:
+            raise ValueError("基础数据格式不正确。") from exc
+        return cls(
+            source=payload.get("source", "alpha_vantage.FX_DAILY"),
+            fetched_at=_parse_timestamp(payload.get("fetched_at")),
+            columns=columns,
+        )
+
+    def to_compact(self) -> dict:
+        """紧凑存储格式：整数缩放 + 差分编码，精度与 ``to_storage`` 的字符串格式一致。"""
+        columns = self.columns
+        payload = {
+            "format": COMPACT_FORMAT,
+            "source": self.source,
+            "fetched_at": self.fetched_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "d": _delta_encode(columns.dates),
+        }
+        for (key, scale), column in zip(_COMPACT_COLUMNS, columns.value_columns()):
+            payload[key] = _delta_encode([round(value * scale) for value in column])
+        return payload
+
+    def upsert(self, incoming: "RatesSnapshot") -> "RatesSnapshot":
+        """按日期把 ``incoming`` 合并进当前快照，返回仅包含新增或变更行的增量快照。
+
+        常见情形下新数据全部晚于已有日期，只需在列尾追加；否则按日期重建列。
+        """
+        columns = self.columns
+        delta = RateColumns()
+        tail_date = columns.dates[-1] if columns else None
+        for i in range(len(incoming.columns)):
+            row = incoming.columns.row(i)
+            if tail_date is not None and row[0] <= tail_date:
+                position = bisect_left(columns.dates, row[0])
+                if columns.dates[position] == row[0] and columns.row(position) == row:
+                    continue
+            delta.append(row)
+
+        if delta:
+            if columns and delta.dates[0] <= columns.dates[-1]:
+                merged = {columns.dates[i]: columns.row(i) for i in range(len(columns))}
+                merged.update((delta.dates[i], delta.row(i)) for i in range(len(delta)))
+                self.columns = RateColumns.from_rows(merged[key] for key in sorted(merged))
+            elif columns.is_view:
+                # 视图只读：复制出自有的列后再追加，原快照不受影响。
+                self.columns = columns.copy()
+                self.columns.extend(delta)
+            else:
+                try:
+                    columns.extend(delta)
+                except BufferError:
+                    # 已有视图引用当前列时数组无法扩容，改为复制后追加，视图仍指向旧数据。
+                    self.columns = columns.copy()
+                    self.columns.extend(delta)
+            self._date_labels = None
+            self._fingerprint = None
+
+        self.source = incoming.source
+        self.fetched_at = incoming.fetched_at
+        return RatesSnapshot(source=incoming.source, fetched_at=incoming.fetched_at, columns=delta)
+
+    def _view(self, start: int, stop: int) -> "RatesSnapshot":
+        return RatesSnapshot(source=self.source, fetched_at=self.fetched_at, columns=self.columns.view(start, stop))
+
+    def copy(self) -> "RatesSnapshot":
+        """复制出不共享缓冲区的独立快照。"""
+        snapshot = RatesSnapshot(source=self.source, fetched_at=self.fetched_at, columns=self.columns.copy())
+        snapshot.stale = self.stale
+        return snapshot
+
+    def range(self, start: "int | str", end: "int | str") -> "RatesSnapshot":
+        """日期位于 [start, end] 闭区间内的日线，二分查找定位，返回共享底层数据的只读视图。"""
+        dates = self.columns.dates
+        lower = bisect_left(dates, parse_date_key(start))
+        upper = bisect_right(dates, parse_date_key(end))
+        return self._view(lower, max(lower, upper))
+
+    def window(self, last_n: int) -> "RatesSnapshot":
+        """最近 ``last_n`` 个交易日的只读视图。"""
+        size = len(self.columns)
+        return self._view(max(size - max(int(last_n), 0), 0), size)
+
+    def asof(self, value: "int | str") -> Optional[RateBar]:
+        """截至 ``value``（含当日）的最后一根日线，早于首个交易日时返回 None。"""
+        position = bisect_right(self.columns.dates, parse_date_key(value))
+        if not position:
+            return None
+        return RateBar.from_row(self.columns.row(position - 1))
+
+    def fingerprint(self, rows: Optional[int] = None) -> str:
+        """前 ``rows`` 行（默认全部）日期与数值的内容摘要，数据追加或修订后随之变化。"""
+        columns = self.columns
+        size = len(columns) if rows is None else min(max(int(rows), 0), len(columns))
+        cached = self._fingerprint
+        if cached is not None and cached[0] == size and size == len(columns):
+            return cached[1]
+
+        digest = hashlib.blake2b(size.to_bytes(8, "little"), digest_size=16)
+        for column in (columns.dates, *columns.value_columns()):
+            digest.update(memoryview(column)[:size])
+        value = digest.hexdigest()
+        if size == len(columns):
+            self._fingerprint = (size, value)
+        return value
+
+    def date_labels(self) -> List[str]:
+        """返回 YYYYMMDD 字符串形式的日期轴，首次访问后缓存。"""
+        if self._date_labels is None or len(self._date_labels) != len(self.columns):
+            self._date_labels = [str(value) for value in self.columns.dates]
+        return self._date_labels
+
     def to_chart_payload(self) -> dict:
+        """返回图表所需的各列数据。
+
+        数值列直接引用底层的 ``array`` 缓冲区而非复制，调用方应视其为只读。
+        """
+        columns = self.columns
         return {
-            "dates": [bar.date for bar in self.bars],
-            "open": [bar.open_price for bar in self.bars],
-            "close": [bar.close_price for bar in self.bars],
-            "high": [bar.high_price for bar in self.bars],
-            "low": [bar.low_price for bar in self.bars],
-            "amplitude": [bar.amplitude for bar in self.bars],
+            "dates": self.date_labels(),
+            "open": columns.open,
+            "close": columns.close,
+            "high": columns.high,
+            "low": columns.low,
+            "amplitude": columns.amplitude,
         }
 
     def is_empty(self) -> bool:
-        return not self.bars
+        return not self.columns
 
     def trading_days(self) -> int:
-        return len(self.bars)
+        return len(self.columns)
 
     def first_bar(self) -> Optional[RateBar]:
-        if not self.bars:
+        if not self.columns:
             return None
-        return self.bars[0]
+        return RateBar.from_row(self.columns.row(0))
 
     def latest_bar(self) -> Optional[RateBar]:
-        if not self.bars:
+        if not self.columns:
             return None
-        return self.bars[-1]
+        return RateBar.from_row(self.columns.row(-1))
 
     def date_span(self) -> str:
-        if not self.bars:
+        if not self.columns:
             return ""
-        return f"{self.bars[0].date} — {self.bars[-1].date}"
+        return f"{self.columns.dates[0]} — {self.columns.dates[-1]}"
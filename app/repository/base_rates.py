@@ -1,12 +1,36 @@
 from __future__ import annotations
 
 import json
+import os
+import zlib
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
-from app.config import APP_PATHS
+from app.config import APP_PATHS, COMPRESSED_SUFFIXES, JSON_STORAGE_ENCODING
 from app.models.rate import RatesSnapshot
+from app.services.tracing import traced
+
+JOURNAL_COMPACT_THRESHOLD = 64
+JSON_ENCODINGS = ("raw", "compact")
+# 早期版本对 raw 格式的称呼。
+_ENCODING_ALIASES = {"legacy": "raw"}
+_GZIP_MAGIC = b"\x1f\x8b"
+# zlib 流首字节固定为 0x78（32K 窗口），JSON 文本不会以此开头。
+_ZLIB_MAGIC = b"\x78"
+
+DateKey = Union[int, str]
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """先写入同目录的临时文件并 fsync，再原子替换目标文件，中途失败不会留下半个文件。"""
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tmp_path.open("wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
 
 
 class BaseRatesRepository(ABC):
@@ -18,34 +42,183 @@ class BaseRatesRepository(ABC):
     def save_snapshot(self, snapshot: RatesSnapshot) -> None:
         raise NotImplementedError
 
+    @property
+    def rollup_path(self) -> Optional[Path]:
+        """多周期聚合缓存（``RollupRepository``）的存放位置，None 表示不缓存。"""
+        return None
+
+    def compact(self) -> None:
+        """把尚未合并的增量日志写回主存储，之后主存储单独即为完整数据；默认实现无旁路日志。"""
+
+    def upsert_bars(self, delta: RatesSnapshot) -> None:
+        """按日期写入增量数据，默认实现为读取、合并后整体回写。"""
+        current = self.load_snapshot()
+        if current is None:
+            self.save_snapshot(delta)
+            return
+        current.upsert(delta)
+        self.save_snapshot(current)
+
+    def load_range(self, start: DateKey, end: DateKey) -> Optional[RatesSnapshot]:
+        """读取 [start, end] 区间内的日线，默认实现基于完整快照切片。"""
+        snapshot = self.load_snapshot()
+        if snapshot is None:
+            return None
+        # 复制出区间内的行，避免视图让整份历史一直驻留内存。
+        return snapshot.range(start, end).copy()
+
+    def latest(self, count: int) -> Optional[RatesSnapshot]:
+        """读取最近 ``count`` 个交易日，默认实现基于完整快照切片。"""
+        snapshot = self.load_snapshot()
+        if snapshot is None:
+            return None
+        return snapshot.window(count).copy()
+
+
+def _compress(data: bytes, compression: Optional[str]) -> bytes:
+    if compression == "gzip":
+        # wbits=31 输出 gzip 封装，头部时间戳固定为 0，内容不变时文件逐字节一致。
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    if compression == "zlib":
+        return zlib.compress(data, 9)
+    return data
+
+
+def _decompress(data: bytes) -> bytes:
+    """按文件头识别压缩方式，与扩展名无关。"""
+    if data[:2] == _GZIP_MAGIC:
+        return zlib.decompress(data, 31)
+    if data[:1] == _ZLIB_MAGIC:
+        return zlib.decompress(data)
+    return data
+
 
 class JsonBaseRatesRepository(BaseRatesRepository):
-    def __init__(self, file_path: Path | None = None) -> None:
+    """JSON 快照仓储，增量数据以 JSON Lines 追加到旁路日志，累积到阈值后合并回主文件。
+
+    主文件默认以明文格式（``RatesSnapshot.to_storage``）写入，``encoding="compact"`` 时改用紧凑格式
+    （``RatesSnapshot.to_compact``），``.gz`` / ``.zz`` 扩展名额外压缩；读取时自动识别压缩方式以及两种格式。写入先落到临时文件并 fsync，再原子替换。
+    """
+
+    def __init__(
+        self,
+        file_path: Path | None = None,
+        compact_threshold: int = JOURNAL_COMPACT_THRESHOLD,
+        encoding: str = JSON_STORAGE_ENCODING,
+        compression: Optional[str] = None,
+    ) -> None:
+        encoding = _ENCODING_ALIASES.get(encoding, encoding)
+        if encoding not in JSON_ENCODINGS:
+            raise ValueError(f"不支持的 JSON 存储格式：{encoding}（可选 {' / '.join(JSON_ENCODINGS)}）")
         self._file_path = file_path or APP_PATHS.base_rates_file
+        self._compact_threshold = compact_threshold
+        self._encoding = encoding
+        self._compression = compression or COMPRESSED_SUFFIXES.get(self._file_path.suffix.lower())
+
+    @property
+    def journal_path(self) -> Path:
+        return self._file_path.with_name(f"{self._file_path.name}.journal")
 
+    @property
+    def rollup_path(self) -> Path:
+        return self._file_path.with_name(f"{self._file_path.name}.rollups")
+
+    @traced("repository.json.load_snapshot")
     def load_snapshot(self) -> Optional[RatesSnapshot]:
+        snapshot = self._load_base()
+        for entry in self._read_journal():
+            if snapshot is None:
+                snapshot = entry
+            else:
+                snapshot.upsert(entry)
+        return snapshot
+
+    @traced("repository.json.save_snapshot")
+    def save_snapshot(self, snapshot: RatesSnapshot) -> None:
+        data = _compress(self._encode(snapshot), self._compression)
+        try:
+            write_atomic(self._file_path, data)
+            self.journal_path.unlink(missing_ok=True)
+        except OSError as exc:
+            raise RuntimeError(f"基础数据写入失败：{exc}") from exc
+
+    @traced("repository.json.upsert_bars")
+    def upsert_bars(self, delta: RatesSnapshot) -> None:
+        if not self._file_path.exists():
+            self.save_snapshot(delta)
+            return
+
+        journal = self.journal_path
+        try:
+            with journal.open("a", encoding="utf-8") as fh:
+                fh.write(json.dumps(delta.to_storage()["result"], ensure_ascii=False, separators=(",", ":")))
+                fh.write("\n")
+        except OSError as exc:
+            raise RuntimeError(f"基础数据写入失败：{exc}") from exc
+
+        if self._journal_length() >= self._compact_threshold:
+            snapshot = self.load_snapshot()
+            if snapshot is not None:
+                self.save_snapshot(snapshot)
+
+    @traced("repository.json.compact")
+    def compact(self) -> None:
+        if not self.journal_path.exists():
+            return
+        snapshot = self.load_snapshot()
+        if snapshot is not None:
+            self.save_snapshot(snapshot)
+
+    def _encode(self, snapshot: RatesSnapshot) -> bytes:
+        if self._encoding == "raw":
+            text = json.dumps(snapshot.to_storage(), ensure_ascii=False, indent=2)
+        else:
+            text = json.dumps(snapshot.to_compact(), ensure_ascii=False, separators=(",", ":"))
+        return text.encode("utf-8")
+
+    def _load_base(self) -> Optional[RatesSnapshot]:
         path = self._file_path
         if not path.exists():
             return None
         try:
-            with path.open("r", encoding="utf-8") as fh:
-                payload = json.load(fh)
-        except (OSError, json.JSONDecodeError) as exc:
+            payload = json.loads(_decompress(path.read_bytes()))
+        except (OSError, zlib.error, ValueError) as exc:
             raise RuntimeError(f"基础数据读取失败：{exc}") from exc
 
         if not payload:
             return None
 
         try:
+            if isinstance(payload, dict) and "format" in payload:
+                return RatesSnapshot.from_compact(payload)
             return RatesSnapshot.from_storage(payload)
         except ValueError as exc:
             raise RuntimeError(f"基础数据格式不正确：{exc}") from exc
 
-    def save_snapshot(self, snapshot: RatesSnapshot) -> None:
-        path = self._file_path
-        path.parent.mkdir(parents=True, exist_ok=True)
+    def _read_journal(self) -> list[RatesSnapshot]:
+        journal = self.journal_path
+        if not journal.exists():
+            return []
+        entries = []
         try:
-            with path.open("w", encoding="utf-8") as fh:
-                json.dump(snapshot.to_storage(), fh, ensure_ascii=False, indent=2)
+            with journal.open("r", encoding="utf-8") as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(RatesSnapshot.from_storage({"result": json.loads(line)}))
+                    except (json.JSONDecodeError, ValueError):
+                        # 追加过程中断时末行可能不完整，跳过即可，不影响主文件。
+                        continue
         except OSError as exc:
-            raise RuntimeError(f"基础数据写入失败：{exc}") from exc
+            raise RuntimeError(f"基础数据读取失败：{exc}") from exc
+        return entries
+
+    def _journal_length(self) -> int:
+        try:
+            with self.journal_path.open("r", encoding="utf-8") as fh:
+                return sum(1 for line in fh if line.strip())
+        except OSError:
+            return 0
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import calendar
+import mmap
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from app.config import APP_PATHS
+from app.models.rate import RateColumns, RateRow, RatesSnapshot, parse_date_key
+from app.repository.base_rates import BaseRatesRepository, DateKey
+from app.services.tracing import traced
+
+MAGIC = b"D2YR"
+VERSION = 1
+# 头部：魔数、版本、单条记录长度、记录数、抓取时间（UTC 秒）、数据来源（UTF-8，右侧补零）。
+HEADER = struct.Struct("<4sHHIq44s")
+# 记录：日期 int32 + 开/收/高/低/振幅 float64，小端、无填充。
+RECORD = struct.Struct("<i5d")
+_COUNT_OFFSET = 8
+
+
+def _encode_header(count: int, snapshot: RatesSnapshot) -> bytes:
+    source = snapshot.source.encode("utf-8")[: HEADER.size - 20]
+    fetched_at = calendar.timegm(snapshot.fetched_at.timetuple())
+    return HEADER.pack(MAGIC, VERSION, RECORD.size, count, fetched_at, source)
+
+
+class _DateIndex(Sequence[int]):
+    """直接在映射内存上读取日期字段的序列，供 bisect 进行二分查找。"""
+
+    __slots__ = ("_buffer", "_count")
+
+    def __init__(self, buffer: mmap.mmap, count: int) -> None:
+        self._buffer = buffer
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return struct.unpack_from("<i", self._buffer, HEADER.size + index * RECORD.size)[0]
+
+
+class BinaryRatesReader:
+    """基于 mmap 的只读访问器，打开时只解析头部，按需解码记录。"""
+
+    def __init__(self, file_path: Path) -> None:
+        self._fh = file_path.open("rb")
+        try:
+            self._buffer = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:
+            self._fh.close()
+            raise ValueError("二进制快照为空。") from exc
+
+        try:
+            magic, version, record_size, count, fetched_at, source = HEADER.unpack_from(self._buffer, 0)
+        except struct.error as exc:
+            self.close()
+            raise ValueError("二进制快照头部不完整。") from exc
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError("二进制快照格式不受支持。")
+        if HEADER.size + count * RECORD.size > len(self._buffer):
+            self.close()
+            raise ValueError("二进制快照记录数与文件长度不符。")
+
+        self.count = count
+        self.source = source.rstrip(b"\0").decode("utf-8", errors="replace") or "alpha_vantage.FX_DAILY"
+        self.fetched_at = datetime.utcfromtimestamp(fetched_at)
+        self.dates = _DateIndex(self._buffer, count)
+
+    def __enter__(self) -> "BinaryRatesReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        buffer = getattr(self, "_buffer", None)
+        if buffer is not None and not buffer.closed:
+            buffer.close()
+        self._fh.close()
+
+    def row(self, index: int) -> RateRow:
+        return RECORD.unpack_from(self._buffer, HEADER.size + index * RECORD.size)
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[RateRow]:
+        stop = self.count if stop is None else stop
+        if stop <= start:
+            return []
+        view = memoryview(self._buffer)[HEADER.size + start * RECORD.size : HEADER.size + stop * RECORD.size]
+        try:
+            return list(RECORD.iter_unpack(view))
+        finally:
+            view.release()
+
+    def snapshot(self, start: int = 0, stop: Optional[int] = None) -> RatesSnapshot:
+        return RatesSnapshot(
+            source=self.source,
+            fetched_at=self.fetched_at,
+            columns=RateColumns.from_rows(self.rows(start, stop)),
+        )
+
+    def range_bounds(self, start: DateKey, end: DateKey) -> tuple[int, int]:
+        lower = bisect_left(self.dates, parse_date_key(start))
+        upper = bisect_right(self.dates, parse_date_key(end))
+        return lower, max(lower, upper)
+
+
+class BinaryBaseRatesRepository(BaseRatesRepository):
+    """定长小端二进制快照仓储，适合以读为主的部署。
+
+    ``latest`` 与 ``load_range`` 在映射内存上二分查找日期，只解码命中的记录；
+    ``load_snapshot`` 需要按列存放的完整快照，会解码全部记录。
+    """
+
+    def __init__(self, file_path: Path | None = None) -> None:
+        self._file_path = file_path or APP_PATHS.base_rates_file.with_suffix(".bin")
+
+    @property
+    def file_path(self) -> Path:
+        return self._file_path
+
+    @property
+    def rollup_path(self) -> Path:
+        return self._file_path.with_name(f"{self._file_path.name}.rollups")
+
+    def open_reader(self) -> Optional[BinaryRatesReader]:
+        if not self._file_path.exists():
+            return None
+        try:
+            return BinaryRatesReader(self._file_path)
+        except OSError as exc:
+            raise RuntimeError(f"基础数据读取失败：{exc}") from exc
+        except ValueError as exc:
+            raise RuntimeError(f"基础数据格式不正确：{exc}") from exc
+
+    @traced("repository.binary.load_snapshot")
+    def load_snapshot(self) -> Optional[RatesSnapshot]:
+        reader = self.open_reader()
+        if reader is None:
+            return None
+        with reader:
+            return reader.snapshot()
+
+    @traced("repository.binary.load_range")
+    def load_range(self, start: DateKey, end: DateKey) -> Optional[RatesSnapshot]:
+        reader = self.open_reader()
+        if reader is None:
+            return None
+        with reader:
+            lower, upper = reader.range_bounds(start, end)
+            return reader.snapshot(lower, upper)
+
+    @traced("repository.binary.latest")
+    def latest(self, count: int) -> Optional[RatesSnapshot]:
+        reader = self.open_reader()
+        if reader is None:
+            return None
+        with reader:
+            return reader.snapshot(max(reader.count - max(int(count), 0), 0))
+
+    @traced("repository.binary.save_snapshot")
+    def save_snapshot(self, snapshot: RatesSnapshot) -> None:
+        path = self._file_path
+        columns = snapshot.columns
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp_path.open("wb") as fh:
+                fh.write(_encode_header(len(columns), snapshot))
+                fh.write(b"".join(RECORD.pack(*columns.row(i)) for i in range(len(columns))))
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            raise RuntimeError(f"基础数据写入失败：{exc}") from exc
+
+    @traced("repository.binary.upsert_bars")
+    def upsert_bars(self, delta: RatesSnapshot) -> None:
+        reader = self.open_reader()
+        if reader is None:
+            self.save_snapshot(delta)
+            return
+        with reader:
+            count = reader.count
+            last_date = reader.dates[-1] if count else None
+
+        columns = delta.columns
+        if last_date is not None and columns and columns.dates[0] <= last_date:
+            super().upsert_bars(delta)
+            return
+
+        # 新数据全部晚于已有记录：在文件尾追加，再原地更新头部中的记录数与元数据。
+        try:
+            with self._file_path.open("r+b") as fh:
+                fh.seek(HEADER.size + count * RECORD.size)
+                fh.write(b"".join(RECORD.pack(*columns.row(i)) for i in range(len(columns))))
+                fh.truncate()
+                fh.flush()
+                os.fsync(fh.fileno())
+                fh.seek(0)
+                fh.write(_encode_header(count + len(columns), delta))
+                fh.flush()
+                os.fsync(fh.fileno())
+        except OSError as exc:
+            raise RuntimeError(f"基础数据写入失败：{exc}") from exc
@@ -0,0 +1,42 @@
+"""在 JSON、SQLite 与二进制快照之间互相转换。
+
+用法：``python -m app.repository.convert data/usd_cny_base.json data/usd_cny_base.bin``
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+from app.models.rate import RatesSnapshot
+from app.repository.factory import create_repository
+
+
+def convert_snapshot(source: Path, target: Path) -> RatesSnapshot:
+    """读取 ``source`` 中的完整快照并写入 ``target``，格式由各自的扩展名决定。"""
+    snapshot = create_repository(source).load_snapshot()
+    if snapshot is None:
+        raise RuntimeError(f"未找到可转换的基础数据：{source}")
+    create_repository(target).save_snapshot(snapshot)
+    return snapshot
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="转换基础汇率数据的存储格式。")
+    parser.add_argument("source", type=Path, help="源文件（.json / .sqlite3 / .bin 等）")
+    parser.add_argument("target", type=Path, help="目标文件，格式由扩展名决定")
+    args = parser.parse_args(argv)
+
+    try:
+        snapshot = convert_snapshot(args.source, args.target)
+    except (RuntimeError, ValueError) as exc:
+        print(f"转换失败：{exc}", file=sys.stderr)
+        return 1
+
+    print(f"已将 {snapshot.trading_days()} 条日线从 {args.source} 写入 {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.config import APP_PATHS, resolve_storage_backend, storage_suffix
+from app.repository.base_rates import BaseRatesRepository, JsonBaseRatesRepository
+
+
+def create_repository(path: Path | None = None) -> BaseRatesRepository:
+    """根据文件扩展名创建对应的仓储，未指定路径时使用 ``APP_PATHS`` 中的配置。"""
+    if path is None:
+        path, backend = APP_PATHS.base_rates_file, APP_PATHS.base_rates_backend
+    else:
+        backend = resolve_storage_backend(path)
+
+    # 非默认后端按需导入，避免启动时加载 sqlite3 / mmap。
+    if backend == "sqlite":
+        from app.repository.sqlite_rates import SqliteBaseRatesRepository
+
+        return SqliteBaseRatesRepository(path)
+    if backend == "binary":
+        from app.repository.binary_rates import BinaryBaseRatesRepository
+
+        return BinaryBaseRatesRepository(path)
+    return JsonBaseRatesRepository(path)
+
+
+def pair_storage_path(from_symbol: str, to_symbol: str, base_path: Path | None = None) -> Path:
+    """货币对对应的存储文件：与默认快照同目录、同扩展名，文件名形如 ``eur_cny_base.json``。
+
+    SQLite 后端所有货币对共用一个数据库文件，按表区分。
+    """
+    base_path = base_path or APP_PATHS.base_rates_file
+    if resolve_storage_backend(base_path) == "sqlite":
+        return base_path
+    return base_path.with_name(f"{from_symbol}_{to_symbol}_base{storage_suffix(base_path)}".lower())
+
+
+def create_pair_repository(from_symbol: str, to_symbol: str, base_path: Path | None = None) -> BaseRatesRepository:
+    path = pair_storage_path(from_symbol, to_symbol, base_path)
+    if resolve_storage_backend(path) == "sqlite":
+        from app.repository.sqlite_rates import SqliteBaseRatesRepository
+
+        return SqliteBaseRatesRepository(path, from_symbol=from_symbol, to_symbol=to_symbol)
+    return create_repository(path)
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional
+
+from app.models.rate import RatesSnapshot
+from app.repository.base_rates import write_atomic
+from app.services.rollups import RollupSet
+from app.services.tracing import traced
+
+ROLLUP_FORMAT = "fx-rollups/1"
+
+
+class RollupRepository:
+    """多周期聚合缓存，存放在基础快照旁的 ``*.rollups`` 文件中，各周期为紧凑格式。
+
+    缓存可随时由日线重建：文件缺失、损坏或版本不符时 ``load`` 返回 None，由调用方重建。
+    """
+
+    def __init__(self, file_path: Path) -> None:
+        self._file_path = file_path
+
+    @property
+    def file_path(self) -> Path:
+        return self._file_path
+
+    @traced("repository.rollups.load")
+    def load(self) -> Optional[RollupSet]:
+        try:
+            payload = json.loads(self._file_path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(payload, dict) or payload.get("format") != ROLLUP_FORMAT:
+            return None
+        try:
+            return RollupSet(
+                bars={name: RatesSnapshot.from_compact(item) for name, item in payload["bars"].items()},
+                rows=int(payload["rows"]),
+                first=int(payload["first"]),
+                through=int(payload["through"]),
+            )
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+
+    @traced("repository.rollups.save")
+    def save(self, rollups: RollupSet) -> None:
+        payload = {
+            "format": ROLLUP_FORMAT,
+            "rows": rollups.rows,
+            "first": rollups.first,
+            "through": rollups.through,
+            "bars": {name: snapshot.to_compact() for name, snapshot in rollups.bars.items()},
+        }
+        try:
+            write_atomic(self._file_path, json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        except OSError as exc:
+            raise RuntimeError(f"聚合缓存写入失败：{exc}") from exc
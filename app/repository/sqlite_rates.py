@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from app.config import APP_PATHS
+from app.models.rate import RateColumns, RatesSnapshot, parse_date_key
+from app.repository.base_rates import BaseRatesRepository, DateKey
+from app.services.tracing import traced
+
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+_SYMBOL_PATTERN = re.compile(r"^[A-Za-z]{3}$")
+_COLUMNS = "date, open, close, high, low, amplitude"
+
+
+class SqliteBaseRatesRepository(BaseRatesRepository):
+    """SQLite 仓储：每个货币对一张以日期为主键的表，开启 WAL 以便读写并发。"""
+
+    def __init__(self, file_path: Path | None = None, from_symbol: str = "USD", to_symbol: str = "CNY") -> None:
+        if not (_SYMBOL_PATTERN.match(from_symbol) and _SYMBOL_PATTERN.match(to_symbol)):
+            raise ValueError("货币代码需为三位字母。")
+        self._file_path = file_path or APP_PATHS.base_rates_file.with_suffix(".sqlite3")
+        self._pair = f"{from_symbol}{to_symbol}".upper()
+        self._table = f"rates_{from_symbol}_{to_symbol}".lower()
+        self._initialized = False
+
+    @property
+    def file_path(self) -> Path:
+        return self._file_path
+
+    @property
+    def rollup_path(self) -> Path:
+        # 多个货币对共用一个数据库文件，聚合缓存按表名区分。
+        return self._file_path.with_name(f"{self._file_path.name}.{self._table}.rollups")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        try:
+            if not self._initialized:
+                self._file_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._file_path))
+        except (OSError, sqlite3.Error) as exc:
+            raise RuntimeError(f"基础数据库打开失败：{exc}") from exc
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                    "date INTEGER PRIMARY KEY, open REAL NOT NULL, close REAL NOT NULL, "
+                    "high REAL NOT NULL, low REAL NOT NULL, amplitude REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS snapshot_meta ("
+                    "pair TEXT PRIMARY KEY, source TEXT NOT NULL, fetched_at TEXT NOT NULL)"
+                )
+                conn.commit()
+                self._initialized = True
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _read_meta(self, conn: sqlite3.Connection) -> Optional[Tuple[str, datetime]]:
+        row = conn.execute("SELECT source, fetched_at FROM snapshot_meta WHERE pair = ?", (self._pair,)).fetchone()
+        if row is None:
+            return None
+        try:
+            fetched_at = datetime.strptime(row[1], _TIMESTAMP_FORMAT)
+        except ValueError:
+            fetched_at = datetime.utcnow()
+        return row[0], fetched_at
+
+    def _write_meta(self, conn: sqlite3.Connection, snapshot: RatesSnapshot) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO snapshot_meta (pair, source, fetched_at) VALUES (?, ?, ?)",
+            (self._pair, snapshot.source, snapshot.fetched_at.strftime(_TIMESTAMP_FORMAT)),
+        )
+
+    def _query(self, sql: str, params: tuple = (), reverse: bool = False) -> Optional[RatesSnapshot]:
+        try:
+            with self._connect() as conn:
+                meta = self._read_meta(conn)
+                rows = conn.execute(sql, params).fetchall()
+        except sqlite3.Error as exc:
+            raise RuntimeError(f"基础数据读取失败：{exc}") from exc
+
+        if meta is None and not rows:
+            return None
+        if reverse:
+            rows.reverse()
+        source, fetched_at = meta or ("alpha_vantage.FX_DAILY", datetime.utcnow())
+        return RatesSnapshot(source=source, fetched_at=fetched_at, columns=RateColumns.from_rows(rows))
+
+    def _write(self, snapshot: RatesSnapshot, replace_all: bool) -> None:
+        columns = snapshot.columns
+        rows = (columns.row(i) for i in range(len(columns)))
+        try:
+            with self._connect() as conn:
+                with conn:
+                    if replace_all:
+                        conn.execute(f"DELETE FROM {self._table}")
+                    conn.executemany(f"INSERT OR REPLACE INTO {self._table} ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)", rows)
+                    self._write_meta(conn, snapshot)
+        except sqlite3.Error as exc:
+            raise RuntimeError(f"基础数据写入失败：{exc}") from exc
+
+    @traced("repository.sqlite.load_snapshot")
+    def load_snapshot(self) -> Optional[RatesSnapshot]:
+        return self._query(f"SELECT {_COLUMNS} FROM {self._table} ORDER BY date")
+
+    @traced("repository.sqlite.save_snapshot")
+    def save_snapshot(self, snapshot: RatesSnapshot) -> None:
+        self._write(snapshot, replace_all=True)
+
+    @traced("repository.sqlite.upsert_bars")
+    def upsert_bars(self, delta: RatesSnapshot) -> None:
+        self._write(delta, replace_all=False)
+
+    @traced("repository.sqlite.load_range")
+    def load_range(self, start: DateKey, end: DateKey) -> Optional[RatesSnapshot]:
+        return self._query(
+            f"SELECT {_COLUMNS} FROM {self._table} WHERE date BETWEEN ? AND ? ORDER BY date",
+            (parse_date_key(start), parse_date_key(end)),
+        )
+
+    @traced("repository.sqlite.latest")
+    def latest(self, count: int) -> Optional[RatesSnapshot]:
+        return self._query(
+            f"SELECT {_COLUMNS} FROM {self._table} ORDER BY date DESC LIMIT ?",
+            (max(int(count), 0),),
+            reverse=True,
+        )
@@ -1,24 +1,73 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import io
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict
+from threading import Event
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import requests
 
 from app.models.rate import RatesSnapshot
+from app.services.fx_schedule import next_daily_close
+from app.services.fx_stream import ParseStats, WindowedPayload, parse_fx_daily_stream
+# get_shared_session 已移至 http，此处保留导入以兼容旧的引用路径。
+from app.services.http import get_shared_session, get_with_retries  # noqa: F401
+# CurrencyPair / PairFetchResult 已移至 providers，此处保留导入以兼容旧的引用路径。
+from app.services.providers import CurrencyPair, PairFetchResult, ProviderError, ProviderRateLimitError, RatesProvider  # noqa: F401
+from app.services.rate_limiter import RateLimiter, RateLimitExceeded
+from app.services.response_cache import CacheEntry, CacheKey, ResponseCache
+from app.services.single_flight import SingleFlight
+from app.services.tracing import span, traced
+
+# compact 模式下接口返回的最近数据点数量。
+COMPACT_POINTS = 100
+_RATE_LIMIT_KEYS = ("Note", "Information")
+
+# 进程内共享：相同 (function, symbols, outputsize) 的并发请求只发出一次。
+_IN_FLIGHT: SingleFlight[Tuple[CacheEntry, WindowedPayload]] = SingleFlight()
+
+
+class AlphaVantageError(ProviderError):
+    """AlphaVantage API 异常。"""
 
 
-class AlphaVantageError(Exception):
-    """AlphaVantage API 异常。"""
+class AlphaVantageRateLimitError(AlphaVantageError, ProviderRateLimitError):
+    """服务端返回限流提示或本地额度不足。"""
 
 
 @dataclass
-class AlphaVantageClient:
+class AlphaVantageClient(RatesProvider):
+    name = "alpha_vantage"
+
     api_key: str
     base_url: str = "https://www.alphavantage.co/query"
-
-    def fetch_rates(self, days: int, outputsize: str = "compact") -> RatesSnapshot:
+    cache: Optional[ResponseCache] = None
+    limiter: Optional[RateLimiter] = None
+    connect_timeout: float = 5.0
+    read_timeout: float = 20.0
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_cap: float = 8.0
+    session: Optional[requests.Session] = field(default=None, repr=False)
+    # 未在 fetch_rates 中显式传入 on_wait 时使用的排队回调，便于经由 BaseRatesService 调用时上报等待。
+    on_wait: Optional[Callable[[float], None]] = field(default=None, repr=False)
+    # 置位后放弃排队中的请求并归还额度，通常为后台任务的取消事件。
+    cancel_event: Optional[Event] = field(default=None, repr=False)
+    # 最近一次解析响应的耗时与内存统计；track_parse_memory 开启时额外记录 tracemalloc 峰值。
+    track_parse_memory: bool = False
+    last_parse_stats: Optional[ParseStats] = field(default=None, init=False, repr=False)
+
+    @traced("alpha_vantage.fetch_rates")
+    def fetch_rates(
+        self,
+        days: int,
+        outputsize: str = "compact",
+        on_wait: Optional[Callable[[float], None]] = None,
+        from_symbol: str = "USD",
+        to_symbol: str = "CNY",
+    ) -> RatesSnapshot:
+        """拉取日线数据；需要排队等待额度时以预计等待秒数调用 ``on_wait``。"""
         if not self.api_key:
             raise AlphaVantageError("请提供有效的 API Key。")
 
@@ -31,34 +80,123 @@ class AlphaVantageClient:
         if size not in {"compact", "full"}:
             size = "compact"
 
+        from_code = (from_symbol or "").strip().upper()
+        to_code = (to_symbol or "").strip().upper()
+        if not (len(from_code) == 3 and len(to_code) == 3 and (from_code + to_code).isalpha()):
+            raise AlphaVantageError("货币代码需为三位字母。")
+
+        cache_key = CacheKey("FX_DAILY", from_code, to_code, size)
+        if self.cache is not None:
+            entry = self.cache.lookup(cache_key)
+            if entry is not None:
+                return self._snapshot_from_cache(entry, cache_key, days_int)
+
+        try:
+            entry, parsed = _IN_FLIGHT.do(
+                cache_key,
+                lambda: self._request(cache_key, days_int, on_wait or self.on_wait),
+            )
+        except AlphaVantageRateLimitError:
+            if self.cache is not None:
+                stale_entry = self.cache.lookup(cache_key, allow_stale=True)
+                if stale_entry is not None:
+                    return self._snapshot_from_cache(stale_entry, cache_key, days_int)
+            raise
+
+        return self._snapshot_from_cache(entry, cache_key, days_int, parsed)
+
+    def _request(
+        self,
+        cache_key: CacheKey,
+        days: int,
+        on_wait: Optional[Callable[[float], None]],
+    ) -> Tuple[CacheEntry, WindowedPayload]:
+        if self.limiter is not None:
+            try:
+                self.limiter.acquire(on_wait=on_wait, cancel=self.cancel_event)
+            except RateLimitExceeded as exc:
+                raise AlphaVantageRateLimitError(str(exc)) from exc
+
         params = {
-            "function": "FX_DAILY",
-            "from_symbol": "USD",
-            "to_symbol": "CNY",
+            "function": cache_key.function,
+            "from_symbol": cache_key.from_symbol,
+            "to_symbol": cache_key.to_symbol,
             "apikey": self.api_key,
-            "outputsize": size,
+            "outputsize": cache_key.outputsize,
         }
 
         try:
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
+            response = self._get_with_retries(params)
         except requests.RequestException as exc:
             raise AlphaVantageError("无法连接到汇率服务，请检查网络或稍后再试。") from exc
 
-        try:
-            data: Dict[str, Any] = response.json()
-        except ValueError as exc:
-            raise AlphaVantageError("API 返回的内容不是有效的 JSON。") from exc
+        body = response.content
+        parsed = self._parse(body, days)
+        data = parsed.fields
 
         if "Error Message" in data:
             raise AlphaVantageError(data["Error Message"])
 
-        if "Note" in data:
-            raise AlphaVantageError(data["Note"])
+        for limit_key in _RATE_LIMIT_KEYS:
+            if limit_key in data and parsed.time_series is None:
+                raise AlphaVantageRateLimitError(data[limit_key])
+
+        # 缓存保存原始响应体，命中时按各自的窗口重新流式解析。
+        now = datetime.utcnow()
+        if self.cache is not None:
+            return self.cache.store(cache_key, body, now=now), parsed
+        return CacheEntry(key=cache_key, body=body, stored_at=now, expires_at=next_daily_close(now)), parsed
+
+    def _parse(self, body: bytes, window: int) -> WindowedPayload:
+        try:
+            with span("alpha_vantage.decode", bytes=len(body), window=window):
+                parsed = parse_fx_daily_stream(io.BytesIO(body), window=window, track_memory=self.track_parse_memory)
+        except ValueError as exc:
+            raise AlphaVantageError("API 返回的内容不是有效的 JSON。") from exc
+        self.last_parse_stats = parsed.stats
+        return parsed
 
+    def _get_with_retries(self, params: Dict[str, str]) -> requests.Response:
+        """带退避重试的请求（见 ``get_with_retries``），重试不再占用限流额度。"""
+        try:
+            return get_with_retries(
+                self.session or get_shared_session(),
+                self.base_url,
+                params,
+                timeout=(self.connect_timeout, self.read_timeout),
+                max_retries=self.max_retries,
+                backoff_base=self.backoff_base,
+                backoff_cap=self.backoff_cap,
+                span_prefix="alpha_vantage",
+            )
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            if self.limiter is not None and not isinstance(exc, requests.ReadTimeout):
+                # 请求未能抵达服务端，归还占用的额度。
+                self.limiter.refund()
+            raise
+
+    @staticmethod
+    def _build_snapshot(data: Dict[str, Any], days: int, fetched_at: datetime) -> RatesSnapshot:
         enriched_payload = {
             "source": "alpha_vantage.FX_DAILY",
-            "fetched_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "fetched_at": fetched_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
             **data,
         }
-        return RatesSnapshot.from_api_response(enriched_payload, days_int)
+        return RatesSnapshot.from_api_response(enriched_payload, days)
+
+    def _snapshot_from_cache(
+        self,
+        entry: CacheEntry,
+        requested: CacheKey,
+        days: int,
+        parsed: Optional[WindowedPayload] = None,
+    ) -> RatesSnapshot:
+        # full 条目服务 compact 请求时，只保留 compact 本应返回的最近数据点。
+        if requested.outputsize == "compact" and entry.key.outputsize == "full":
+            days = min(days, COMPACT_POINTS)
+        # 合并请求的跟随者窗口可能更大，此时需按自己的窗口重新解析。
+        if parsed is None or (parsed.window is not None and parsed.window < days):
+            parsed = self._parse(entry.body, days)
+        snapshot = self._build_snapshot(parsed.to_payload(), days, entry.stored_at)
+        snapshot.stale = entry.stale
+        return snapshot
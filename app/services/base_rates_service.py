@@ -1,37 +1,316 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from threading import Event
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence
 
-from app.config import DEFAULT_BASE_DAYS
+from app.config import DEFAULT_BASE_DAYS, INCREMENTAL_COMPACT_MAX_GAP, TRACKED_PAIRS_TEXT, parse_currency_pairs
 from app.models.rate import RatesSnapshot
-from app.repository.base_rates import BaseRatesRepository
-from app.services.alpha_vantage import AlphaVantageClient, AlphaVantageError
+from app.repository.base_rates import BaseRatesRepository, DateKey
+from app.repository.factory import create_pair_repository
+from app.services.tracing import traced
+
+if TYPE_CHECKING:
+    from app.repository.rollups import RollupRepository
+    from app.services.providers import CurrencyPair, PairFetchResult, RatesProvider
+    from app.services.rollups import RollupSet
+
+# full 模式下保留接口返回的全部历史。
+KEEP_ALL_DAYS = 1_000_000
 
 
 class BaseRatesRefreshError(Exception):
     pass
 
 
+class RefreshCancelled(BaseRatesRefreshError):
+    """刷新在写入仓储前被取消，本地数据保持不变。"""
+
+
+def _check_cancelled(cancel: Optional[Event]) -> None:
+    if cancel is not None and cancel.is_set():
+        raise RefreshCancelled("刷新已取消，本地数据未改动。")
+
+
+@dataclass
+class IncrementalRefreshResult:
+    snapshot: RatesSnapshot
+    delta: RatesSnapshot
+    outputsize: str
+    stale: bool = False
+
+
+def trading_days_between(start: date, end: date) -> int:
+    """统计 (start, end] 区间内的工作日数量，作为交易日缺口的上界估计。"""
+    if end <= start:
+        return 0
+    total_days = (end - start).days
+    full_weeks, remainder = divmod(total_days, 7)
+    weekdays = full_weeks * 5
+    for offset in range(1, remainder + 1):
+        if (start.weekday() + offset) % 7 < 5:
+            weekdays += 1
+    return weekdays
+
+
+def _rollup_repository(repository: BaseRatesRepository) -> Optional[RollupRepository]:
+    path = repository.rollup_path
+    if path is None:
+        return None
+    from app.repository.rollups import RollupRepository
+
+    return RollupRepository(path)
+
+
+def _save_rollups(store: Optional[RollupRepository], rollups: RollupSet) -> None:
+    if store is None:
+        return
+    try:
+        store.save(rollups)
+    except RuntimeError:
+        # 聚合缓存可随时由日线重建，写入失败不影响刷新结果。
+        pass
+
+
+def _rebuild_rollups(repository: BaseRatesRepository, snapshot: RatesSnapshot) -> None:
+    """整体覆盖写入日线后重建聚合缓存。"""
+    from app.services.rollups import RollupSet
+
+    store = _rollup_repository(repository)
+    if store is not None and not snapshot.is_empty():
+        _save_rollups(store, RollupSet.build(snapshot))
+
+
+@dataclass
+class PairRefreshResult:
+    pair: CurrencyPair
+    snapshot: Optional[RatesSnapshot] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.snapshot is not None
+
+
 @dataclass
 class BaseRatesService:
+    """``providers`` 为按优先级排列的数据源，刷新方法未显式传入 ``client`` 时按序故障转移；
+    ``hedge_after`` / ``deadline``（秒）见 ``ProviderChain``。"""
+
     repository: BaseRatesRepository
+    pair_repository_factory: Callable[[str, str], BaseRatesRepository] = create_pair_repository
+    providers: Sequence[RatesProvider] = field(default_factory=tuple)
+    hedge_after: Optional[float] = None
+    deadline: Optional[float] = None
 
+    @traced("service.load_snapshot")
     def load_snapshot(self) -> Optional[RatesSnapshot]:
         try:
             return self.repository.load_snapshot()
         except RuntimeError as exc:
             raise BaseRatesRefreshError(str(exc)) from exc
 
-    def refresh_snapshot(self, client: AlphaVantageClient, outputsize: str = "compact", days: int = DEFAULT_BASE_DAYS) -> RatesSnapshot:
+    @traced("service.load_latest")
+    def load_latest(self, count: int = DEFAULT_BASE_DAYS) -> Optional[RatesSnapshot]:
+        try:
+            return self.repository.latest(count)
+        except RuntimeError as exc:
+            raise BaseRatesRefreshError(str(exc)) from exc
+
+    @traced("service.load_range")
+    def load_range(self, start: DateKey, end: DateKey) -> Optional[RatesSnapshot]:
+        try:
+            return self.repository.load_range(start, end)
+        except (RuntimeError, ValueError) as exc:
+            raise BaseRatesRefreshError(str(exc)) from exc
+
+    def compact_storage(self) -> None:
+        """把增量日志合并回主文件，便于只提交或拷贝主文件。"""
+        try:
+            self.repository.compact()
+        except RuntimeError as exc:
+            raise BaseRatesRefreshError(str(exc)) from exc
+
+    @traced("service.load_rollups")
+    def load_rollups(self, daily: Optional[RatesSnapshot] = None, persist: bool = True) -> Optional[RollupSet]:
+        """读取周线、月线等多周期聚合。
+
+        ``daily`` 为完整日线（默认从仓储读取）；缓存缺失或与日线范围不一致时据此重建，
+        ``persist`` 为 False 时只在内存中重建、不写回缓存文件（供导出等只读操作使用）。
+        """
+        from app.services.rollups import RollupSet
+
+        try:
+            daily = daily or self.repository.load_snapshot()
+        except RuntimeError as exc:
+            raise BaseRatesRefreshError(str(exc)) from exc
+        if daily is None or daily.is_empty():
+            return None
+
+        store = _rollup_repository(self.repository)
+        rollups = store.load() if store is not None else None
+        if rollups is None or not rollups.is_current(daily):
+            rollups = RollupSet.build(daily)
+            if persist:
+                _save_rollups(store, rollups)
+        return rollups
+
+    def _update_rollups(self, delta: RatesSnapshot) -> None:
+        """增量写入日线后只重算受影响的周期；缓存尚不存在时按完整日线构建。"""
+        from app.services.rollups import RollupSet, rollup_window_start
+
+        store = _rollup_repository(self.repository)
+        if store is None or delta.is_empty():
+            return
+        rollups = store.load()
+        try:
+            if rollups is None or not rollups.rows:
+                daily = self.repository.load_snapshot()
+                if daily is None:
+                    return
+                rollups = RollupSet.build(daily)
+            else:
+                since = min(delta.columns.dates[0], rollups.through)
+                tail = self.repository.load_range(rollup_window_start(since), 99991231)
+                if tail is None:
+                    return
+                rollups.merge(tail, since)
+        except RuntimeError:
+            # 聚合缓存可随时由日线重建，读取失败时留待下次 load_rollups 处理。
+            return
+        _save_rollups(store, rollups)
+
+    def _provider(self, client: Optional[RatesProvider]) -> RatesProvider:
+        from app.services.providers import ProviderChain, ProviderError
+
+        if client is not None:
+            return client
+        try:
+            return ProviderChain(self.providers, hedge_after=self.hedge_after, deadline=self.deadline)
+        except ProviderError as exc:
+            raise BaseRatesRefreshError(str(exc)) from exc
+
+    @traced("service.refresh_snapshot")
+    def refresh_snapshot(
+        self,
+        client: Optional[RatesProvider] = None,
+        outputsize: str = "compact",
+        days: int = DEFAULT_BASE_DAYS,
+        cancel: Optional[Event] = None,
+    ) -> RatesSnapshot:
+        """拉取并整体覆盖写入日线；``cancel`` 在写入前已置位时放弃写入并抛出 ``RefreshCancelled``。"""
+        from app.services.providers import ProviderError
+
+        provider = self._provider(client)
         try:
-            snapshot = client.fetch_rates(days=days, outputsize=outputsize)
-        except AlphaVantageError as exc:
+            snapshot = provider.fetch_rates(days=days, outputsize=outputsize)
+        except ProviderError as exc:
             raise BaseRatesRefreshError(str(exc)) from exc
 
+        _check_cancelled(cancel)
         try:
             self.repository.save_snapshot(snapshot)
         except RuntimeError as exc:
             raise BaseRatesRefreshError(str(exc)) from exc
 
+        _rebuild_rollups(self.repository, snapshot)
         return snapshot
+
+    @traced("service.refresh_incremental")
+    def refresh_incremental(
+        self,
+        client: Optional[RatesProvider] = None,
+        days: int = DEFAULT_BASE_DAYS,
+        today: Optional[date] = None,
+        cancel: Optional[Event] = None,
+    ) -> IncrementalRefreshResult:
+        """仅拉取本地最后一个交易日之后的数据，按日期合并后追加写入仓储。
+
+        返回结果中的 ``snapshot`` 为合并后最近 ``days`` 个交易日；``cancel`` 在写入前已置位时
+        放弃写入并抛出 ``RefreshCancelled``。
+        """
+        from app.services.providers import ProviderError
+
+        provider = self._provider(client)
+        today = today or datetime.utcnow().date()
+        try:
+            tail = self.repository.latest(1)
+        except RuntimeError as exc:
+            raise BaseRatesRefreshError(str(exc)) from exc
+
+        if tail is None or tail.is_empty():
+            outputsize = "full"
+            fetch_days = KEEP_ALL_DAYS
+        else:
+            last_date = datetime.strptime(str(tail.columns.dates[-1]), "%Y%m%d").date()
+            gap = trading_days_between(last_date, today)
+            outputsize = "compact" if gap < INCREMENTAL_COMPACT_MAX_GAP else "full"
+            # 多取一天以便覆盖最后一根可能仍在变动的日线。
+            fetch_days = gap + 1
+
+        try:
+            fetched = provider.fetch_rates(days=fetch_days, outputsize=outputsize)
+        except ProviderError as exc:
+            raise BaseRatesRefreshError(str(exc)) from exc
+
+        try:
+            overlap = None
+            if not fetched.is_empty() and tail is not None and not tail.is_empty():
+                overlap = self.repository.load_range(fetched.columns.dates[0], tail.columns.dates[-1])
+            if overlap is None:
+                overlap = RatesSnapshot(source=fetched.source, fetched_at=fetched.fetched_at)
+            delta = overlap.upsert(fetched)
+            _check_cancelled(cancel)
+            self.repository.upsert_bars(delta)
+            self._update_rollups(delta)
+            snapshot = self.repository.latest(days) or delta
+        except RuntimeError as exc:
+            raise BaseRatesRefreshError(str(exc)) from exc
+
+        return IncrementalRefreshResult(snapshot=snapshot, delta=delta, outputsize=outputsize, stale=fetched.stale)
+
+    async def refresh_pairs_async(
+        self,
+        client: Optional[RatesProvider] = None,
+        pairs: Optional[Sequence[CurrencyPair]] = None,
+        outputsize: str = "compact",
+        days: int = DEFAULT_BASE_DAYS,
+    ) -> List[PairRefreshResult]:
+        """并发刷新多个货币对并分别写入各自的存储，部分失败时其余结果照常返回。
+
+        未指定 ``pairs`` 时使用 ``TRACKED_PAIRS`` 配置的货币对。
+        """
+        import asyncio
+
+        if pairs is None:
+            try:
+                pairs = parse_currency_pairs(TRACKED_PAIRS_TEXT)
+            except ValueError as exc:
+                raise BaseRatesRefreshError(str(exc)) from exc
+        fetched = await self._provider(client).fetch_many(pairs, days=days, outputsize=outputsize)
+
+        async def persist(result: PairFetchResult) -> PairRefreshResult:
+            if result.snapshot is None:
+                return PairRefreshResult(pair=result.pair, error=str(result.error))
+            repository = self.pair_repository_factory(*result.pair)
+            try:
+                await asyncio.to_thread(repository.save_snapshot, result.snapshot)
+            except RuntimeError as exc:
+                return PairRefreshResult(pair=result.pair, error=str(exc))
+            await asyncio.to_thread(_rebuild_rollups, repository, result.snapshot)
+            return PairRefreshResult(pair=result.pair, snapshot=result.snapshot)
+
+        return list(await asyncio.gather(*(persist(result) for result in fetched)))
+
+    @traced("service.refresh_pairs")
+    def refresh_pairs(
+        self,
+        client: Optional[RatesProvider] = None,
+        pairs: Optional[Sequence[CurrencyPair]] = None,
+        outputsize: str = "compact",
+        days: int = DEFAULT_BASE_DAYS,
+    ) -> List[PairRefreshResult]:
+        import asyncio
+
+        return asyncio.run(self.refresh_pairs_async(client, pairs, outputsize=outputsize, days=days))
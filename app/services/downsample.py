@@ -0,0 +1,96 @@
+"""图表数据降采样。
+
+长历史（数千个交易日）远超图表的像素宽度，全部发送给 ECharts 只会拖慢打开与缩放。
+这里用 Largest-Triangle-Three-Buckets 在收盘价上选点，保持走势形状；
+最高价/最低价/振幅则取每个桶内的极值，保证包络线不会因降采样而丢失尖峰。
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+Bucket = Tuple[int, int]
+
+# 每个像素对应的数据点数；超过该密度后线条已无法分辨。
+POINTS_PER_PIXEL = 2
+MIN_POINT_BUDGET = 200
+
+
+def point_budget_for_width(width: int) -> int:
+    return max(int(width) * POINTS_PER_PIXEL, MIN_POINT_BUDGET)
+
+
+def lttb_indices(values: Sequence[float], threshold: int) -> Tuple[List[int], List[Bucket]]:
+    """返回 LTTB 选中的下标及每个下标所代表的区间 ``[start, end)``。
+
+    横轴按等距处理（类目轴上的交易日）。首尾两点始终保留；
+    ``threshold`` 不小于数据长度时原样返回全部下标。
+    """
+    count = len(values)
+    if threshold >= count or threshold < 3:
+        return list(range(count)), [(index, index + 1) for index in range(count)]
+
+    every = (count - 2) / (threshold - 2)
+    indices = [0]
+    buckets: List[Bucket] = [(0, 1)]
+    anchor = 0
+
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = min(int((bucket + 1) * every) + 1, count - 1)
+        next_end = min(int((bucket + 2) * every) + 1, count)
+
+        # 下一个桶的平均点作为三角形的第三个顶点。
+        span = next_end - end
+        avg_x = (end + next_end - 1) / 2
+        avg_y = sum(values[end:next_end]) / span
+
+        anchor_y = values[anchor]
+        chosen = start
+        best_area = -1.0
+        for index in range(start, end):
+            area = abs((anchor - avg_x) * (values[index] - anchor_y) - (anchor - index) * (avg_y - anchor_y))
+            if area > best_area:
+                best_area = area
+                chosen = index
+
+        indices.append(chosen)
+        buckets.append((start, end))
+        anchor = chosen
+
+    indices.append(count - 1)
+    buckets.append((count - 1, count))
+    return indices, buckets
+
+
+def take(values: Sequence[float], indices: Sequence[int]) -> array:
+    return array("d", (values[index] for index in indices))
+
+
+def bucket_max(values: Sequence[float], buckets: Sequence[Bucket]) -> array:
+    return array("d", (max(values[start:end]) for start, end in buckets))
+
+
+def bucket_min(values: Sequence[float], buckets: Sequence[Bucket]) -> array:
+    return array("d", (min(values[start:end]) for start, end in buckets))
+
+
+def downsample_chart_payload(payload: Dict[str, Sequence], budget: int) -> Tuple[Dict[str, Sequence], List[int]]:
+    """按点数预算降采样 ``RatesSnapshot.to_chart_payload()`` 的结果。
+
+    返回新的 payload 与选中的下标，调用方可用同一组下标对齐指标等附加序列。
+    """
+    indices, buckets = lttb_indices(payload["close"], budget)
+    if len(indices) == len(payload["close"]):
+        return payload, indices
+
+    dates = payload["dates"]
+    sampled = {
+        "dates": [dates[index] for index in indices],
+        "open": take(payload["open"], indices),
+        "close": take(payload["close"], indices),
+        "high": bucket_max(payload["high"], buckets),
+        "low": bucket_min(payload["low"], buckets),
+        "amplitude": bucket_max(payload["amplitude"], buckets),
+    }
+    return sampled, indices
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app.config import FX_DAILY_CLOSE_UTC_HOUR
+
+
+def daily_close_on(moment: datetime) -> datetime:
+    """返回 ``moment`` 所在 UTC 日期的收盘时刻。"""
+    return moment.replace(hour=FX_DAILY_CLOSE_UTC_HOUR, minute=0, second=0, microsecond=0)
+
+
+def next_daily_close(moment: datetime) -> datetime:
+    """返回严格晚于 ``moment`` 的下一个工作日收盘时刻（UTC，naive）。"""
+    candidate = daily_close_on(moment)
+    if candidate <= moment:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def previous_daily_close(moment: datetime) -> datetime:
+    """返回不晚于 ``moment`` 的最近一个工作日收盘时刻（UTC，naive）。"""
+    candidate = daily_close_on(moment)
+    if candidate > moment:
+        candidate -= timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate -= timedelta(days=1)
+    return candidate
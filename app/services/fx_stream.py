@@ -0,0 +1,222 @@
+"""FX_DAILY 响应的流式、窗口感知解析。
+
+完整历史的响应包含数千个日期条目，而调用方通常只需要最近 N 天。
+这里按块读取原始字节，逐条解析 ``Time Series FX (Daily)`` 中的条目，
+只用一个大小为 N 的最小堆保留日期最新的条目，既不构造完整字典也不对全部键排序。
+其余顶层字段（``Meta Data``、``Note``、``Error Message`` 等）照常完整解析。
+"""
+from __future__ import annotations
+
+import codecs
+import heapq
+import json
+import re
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Dict, List, Optional
+
+TIME_SERIES_KEY = "Time Series FX (Daily)"
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+# 时间序列条目的快速路径：不含转义的日期键及其后的冒号、条目之间的分隔符。
+_ENTRY_KEY = re.compile(r'[ \t\n\r]*"([^"\\]*)"[ \t\n\r]*:[ \t\n\r]*')
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,}\]])")
+
+
+@dataclass
+class ParseStats:
+    elapsed_ms: float = 0.0
+    bytes_read: int = 0
+    entries_seen: int = 0
+    entries_kept: int = 0
+    peak_buffer_chars: int = 0
+    # 仅在 track_memory=True 时通过 tracemalloc 统计，单位字节。
+    peak_memory_bytes: Optional[int] = None
+
+
+@dataclass
+class WindowedPayload:
+    fields: Dict[str, Any]
+    time_series: Optional[Dict[str, Any]]
+    window: Optional[int]
+    stats: ParseStats = field(default_factory=ParseStats)
+
+    def to_payload(self) -> Dict[str, Any]:
+        payload = dict(self.fields)
+        if self.time_series is not None:
+            payload[TIME_SERIES_KEY] = self.time_series
+        return payload
+
+
+class _Reader:
+    def __init__(self, stream: BinaryIO, chunk_size: int, stats: ParseStats) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._stats = stats
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            self.buf += self._decoder.decode(b"", final=True)
+            return False
+        self._stats.bytes_read += len(chunk)
+        if self.pos:
+            # 丢弃已消费的前缀，缓冲区只保留尚未解析的部分。
+            self.buf = self.buf[self.pos :]
+            self.pos = 0
+        self.buf += self._decoder.decode(chunk)
+        if len(self.buf) > self._stats.peak_buffer_chars:
+            self._stats.peak_buffer_chars = len(self.buf)
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("JSON 内容意外结束。")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"JSON 结构异常：期望 {char!r}。")
+        self.pos += 1
+
+    def key(self) -> str:
+        while True:
+            match = _ENTRY_KEY.match(self.buf, self.pos)
+            if match is not None and match.end() < len(self.buf):
+                self.pos = match.end()
+                return match.group(1)
+            # 匹配失败可能只是缓冲区被截断，剩余内容较少时先补充再试。
+            if len(self.buf) - self.pos < 256 and self.fill():
+                continue
+            break
+        key = self.value()
+        if not isinstance(key, str):
+            raise ValueError("JSON 结构异常：键需为字符串。")
+        self.expect(":")
+        return key
+
+    def separator(self) -> str:
+        match = _SEPARATOR.match(self.buf, self.pos)
+        if match is not None:
+            self.pos = match.end()
+            return match.group(1)
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise ValueError("JSON 内容无法解析。") from None
+                continue
+            # 数字恰好位于缓冲区末尾时可能尚未读完整（如 "1.5e" 只解析出 1.5）。
+            if not isinstance(value, (str, dict, list)):
+                tail = end
+                while tail < len(self.buf) and self.buf[tail] in _NUMBER_CHARS:
+                    tail += 1
+                if tail == len(self.buf) and self.fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def parse_fx_daily_stream(
+    stream: BinaryIO,
+    window: Optional[int] = None,
+    chunk_size: int = 64 * 1024,
+    track_memory: bool = False,
+) -> WindowedPayload:
+    """流式解析 FX_DAILY 响应，仅保留日期最新的 ``window`` 个条目（None 表示全部保留）。
+
+    对合法输入，``RatesSnapshot.from_api_response(result.to_payload(), days)`` 与
+    对完整 ``json.loads`` 结果调用的输出一致（``window >= days`` 时）。
+    """
+    stats = ParseStats()
+    started_tracing = False
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracing = True
+    if track_memory:
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+
+    try:
+        reader = _Reader(stream, chunk_size, stats)
+        fields: Dict[str, Any] = {}
+        time_series: Optional[Dict[str, Any]] = None
+
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.pos += 1
+        else:
+            while True:
+                key = reader.key()
+                if key == TIME_SERIES_KEY and reader.peek() == "{":
+                    time_series = _parse_time_series(reader, window, stats)
+                else:
+                    fields[key] = reader.value()
+                separator = reader.separator()
+                if separator == "}":
+                    break
+                if separator != ",":
+                    raise ValueError("JSON 结构异常：缺少逗号。")
+    finally:
+        stats.elapsed_ms = (time.perf_counter() - started) * 1000
+        if track_memory:
+            stats.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+
+    return WindowedPayload(fields=fields, time_series=time_series, window=window, stats=stats)
+
+
+def _parse_time_series(reader: _Reader, window: Optional[int], stats: ParseStats) -> Dict[str, Any]:
+    limit = None if window is None else max(int(window), 1)
+    heap: List[str] = []
+    kept: Dict[str, Any] = {}
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+        return kept
+
+    while True:
+        date_str = reader.key()
+        values = reader.value()
+        stats.entries_seen += 1
+
+        if date_str in kept:
+            # 与 json.loads 一致：重复键以后出现者为准。
+            kept[date_str] = values
+        elif limit is None or len(heap) < limit:
+            heapq.heappush(heap, date_str)
+            kept[date_str] = values
+        elif date_str > heap[0]:
+            evicted = heapq.heapreplace(heap, date_str)
+            del kept[evicted]
+            kept[date_str] = values
+
+        separator = reader.separator()
+        if separator == "}":
+            break
+        if separator != ",":
+            raise ValueError("JSON 结构异常：缺少逗号。")
+
+    stats.entries_kept = len(kept)
+    return kept
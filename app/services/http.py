@@ -0,0 +1,73 @@
+"""各数据源共用的 HTTP 连接池会话与带退避的重试。"""
+from __future__ import annotations
+
+import random
+import time
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.services.tracing import span
+
+_SHARED_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = Lock()
+
+
+def get_shared_session() -> requests.Session:
+    """进程内共享的连接池会话，复用 DNS/TCP/TLS 握手结果。"""
+    global _SHARED_SESSION
+    if _SHARED_SESSION is not None:
+        return _SHARED_SESSION
+    with _SESSION_LOCK:
+        if _SHARED_SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SHARED_SESSION = session
+    return _SHARED_SESSION
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response: requests.Response) -> None:
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+def get_with_retries(
+    session: requests.Session,
+    url: str,
+    params: Dict[str, str],
+    timeout: Tuple[float, float],
+    max_retries: int = 3,
+    backoff_base: float = 0.5,
+    backoff_cap: float = 8.0,
+    span_prefix: str = "http",
+) -> requests.Response:
+    """GET 并读取完整响应体；对连接错误、超时与 5xx 进行带抖动的指数退避重试。
+
+    重试耗尽后原样抛出最后一次的 ``ConnectionError`` / ``Timeout``，5xx 则抛出 ``HTTPError``；
+    耗时分别计入 ``{span_prefix}.connect`` 与 ``{span_prefix}.download``。
+    """
+    attempts = max(int(max_retries), 0) + 1
+    attempt = 0
+    while True:
+        try:
+            # stream=True 让 connect 只覆盖到响应头到达，响应体的读取单独计入 download。
+            with span(f"{span_prefix}.connect", attempt=attempt + 1):
+                response = session.get(url, params=params, timeout=timeout, stream=True)
+            with span(f"{span_prefix}.download", status=response.status_code):
+                response.content  # 读取并缓存响应体，同时把连接归还连接池
+            if response.status_code >= 500:
+                raise _RetryableStatus(response)
+            response.raise_for_status()
+            return response
+        except (requests.ConnectionError, requests.Timeout, _RetryableStatus) as exc:
+            attempt += 1
+            if attempt >= attempts:
+                if isinstance(exc, _RetryableStatus):
+                    exc.response.raise_for_status()
+                raise
+            time.sleep(random.uniform(0, min(backoff_cap, backoff_base * (2 ** (attempt - 1)))))
@@ -0,0 +1,381 @@
+"""基于 RatesSnapshot 列数据的技术指标。
+
+所有指标均为单次遍历的滚动算法（O(n)），内部状态可在新日线追加后继续推进，
+因此 ``IndicatorEngine`` 遇到仅在尾部追加了数据的快照时只计算新增部分。
+预热期内的输出为 NaN。
+"""
+from __future__ import annotations
+
+import math
+from array import array
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.models.rate import RatesSnapshot
+
+NAN = float("nan")
+TRADING_DAYS_PER_YEAR = 252
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    name: str
+    params: Tuple[float, ...] = ()
+
+    @property
+    def label(self) -> str:
+        if not self.params:
+            return self.name.upper()
+        args = ",".join(f"{value:g}" for value in self.params)
+        return f"{self.name.upper()}({args})"
+
+
+class _Calculator:
+    outputs: Tuple[str, ...] = ("value",)
+
+    def push(self, open_price: float, close: float, high: float, low: float) -> Tuple[float, ...]:
+        raise NotImplementedError
+
+
+class _SMA(_Calculator):
+    def __init__(self, window: float = 20) -> None:
+        self.window = max(int(window), 1)
+        self.values: Deque[float] = deque()
+        self.total = 0.0
+
+    def push(self, open_price: float, close: float, high: float, low: float) -> Tuple[float, ...]:
+        self.values.append(close)
+        self.total += close
+        if len(self.values) > self.window:
+            self.total -= self.values.popleft()
+        if len(self.values) < self.window:
+            return (NAN,)
+        return (self.total / self.window,)
+
+
+class _EMA(_Calculator):
+    def __init__(self, span: float = 20) -> None:
+        self.span = max(int(span), 1)
+        self.alpha = 2.0 / (self.span + 1)
+        self.seed_total = 0.0
+        self.count = 0
+        self.value = NAN
+
+    def push(self, open_price: float, close: float, high: float, low: float) -> Tuple[float, ...]:
+        self.count += 1
+        if self.count < self.span:
+            self.seed_total += close
+            return (NAN,)
+        if self.count == self.span:
+            # 以首个完整窗口的简单均值作为初值。
+            self.value = (self.seed_total + close) / self.span
+        else:
+            self.value += self.alpha * (close - self.value)
+        return (self.value,)
+
+
+class _Bollinger(_Calculator):
+    outputs = ("mid", "upper", "lower")
+
+    def __init__(self, window: float = 20, width: float = 2.0) -> None:
+        self.window = max(int(window), 1)
+        self.width = float(width)
+        self.values: Deque[float] = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, open_price: float, close: float, high: float, low: float) -> Tuple[float, ...]:
+        self.values.append(close)
+        self.total += close
+        self.total_sq += close * close
+        if len(self.values) > self.window:
+            dropped = self.values.popleft()
+            self.total -= dropped
+            self.total_sq -= dropped * dropped
+        if len(self.values) < self.window:
+            return (NAN, NAN, NAN)
+        mean = self.total / self.window
+        std = math.sqrt(max(self.total_sq / self.window - mean * mean, 0.0))
+        return (mean, mean + self.width * std, mean - self.width * std)
+
+
+class _ATR(_Calculator):
+    def __init__(self, window: float = 14) -> None:
+        self.window = max(int(window), 1)
+        self.prev_close: Optional[float] = None
+        self.count = 0
+        self.seed_total = 0.0
+        self.value = NAN
+
+    def push(self, open_price: float, close: float, high: float, low: float) -> Tuple[float, ...]:
+        true_range = high - low
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.count += 1
+        if self.count < self.window:
+            self.seed_total += true_range
+            return (NAN,)
+        if self.count == self.window:
+            self.value = (self.seed_total + true_range) / self.window
+        else:
+            # Wilder 平滑。
+            self.value = (self.value * (self.window - 1) + true_range) / self.window
+        return (self.value,)
+
+
+class _RSI(_Calculator):
+    def __init__(self, period: float = 14) -> None:
+        self.period = max(int(period), 1)
+        self.prev_close: Optional[float] = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def push(self, open_price: float, close: float, high: float, low: float) -> Tuple[float, ...]:
+        if self.prev_close is None:
+            self.prev_close = close
+            return (NAN,)
+        change = close - self.prev_close
+        self.prev_close = close
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+        self.count += 1
+        if self.count <= self.period:
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            if self.count < self.period:
+                return (NAN,)
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        if self.avg_loss == 0.0:
+            return (100.0 if self.avg_gain > 0 else 50.0,)
+        return (100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss),)
+
+
+class _Volatility(_Calculator):
+    """对数收益率的滚动样本标准差，年化后以百分比表示。"""
+
+    def __init__(self, window: float = 20) -> None:
+        self.window = max(int(window), 2)
+        self.prev_close: Optional[float] = None
+        self.returns: Deque[float] = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, open_price: float, close: float, high: float, low: float) -> Tuple[float, ...]:
+        previous, self.prev_close = self.prev_close, close
+        if previous is None or previous <= 0 or close <= 0:
+            return (NAN,)
+        value = math.log(close / previous)
+        self.returns.append(value)
+        self.total += value
+        self.total_sq += value * value
+        if len(self.returns) > self.window:
+            dropped = self.returns.popleft()
+            self.total -= dropped
+            self.total_sq -= dropped * dropped
+        if len(self.returns) < self.window:
+            return (NAN,)
+        mean = self.total / self.window
+        variance = max((self.total_sq - self.window * mean * mean) / (self.window - 1), 0.0)
+        return (math.sqrt(variance) * math.sqrt(TRADING_DAYS_PER_YEAR) * 100,)
+
+
+_CALCULATORS: Dict[str, Callable[..., _Calculator]] = {
+    "sma": _SMA,
+    "ema": _EMA,
+    "bollinger": _Bollinger,
+    "atr": _ATR,
+    "rsi": _RSI,
+    "volatility": _Volatility,
+}
+
+# 各指标接受的参数：(参数名, 是否须为整数, 最小值)。
+_SIGNATURES: Dict[str, Tuple[Tuple[str, bool, float], ...]] = {
+    "sma": (("窗口", True, 1),),
+    "ema": (("跨度", True, 1),),
+    "bollinger": (("窗口", True, 1), ("标准差倍数", False, 0)),
+    "atr": (("窗口", True, 1),),
+    "rsi": (("周期", True, 1),),
+    "volatility": (("窗口", True, 2),),
+}
+
+# 与价格同量纲、可直接叠加在价格坐标轴上的指标。
+PRICE_INDICATORS = frozenset({"sma", "ema", "bollinger"})
+
+
+def available_indicators() -> List[str]:
+    return sorted(_CALCULATORS)
+
+
+def parse_indicator(text: str) -> IndicatorSpec:
+    """解析 ``sma:20``、``bollinger:20,2`` 形式的指标描述。"""
+    name, _, raw_params = text.strip().lower().partition(":")
+    if name not in _CALCULATORS:
+        raise ValueError(f"未知指标：{name}，可选 {', '.join(available_indicators())}。")
+    try:
+        params = tuple(float(item) for item in raw_params.split(",") if item.strip())
+    except ValueError as exc:
+        raise ValueError(f"指标参数需为数字：{text}") from exc
+    spec = IndicatorSpec(name, params)
+    validate_indicator(spec)
+    return spec
+
+
+def validate_indicator(spec: IndicatorSpec) -> None:
+    """检查参数个数与取值范围，不符合时抛出 ValueError；省略的参数使用默认值。"""
+    signature = _SIGNATURES.get(spec.name)
+    if signature is None:
+        raise ValueError(f"未知指标：{spec.name}，可选 {', '.join(available_indicators())}。")
+    if len(spec.params) > len(signature):
+        names = "、".join(label for label, _, _ in signature)
+        raise ValueError(f"指标 {spec.name} 最多接受 {len(signature)} 个参数（{names}），收到 {len(spec.params)} 个。")
+    for value, (label, integral, minimum) in zip(spec.params, signature):
+        if not math.isfinite(value) or (integral and value != int(value)):
+            kind = "整数" if integral else "数字"
+            raise ValueError(f"指标 {spec.name} 的{label}需为{kind}：{value:g}")
+        if value < minimum or (not integral and value <= minimum):
+            bound = f"不小于 {minimum:g}" if integral else f"大于 {minimum:g}"
+            raise ValueError(f"指标 {spec.name} 的{label}需{bound}：{value:g}")
+
+
+def parse_indicator_list(text: str) -> List[IndicatorSpec]:
+    return [parse_indicator(item) for item in text.split(";") if item.strip()]
+
+
+@dataclass
+class IndicatorResult:
+    spec: IndicatorSpec
+    series: Dict[str, array]
+
+    def values(self, output: str = "value") -> array:
+        return self.series[output]
+
+
+@dataclass
+class _State:
+    calculator: _Calculator
+    series: Dict[str, array]
+    consumed: int
+    fingerprint: str
+
+
+class IndicatorEngine:
+    """带结果缓存的指标计算器。
+
+    结果按 (快照指纹, 指标参数) 缓存；若某个已计算状态恰好是新快照的前缀，
+    则复制该状态并只推进新增的日线。
+    """
+
+    def __init__(self, max_results: int = 64, max_states_per_spec: int = 4) -> None:
+        self._results: "OrderedDict[Tuple[str, IndicatorSpec], IndicatorResult]" = OrderedDict()
+        self._states: Dict[IndicatorSpec, List[_State]] = {}
+        self._max_results = max_results
+        self._max_states = max_states_per_spec
+        self._lock = Lock()
+
+    def compute(self, snapshot: RatesSnapshot, spec: IndicatorSpec) -> IndicatorResult:
+        validate_indicator(spec)
+        factory = _CALCULATORS[spec.name]
+
+        fingerprint = snapshot.fingerprint()
+        key = (fingerprint, spec)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return cached
+            base = self._find_prefix_state(snapshot, spec)
+
+        if base is None:
+            calculator = factory(*spec.params)
+            state = _State(calculator, {name: array("d") for name in calculator.outputs}, 0, "")
+        else:
+            state = _State(
+                _clone(base.calculator),
+                {name: array("d", values) for name, values in base.series.items()},
+                base.consumed,
+                base.fingerprint,
+            )
+
+        self._advance(state, snapshot)
+        state.fingerprint = fingerprint
+        result = IndicatorResult(spec=spec, series=state.series)
+
+        with self._lock:
+            states = self._states.setdefault(spec, [])
+            states.append(state)
+            del states[: -self._max_states]
+            self._results[key] = result
+            while len(self._results) > self._max_results:
+                self._results.popitem(last=False)
+        return result
+
+    def compute_many(self, snapshot: RatesSnapshot, specs: Sequence[IndicatorSpec]) -> List[IndicatorResult]:
+        return [self.compute(snapshot, spec) for spec in specs]
+
+    def _find_prefix_state(self, snapshot: RatesSnapshot, spec: IndicatorSpec) -> Optional[_State]:
+        size = snapshot.trading_days()
+        candidates = sorted(self._states.get(spec, ()), key=lambda state: state.consumed, reverse=True)
+        for state in candidates:
+            if 0 < state.consumed <= size and snapshot.fingerprint(state.consumed) == state.fingerprint:
+                return state
+        return None
+
+    @staticmethod
+    def _advance(state: _State, snapshot: RatesSnapshot) -> None:
+        columns = snapshot.columns
+        outputs = [state.series[name] for name in state.calculator.outputs]
+        push = state.calculator.push
+        start = state.consumed
+        for open_price, close, high, low in zip(
+            columns.open[start:],
+            columns.close[start:],
+            columns.high[start:],
+            columns.low[start:],
+        ):
+            for target, value in zip(outputs, push(open_price, close, high, low)):
+                target.append(value)
+        state.consumed = len(columns)
+
+
+def _clone(calculator: _Calculator) -> _Calculator:
+    clone = object.__new__(type(calculator))
+    for name, value in vars(calculator).items():
+        setattr(clone, name, deque(value) if isinstance(value, deque) else value)
+    return clone
+
+
+_DEFAULT_ENGINE = IndicatorEngine()
+
+
+def compute_indicator(snapshot: RatesSnapshot, spec: IndicatorSpec) -> IndicatorResult:
+    return _DEFAULT_ENGINE.compute(snapshot, spec)
+
+
+def sma(snapshot: RatesSnapshot, window: int = 20) -> array:
+    return compute_indicator(snapshot, IndicatorSpec("sma", (window,))).values()
+
+
+def ema(snapshot: RatesSnapshot, span: int = 20) -> array:
+    return compute_indicator(snapshot, IndicatorSpec("ema", (span,))).values()
+
+
+def bollinger(snapshot: RatesSnapshot, window: int = 20, width: float = 2.0) -> Dict[str, array]:
+    return compute_indicator(snapshot, IndicatorSpec("bollinger", (window, width))).series
+
+
+def atr(snapshot: RatesSnapshot, window: int = 14) -> array:
+    return compute_indicator(snapshot, IndicatorSpec("atr", (window,))).values()
+
+
+def rsi(snapshot: RatesSnapshot, period: int = 14) -> array:
+    return compute_indicator(snapshot, IndicatorSpec("rsi", (period,))).values()
+
+
+def volatility(snapshot: RatesSnapshot, window: int = 20) -> array:
+    return compute_indicator(snapshot, IndicatorSpec("volatility", (window,))).values()
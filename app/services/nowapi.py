@@ -0,0 +1,162 @@
+"""NowAPI（sapi.k780.com）``finance.rate_history.v3`` 日线数据源。
+
+接口按日期区间返回 ``dtList``，字段与本地存储格式（d/o/c/h/l/am）一致，可直接构建快照。
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+from app.config import NOWAPI_MAX_SPAN_DAYS
+from app.models.rate import RatesSnapshot
+from app.services.http import get_shared_session, get_with_retries
+from app.services.providers import ProviderError, ProviderRateLimitError, RatesProvider
+from app.services.response_cache import CacheKey, ResponseCache
+from app.services.tracing import span, traced
+
+NOWAPI_APP = "finance.rate_history.v3"
+# 返回的错误信息包含这些片段时视为限流。
+_RATE_LIMIT_HINTS = ("频", "上限", "limit")
+
+
+class NowApiError(ProviderError):
+    """NowAPI 接口异常。"""
+
+
+class NowApiRateLimitError(NowApiError, ProviderRateLimitError):
+    """NowAPI 调用次数超出套餐限制。"""
+
+
+def calendar_span(days: int) -> int:
+    """覆盖 ``days`` 个交易日所需的自然日数（按每周 5 个交易日估算，并留出节假日余量）。"""
+    return min(max(int(days), 1) * 7 // 5 + 7, NOWAPI_MAX_SPAN_DAYS)
+
+
+@dataclass
+class NowApiClient(RatesProvider):
+    name = "nowapi"
+
+    appkey: str
+    sign: str
+    base_url: str = "https://sapi.k780.com"
+    cache: Optional[ResponseCache] = None
+    connect_timeout: float = 5.0
+    read_timeout: float = 15.0
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_cap: float = 8.0
+    session: Optional[requests.Session] = field(default=None, repr=False)
+
+    @traced("nowapi.fetch_rates")
+    def fetch_rates(
+        self,
+        days: int,
+        outputsize: str = "compact",
+        on_wait: Optional[Callable[[float], None]] = None,
+        from_symbol: str = "USD",
+        to_symbol: str = "CNY",
+    ) -> RatesSnapshot:
+        """按日期区间拉取日线；``outputsize="full"`` 时回溯 ``NOWAPI_MAX_SPAN_DAYS`` 个自然日。"""
+        if not self.appkey or not self.sign:
+            raise NowApiError("请提供 NowAPI 的 appkey 与 sign。")
+        try:
+            days_int = max(int(days), 1)
+        except (TypeError, ValueError) as exc:
+            raise NowApiError("天数需为正整数。") from exc
+
+        from_code = (from_symbol or "").strip().upper()
+        to_code = (to_symbol or "").strip().upper()
+        if not (len(from_code) == 3 and len(to_code) == 3 and (from_code + to_code).isalpha()):
+            raise NowApiError("货币代码需为三位字母。")
+
+        span_days = NOWAPI_MAX_SPAN_DAYS if (outputsize or "").strip().lower() == "full" else calendar_span(days_int)
+        cache_key = CacheKey(NOWAPI_APP, from_code, to_code, f"{span_days}d")
+        if self.cache is not None:
+            entry = self.cache.lookup(cache_key)
+            if entry is not None:
+                return self._build_snapshot(self._decode(entry.body), days_int, entry.stored_at)
+
+        now = datetime.utcnow()
+        try:
+            body, payload = self._request(from_code + to_code, now - timedelta(days=span_days), now)
+        except NowApiRateLimitError:
+            stale_entry = self.cache.lookup(cache_key, allow_stale=True) if self.cache is not None else None
+            if stale_entry is None:
+                raise
+            snapshot = self._build_snapshot(self._decode(stale_entry.body), days_int, stale_entry.stored_at)
+            snapshot.stale = True
+            return snapshot
+        snapshot = self._build_snapshot(payload, days_int, now)
+        if self.cache is not None:
+            self.cache.store(cache_key, body, now=now)
+        return snapshot
+
+    def _request(self, symbol: str, start: datetime, end: datetime) -> Tuple[bytes, Dict[str, Any]]:
+        params = {
+            "app": NOWAPI_APP,
+            "curNoS": symbol,
+            "htType": "HT1D",
+            "dateYmdS": f"{start:%Y%m%d}-{end:%Y%m%d}",
+            "appkey": self.appkey,
+            "sign": self.sign,
+            "format": "json",
+        }
+        try:
+            response = get_with_retries(
+                self.session or get_shared_session(),
+                self.base_url,
+                params,
+                timeout=(self.connect_timeout, self.read_timeout),
+                max_retries=self.max_retries,
+                backoff_base=self.backoff_base,
+                backoff_cap=self.backoff_cap,
+                span_prefix="nowapi",
+            )
+            body = response.content
+        except requests.RequestException as exc:
+            raise NowApiError("无法连接到 NowAPI，请检查网络或稍后再试。") from exc
+
+        payload = self._decode(body)
+        if str(payload.get("success")) != "1":
+            message = str(payload.get("msg") or "未知错误")
+            if any(hint in message.lower() for hint in _RATE_LIMIT_HINTS):
+                raise NowApiRateLimitError(message)
+            raise NowApiError(f"NowAPI 返回错误：{message}")
+        return body, payload
+
+    @staticmethod
+    def _decode(body: bytes) -> Dict[str, Any]:
+        try:
+            with span("nowapi.decode", bytes=len(body)):
+                payload = json.loads(body)
+        except ValueError as exc:
+            raise NowApiError("NowAPI 返回的内容不是有效的 JSON。") from exc
+        if not isinstance(payload, dict):
+            raise NowApiError("NowAPI 返回的数据结构异常。")
+        return payload
+
+    @staticmethod
+    def _build_snapshot(payload: Dict[str, Any], days: int, fetched_at: datetime) -> RatesSnapshot:
+        try:
+            result = payload.get("result") or {}
+            rows = sorted(
+                ({**item, "d": str(item.get("d", "")).replace("-", "")} for item in result.get("dtList") or []),
+                key=lambda item: item["d"],
+            )
+            if not rows:
+                raise NowApiError("NowAPI 未返回有效的日度汇率数据。")
+            return RatesSnapshot.from_storage(
+                {
+                    "result": {
+                        "source": NOWAPI_APP,
+                        "fetched_at": fetched_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        "dtList": rows[-days:],
+                    }
+                }
+            )
+        except (AttributeError, TypeError, ValueError) as exc:
+            raise NowApiError("NowAPI 返回的数据结构异常。") from exc
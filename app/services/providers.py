@@ -0,0 +1,330 @@
+"""汇率数据源抽象、按序故障转移与对冲请求。
+
+各数据源实现 ``RatesProvider.fetch_rates``，返回统一的 ``RatesSnapshot``。
+``ProviderChain`` 按配置顺序调用：
+
+- 故障转移：当前数据源报错、限流或只能返回过期缓存时，立即尝试下一个；
+- 对冲请求：设置 ``hedge_after`` 后，当前数据源超过该秒数仍未返回，就并行请求下一个，
+  先拿到新鲜数据者胜出；
+- 总时限：设置 ``deadline`` 后，超时即返回已有的过期数据或报错，刷新耗时有明确上界。
+
+落败的请求无法中断，会在后台线程中自然结束，结果被丢弃。
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from app.config import PROVIDER_DEADLINE_S, PROVIDER_HEDGE_AFTER_MS, RATE_PROVIDERS_TEXT, load_env_defaults
+from app.models.rate import RatesSnapshot
+from app.services.tracing import span
+
+if TYPE_CHECKING:
+    from app.services.rate_limiter import RateLimiter
+    from app.services.response_cache import ResponseCache
+
+CurrencyPair = Tuple[str, str]
+
+# 各数据源所需的凭证（环境变量名）。
+PROVIDER_CREDENTIALS: Dict[str, Tuple[str, ...]] = {
+    "alpha_vantage": ("ALPHAVANTAGE_API_KEY",),
+    "nowapi": ("NOWAPI_APPKEY", "NOWAPI_SIGN"),
+}
+PROVIDER_NAMES = tuple(PROVIDER_CREDENTIALS)
+
+T = TypeVar("T")
+
+
+def _submit(fn: Callable[..., T], *args: Any) -> "Future[T]":
+    """在独立的守护线程中执行 ``fn``。
+
+    不使用线程池：落败的慢请求会一直占用工作线程，池满后新请求需要排队，反而拉长尾延迟；
+    守护线程也不会在进程退出时被等待。
+    """
+    future: "Future[T]" = Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = fn(*args)
+        except BaseException as exc:  # 异常原样交给等待方处理
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=run, name="fx-provider", daemon=True).start()
+    return future
+
+
+class ProviderError(Exception):
+    """数据源请求失败。"""
+
+
+class ProviderRateLimitError(ProviderError):
+    """数据源限流或本地额度不足。"""
+
+
+@dataclass
+class PairFetchResult:
+    """批量拉取中单个货币对的结果，失败时 ``snapshot`` 为 None 并记录 ``error``。"""
+
+    pair: CurrencyPair
+    snapshot: Optional[RatesSnapshot] = None
+    error: Optional[ProviderError] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.snapshot is not None
+
+
+class RatesProvider(ABC):
+    name = "provider"
+
+    @abstractmethod
+    def fetch_rates(
+        self,
+        days: int,
+        outputsize: str = "compact",
+        on_wait: Optional[Callable[[float], None]] = None,
+        from_symbol: str = "USD",
+        to_symbol: str = "CNY",
+    ) -> RatesSnapshot:
+        """拉取最近 ``days`` 个交易日；``outputsize`` 为 ``"full"`` 时表示需要完整历史。"""
+        raise NotImplementedError
+
+    async def fetch_many(
+        self,
+        pairs: Sequence[CurrencyPair],
+        days: int,
+        outputsize: str = "compact",
+        concurrency: int = 4,
+    ) -> List[PairFetchResult]:
+        """并发拉取多个货币对，单个失败不影响其余结果。"""
+        import asyncio
+
+        semaphore = asyncio.Semaphore(max(int(concurrency), 1))
+
+        async def fetch_one(pair: CurrencyPair) -> PairFetchResult:
+            async with semaphore:
+                try:
+                    snapshot = await asyncio.to_thread(
+                        self.fetch_rates,
+                        days,
+                        outputsize,
+                        from_symbol=pair[0],
+                        to_symbol=pair[1],
+                    )
+                except ProviderError as exc:
+                    return PairFetchResult(pair=pair, error=exc)
+                except ValueError as exc:
+                    return PairFetchResult(pair=pair, error=ProviderError(str(exc)))
+                return PairFetchResult(pair=pair, snapshot=snapshot)
+
+        return list(await asyncio.gather(*(fetch_one(pair) for pair in pairs)))
+
+
+@dataclass
+class StubProvider(RatesProvider):
+    """离线桩数据源：返回预置快照的最近 ``days`` 个交易日，可模拟延迟、限流与故障。
+
+    ``latency`` 可以是固定秒数，也可以是每次调用时返回秒数的函数（便于模拟长尾）。
+    """
+
+    snapshot: RatesSnapshot
+    name: str = "stub"
+    latency: "float | Callable[[], float]" = 0.0
+    error: Optional[Exception] = None
+    stale: bool = False
+    calls: int = field(default=0, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def fetch_rates(
+        self,
+        days: int,
+        outputsize: str = "compact",
+        on_wait: Optional[Callable[[float], None]] = None,
+        from_symbol: str = "USD",
+        to_symbol: str = "CNY",
+    ) -> RatesSnapshot:
+        with self._lock:
+            self.calls += 1
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay > 0:
+            time.sleep(delay)
+        if self.error is not None:
+            raise self.error
+        result = self.snapshot.window(days)
+        result.source = self.snapshot.source
+        result.stale = self.stale
+        return result
+
+
+@dataclass
+class ProviderChain(RatesProvider):
+    """按顺序组合多个数据源，见模块说明。``hedge_after`` 与 ``deadline`` 的单位均为秒。"""
+
+    providers: Sequence[RatesProvider]
+    hedge_after: Optional[float] = None
+    deadline: Optional[float] = None
+    # 最近一次成功返回数据的数据源名称。
+    last_provider: Optional[str] = field(default=None, init=False)
+
+    def __post_init__(self) -> None:
+        self.providers = tuple(self.providers)
+        if not self.providers:
+            raise ProviderError("没有可用的数据源，请检查凭证配置。")
+
+    @property
+    def name(self) -> str:  # type: ignore[override]
+        return "+".join(provider.name for provider in self.providers)
+
+    def fetch_rates(
+        self,
+        days: int,
+        outputsize: str = "compact",
+        on_wait: Optional[Callable[[float], None]] = None,
+        from_symbol: str = "USD",
+        to_symbol: str = "CNY",
+    ) -> RatesSnapshot:
+        def call(provider: RatesProvider) -> RatesSnapshot:
+            with span(f"provider.{provider.name}", outputsize=outputsize):
+                return provider.fetch_rates(days, outputsize, on_wait=on_wait, from_symbol=from_symbol, to_symbol=to_symbol)
+
+        with span("provider.chain", providers=self.name) as current:
+            provider, snapshot, launched = self._race(call)
+            current.set(provider=provider.name, launched=launched, stale=snapshot.stale)
+        self.last_provider = provider.name
+        return snapshot
+
+    def _race(self, call: Callable[[RatesProvider], RatesSnapshot]) -> Tuple[RatesProvider, RatesSnapshot, int]:
+        queue = list(self.providers)
+        pending: Dict[Future, RatesProvider] = {}
+        errors: List[Tuple[RatesProvider, Exception]] = []
+        fallback: Optional[Tuple[RatesProvider, RatesSnapshot]] = None
+        expires = time.monotonic() + self.deadline if self.deadline else None
+        launched = 0
+
+        def launch() -> None:
+            nonlocal launched
+            provider = queue.pop(0)
+            pending[_submit(call, provider)] = provider
+            launched += 1
+
+        launch()
+        while pending:
+            timeout = self.hedge_after if queue and self.hedge_after is not None else None
+            if expires is not None:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    break
+                timeout = remaining if timeout is None else min(timeout, remaining)
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # 超过对冲阈值仍未返回：并行请求下一个数据源。
+                if queue and self.hedge_after is not None:
+                    launch()
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    snapshot = future.result()
+                except (ProviderError, ValueError) as exc:
+                    errors.append((provider, exc))
+                else:
+                    if not snapshot.stale:
+                        return provider, snapshot, launched
+                    # 过期缓存只作兜底，继续等待其他数据源的新鲜数据。
+                    fallback = fallback or (provider, snapshot)
+                if queue:
+                    launch()
+
+        if fallback is not None:
+            return fallback[0], fallback[1], launched
+        if pending:
+            raise ProviderError(f"数据源在 {self.deadline:g} 秒内未返回：{', '.join(p.name for p in pending.values())}")
+        details = "；".join(f"{provider.name}：{exc}" for provider, exc in errors)
+        if all(isinstance(exc, ProviderRateLimitError) for _, exc in errors):
+            raise ProviderRateLimitError(f"所有数据源均被限流（{details}）")
+        raise ProviderError(f"所有数据源均请求失败（{details}）")
+
+
+def parse_provider_names(text: str) -> Tuple[str, ...]:
+    names = []
+    for chunk in text.replace(";", ",").split(","):
+        name = chunk.strip().lower()
+        if not name:
+            continue
+        if name not in PROVIDER_NAMES:
+            raise ValueError(f"未知的数据源：{name}，可选 {', '.join(PROVIDER_NAMES)}。")
+        if name not in names:
+            names.append(name)
+    return tuple(names)
+
+
+def load_credentials(**overrides: str) -> Dict[str, str]:
+    """读取各数据源凭证：环境变量优先，其次是 .env；``overrides`` 中的非空值（如界面输入）覆盖两者。"""
+    defaults = load_env_defaults()
+    credentials = {
+        key: os.getenv(key) or defaults.get(key, "")
+        for keys in PROVIDER_CREDENTIALS.values()
+        for key in keys
+    }
+    credentials.update({key: value for key, value in overrides.items() if value})
+    return credentials
+
+
+def configured_providers(credentials: Mapping[str, str], order: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+    """按 ``order``（默认 ``RATE_PROVIDERS``）返回凭证齐全的数据源名称。"""
+    names = parse_provider_names(RATE_PROVIDERS_TEXT) if order is None else order
+    return tuple(name for name in names if all(credentials.get(key) for key in PROVIDER_CREDENTIALS[name]))
+
+
+def create_providers(
+    credentials: Mapping[str, str],
+    order: Optional[Sequence[str]] = None,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[RateLimiter] = None,
+    on_wait: Optional[Callable[[float], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> List[RatesProvider]:
+    """创建凭证齐全的数据源。``limiter`` 为 Alpha Vantage 的额度限流器，NowAPI 的额度由服务端控制；
+    ``cancel`` 置位后放弃仍在排队等待额度的请求。
+    """
+    providers: List[RatesProvider] = []
+    for name in configured_providers(credentials, order):
+        if name == "alpha_vantage":
+            from app.services.alpha_vantage import AlphaVantageClient
+
+            providers.append(AlphaVantageClient(credentials["ALPHAVANTAGE_API_KEY"], cache=cache, limiter=limiter, on_wait=on_wait, cancel_event=cancel))
+        elif name == "nowapi":
+            from app.services.nowapi import NowApiClient
+
+            providers.append(NowApiClient(credentials["NOWAPI_APPKEY"], credentials["NOWAPI_SIGN"], cache=cache))
+    return providers
+
+
+def create_provider_chain(
+    credentials: Mapping[str, str],
+    order: Optional[Sequence[str]] = None,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[RateLimiter] = None,
+    on_wait: Optional[Callable[[float], None]] = None,
+    hedge_after: Optional[float] = None,
+    deadline: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+) -> ProviderChain:
+    """未显式传入时，对冲阈值与总时限取自 ``PROVIDER_HEDGE_AFTER_MS`` / ``PROVIDER_DEADLINE_S``（0 表示关闭）。"""
+    if hedge_after is None and PROVIDER_HEDGE_AFTER_MS > 0:
+        hedge_after = PROVIDER_HEDGE_AFTER_MS / 1000
+    if deadline is None and PROVIDER_DEADLINE_S > 0:
+        deadline = PROVIDER_DEADLINE_S
+    providers = create_providers(credentials, order, cache=cache, limiter=limiter, on_wait=on_wait, cancel=cancel)
+    return ProviderChain(providers, hedge_after=hedge_after, deadline=deadline)
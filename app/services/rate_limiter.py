@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Event, Lock
+from typing import Callable, Iterator, Optional
+
+from app.config import ALPHAVANTAGE_PER_DAY, ALPHAVANTAGE_PER_MINUTE, DEFAULT_CACHE_DIR
+
+# 等待许可时检查外部取消事件的间隔（秒）。
+_CANCEL_POLL_INTERVAL = 0.2
+
+
+class RateLimitExceeded(Exception):
+    """本地额度不足，``retry_after`` 为预计可重试的秒数。"""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Reservation:
+    """一次已排队的请求许可，``ready_at`` 之前不应发起请求。"""
+
+    limiter: "RateLimiter"
+    ready_at: float
+    _cancelled: Event = field(default_factory=Event, repr=False)
+
+    @property
+    def expected_wait(self) -> float:
+        return max(self.ready_at - time.time(), 0.0)
+
+    def wait(self, cancel: Optional[Event] = None) -> None:
+        """阻塞至许可生效；若期间被取消（含 ``cancel`` 被置位）则归还额度并抛出 ``RateLimitExceeded``。"""
+        while True:
+            remaining = self.expected_wait
+            if remaining <= 0:
+                return
+            if cancel is not None:
+                if cancel.is_set():
+                    self.cancel()
+                remaining = min(remaining, _CANCEL_POLL_INTERVAL)
+            if self._cancelled.wait(remaining):
+                raise RateLimitExceeded("请求已取消。", 0.0)
+
+    def cancel(self) -> None:
+        if not self._cancelled.is_set():
+            self._cancelled.set()
+            self.limiter._release()
+
+
+class RateLimiter:
+    """同时约束每分钟与每日额度的令牌桶。
+
+    每分钟额度以令牌桶实现，令牌可透支为负数，透支量即排队等待时间；
+    每日额度按 UTC 日期计数。状态持久化到 JSON 文件，重启后不会重置；
+    每次预留或归还额度时都在文件锁内重新读取并写回状态，多个进程共享同一份额度。
+    """
+
+    def __init__(
+        self,
+        per_minute: int = ALPHAVANTAGE_PER_MINUTE,
+        per_day: int = ALPHAVANTAGE_PER_DAY,
+        state_path: Path | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._capacity = float(max(per_minute, 1))
+        self._refill_per_second = self._capacity / 60.0
+        self._per_day = max(per_day, 1)
+        self._state_path = state_path
+        self._clock = clock
+        self._lock = Lock()
+
+        self._tokens = self._capacity
+        self._updated_at = clock()
+        self._day = self._utc_day(self._updated_at)
+        self._day_count = 0
+        self._load_state()
+
+    @staticmethod
+    def _utc_day(timestamp: float) -> str:
+        return datetime.utcfromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+    def _seconds_until_next_day(self, now: float) -> float:
+        current = datetime.utcfromtimestamp(now)
+        tomorrow = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (tomorrow - current).total_seconds()
+
+    def _load_state(self) -> None:
+        if self._state_path is None or not self._state_path.exists():
+            return
+        try:
+            state = json.loads(self._state_path.read_text(encoding="utf-8"))
+            tokens = float(state["tokens"])
+            updated_at = float(state["updated_at"])
+            day = str(state["day"])
+            day_count = int(state["day_count"])
+        except (OSError, KeyError, TypeError, ValueError):
+            return
+        self._tokens = min(tokens, self._capacity)
+        self._updated_at = updated_at
+        self._day = day
+        self._day_count = day_count
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[None]:
+        """持有进程内锁与状态文件锁，并先从文件同步其他进程写入的状态。"""
+        with self._lock:
+            if self._state_path is None:
+                yield
+                return
+            try:
+                self._state_path.parent.mkdir(parents=True, exist_ok=True)
+                lock_file = open(self._state_path.with_name(f"{self._state_path.name}.lock"), "a+b")
+            except OSError:
+                # 无法创建锁文件时退化为仅在进程内限流。
+                yield
+                return
+            with lock_file:
+                _lock_file(lock_file)
+                try:
+                    self._load_state()
+                    yield
+                finally:
+                    _unlock_file(lock_file)
+
+    def _save_state(self) -> None:
+        if self._state_path is None:
+            return
+        state = {
+            "tokens": self._tokens,
+            "updated_at": self._updated_at,
+            "day": self._day,
+            "day_count": self._day_count,
+        }
+        tmp_path = self._state_path.with_name(f"{self._state_path.name}.tmp")
+        try:
+            self._state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(tmp_path, self._state_path)
+        except OSError:
+            # 状态文件写入失败时仍在内存中限流。
+            pass
+
+    def _advance(self, now: float) -> None:
+        elapsed = max(now - self._updated_at, 0.0)
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._refill_per_second)
+        self._updated_at = now
+        day = self._utc_day(now)
+        if day != self._day:
+            self._day = day
+            self._day_count = 0
+
+    def _wait_for_tokens(self, tokens: float) -> float:
+        if tokens >= 1.0:
+            return 0.0
+        return (1.0 - tokens) / self._refill_per_second
+
+    def expected_wait(self) -> float:
+        """新请求此刻入队所需等待的秒数；当日额度用尽时为距 UTC 零点的秒数。"""
+        with self._locked_state():
+            now = self._clock()
+            self._advance(now)
+            if self._day_count >= self._per_day:
+                return self._seconds_until_next_day(now)
+            return self._wait_for_tokens(self._tokens)
+
+    def remaining_today(self) -> int:
+        with self._locked_state():
+            self._advance(self._clock())
+            return max(self._per_day - self._day_count, 0)
+
+    def reserve(self, max_wait: Optional[float] = None) -> Reservation:
+        """预留一次请求许可并返回其预计等待时间，超出额度时抛出 ``RateLimitExceeded``。"""
+        with self._locked_state():
+            now = self._clock()
+            self._advance(now)
+            if self._day_count >= self._per_day:
+                raise RateLimitExceeded("今日请求额度已用尽。", self._seconds_until_next_day(now))
+
+            wait = self._wait_for_tokens(self._tokens)
+            if max_wait is not None and wait > max_wait:
+                raise RateLimitExceeded(f"请求过于频繁，请约 {wait:.0f} 秒后再试。", wait)
+
+            self._tokens -= 1.0
+            self._day_count += 1
+            self._save_state()
+            return Reservation(limiter=self, ready_at=now + wait)
+
+    def acquire(
+        self,
+        max_wait: Optional[float] = None,
+        on_wait: Optional[Callable[[float], None]] = None,
+        cancel: Optional[Event] = None,
+    ) -> Reservation:
+        """预留许可并阻塞至可以发起请求，需要排队时先以等待秒数调用 ``on_wait``。
+
+        排队期间 ``cancel`` 被置位时归还额度并抛出 ``RateLimitExceeded``；返回已生效的许可，
+        请求最终未发出时可调用其 ``cancel`` 归还额度。
+        """
+        reservation = self.reserve(max_wait=max_wait)
+        if on_wait is not None and reservation.expected_wait > 0:
+            on_wait(reservation.expected_wait)
+        reservation.wait(cancel)
+        return reservation
+
+    def refund(self) -> None:
+        """归还一次未真正到达服务端的请求所占用的额度。"""
+        self._release()
+
+    def _release(self) -> None:
+        with self._locked_state():
+            self._advance(self._clock())
+            self._tokens = min(self._capacity, self._tokens + 1.0)
+            self._day_count = max(self._day_count - 1, 0)
+            self._save_state()
+
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_file(handle) -> None:
+        handle.seek(0)
+        while True:
+            try:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK 重试约 10 秒后仍失败时抛出 OSError，继续等待持有者释放。
+                continue
+
+    def _unlock_file(handle) -> None:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_file(handle) -> None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(handle) -> None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+_DEFAULT_LIMITER: Optional[RateLimiter] = None
+_DEFAULT_LIMITER_LOCK = Lock()
+
+
+def get_default_limiter() -> RateLimiter:
+    """进程内共享的 Alpha Vantage 限流器，状态保存在缓存目录。"""
+    global _DEFAULT_LIMITER
+    if _DEFAULT_LIMITER is not None:
+        return _DEFAULT_LIMITER
+    with _DEFAULT_LIMITER_LOCK:
+        if _DEFAULT_LIMITER is None:
+            _DEFAULT_LIMITER = RateLimiter(state_path=DEFAULT_CACHE_DIR / "alpha_vantage_quota.json")
+    return _DEFAULT_LIMITER
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from app.config import AUTO_REFRESH_GRACE_MINUTES, AUTO_REFRESH_MIN_QUOTA
+from app.models.rate import RatesSnapshot
+from app.services.fx_schedule import next_daily_close, previous_daily_close
+from app.services.rate_limiter import RateLimiter
+
+_MIN_BACKOFF = timedelta(minutes=5)
+_MAX_BACKOFF = timedelta(hours=2)
+
+
+@dataclass(frozen=True)
+class RefreshPlan:
+    due: bool
+    next_check_at: datetime
+    reason: str
+
+
+def newer_data_available(snapshot: Optional[RatesSnapshot], now: datetime) -> bool:
+    """服务端是否可能已有更新的日线。
+
+    自上次抓取以来经历过一次收盘，或最新一根日线早于最近收盘日，均视为需要刷新。
+    """
+    if snapshot is None or snapshot.is_empty():
+        return True
+    last_close = previous_daily_close(now)
+    if snapshot.fetched_at < last_close:
+        return True
+    latest_date = datetime.strptime(str(snapshot.columns.dates[-1]), "%Y%m%d").date()
+    return latest_date < last_close.date()
+
+
+def backoff_delay(failures: int) -> timedelta:
+    return min(_MIN_BACKOFF * (2 ** max(failures - 1, 0)), _MAX_BACKOFF)
+
+
+def plan_refresh(
+    snapshot: Optional[RatesSnapshot],
+    now: datetime,
+    remaining_quota: int,
+    min_quota: int = AUTO_REFRESH_MIN_QUOTA,
+    grace: timedelta = timedelta(minutes=AUTO_REFRESH_GRACE_MINUTES),
+) -> RefreshPlan:
+    """根据快照新鲜度与剩余额度给出本次是否刷新以及下一次检查时间。"""
+    next_close_check = next_daily_close(now) + grace
+    if not newer_data_available(snapshot, now):
+        return RefreshPlan(due=False, next_check_at=next_close_check, reason="数据已是最新")
+    if remaining_quota < min_quota:
+        return RefreshPlan(
+            due=False,
+            next_check_at=min(now + _MAX_BACKOFF, next_close_check),
+            reason="今日剩余额度偏低，暂缓自动刷新",
+        )
+    return RefreshPlan(due=True, next_check_at=next_close_check, reason="有新的日线可用")
+
+
+class AutoRefreshScheduler:
+    """基于外汇日线收盘时刻的自动刷新调度器。
+
+    ``schedule(delay_ms, callback)`` 用于登记下一次检查（Tk 中即 ``after``），
+    ``trigger`` 负责真正发起后台刷新，完成后需调用 ``report_result``。
+    """
+
+    def __init__(
+        self,
+        snapshot_provider: Callable[[], Optional[RatesSnapshot]],
+        trigger: Callable[[], bool],
+        schedule: Callable[[int, Callable[[], None]], object],
+        limiter: RateLimiter,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ) -> None:
+        self._snapshot_provider = snapshot_provider
+        self._trigger = trigger
+        self._schedule = schedule
+        self._limiter = limiter
+        self._clock = clock
+        self._failures = 0
+        self._running = False
+        self._stopped = False
+        self.last_plan: Optional[RefreshPlan] = None
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        self._stopped = False
+        self._schedule(0, self.check)
+
+    def stop(self) -> None:
+        self._stopped = True
+
+    def check(self) -> None:
+        if self._stopped or self._running:
+            return
+        now = self._clock()
+        plan = plan_refresh(self._snapshot_provider(), now, self._limiter.remaining_today())
+        self.last_plan = plan
+
+        if plan.due:
+            if self._trigger():
+                self._running = True
+                return
+            # 暂时无法刷新（例如未配置 API Key 或手动刷新进行中），稍后再检查。
+            self._schedule_at(now + _MIN_BACKOFF, now)
+            return
+        self._schedule_at(plan.next_check_at, now)
+
+    def report_result(self, success: bool) -> None:
+        """由刷新任务完成时调用，据此决定下一次检查时间。"""
+        self._running = False
+        if self._stopped:
+            return
+        now = self._clock()
+        if success:
+            self._failures = 0
+            # 刷新成功后只需等到下一次收盘，避免服务端数据滞后时反复请求。
+            next_check = next_daily_close(now) + timedelta(minutes=AUTO_REFRESH_GRACE_MINUTES)
+        else:
+            self._failures += 1
+            next_check = now + backoff_delay(self._failures)
+        self._schedule_at(next_check, now)
+
+    def _schedule_at(self, moment: datetime, now: datetime) -> None:
+        delay_ms = max(int((moment - now).total_seconds() * 1000), 1000)
+        self._schedule(delay_ms, self.check)
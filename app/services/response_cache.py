@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from app.config import DEFAULT_CACHE_DIR, HTTP_CACHE_MAX_BYTES
+from app.services.fx_schedule import next_daily_close
+
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    function: str
+    from_symbol: str
+    to_symbol: str
+    outputsize: str
+
+    def with_outputsize(self, outputsize: str) -> "CacheKey":
+        return CacheKey(self.function, self.from_symbol, self.to_symbol, outputsize)
+
+    def digest(self) -> str:
+        raw = "|".join((self.function, self.from_symbol, self.to_symbol, self.outputsize)).upper()
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    key: CacheKey
+    body: bytes
+    stored_at: datetime
+    expires_at: datetime
+    stale: bool = False
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        """完整解码后的响应；热路径请改用 ``app.services.fx_stream`` 按窗口解析 ``body``。"""
+        return json.loads(self.body)
+
+
+class ResponseCache:
+    """磁盘上的接口响应缓存。
+
+    每个条目单独存为一个文件：首行为 JSON 元数据，其后是原样保存的响应体，
+    读取时无需解码整个响应即可判断是否过期。过期时间为写入后的下一个外汇日线收盘；
+    文件 mtime 记录最近访问时间，总大小超过上限时按 LRU 淘汰。
+    """
+
+    def __init__(self, cache_dir: Path | None = None, max_bytes: int = HTTP_CACHE_MAX_BYTES) -> None:
+        self._cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self._max_bytes = max_bytes
+        self._lock = Lock()
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir
+
+    def _path_for(self, key: CacheKey) -> Path:
+        return self._cache_dir / f"{key.digest()}.cache"
+
+    def _read(self, key: CacheKey, with_body: bool) -> Optional[CacheEntry]:
+        path = self._path_for(key)
+        try:
+            with path.open("rb") as fh:
+                header = json.loads(fh.readline())
+                body = fh.read() if with_body else b""
+            entry = CacheEntry(
+                key=key,
+                body=body,
+                stored_at=datetime.strptime(header["stored_at"], _TIMESTAMP_FORMAT),
+                expires_at=datetime.strptime(header["expires_at"], _TIMESTAMP_FORMAT),
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, TypeError, ValueError):
+            # 损坏的缓存条目直接丢弃，等待下一次成功请求覆盖。
+            path.unlink(missing_ok=True)
+            return None
+
+        if with_body:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return entry
+
+    def lookup(self, key: CacheKey, now: Optional[datetime] = None, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """查找可用条目；compact 请求也可由同一货币对的 full 条目满足。
+
+        ``allow_stale`` 为真时，若没有新鲜条目则返回最近写入的过期条目并标记 ``stale``。
+        """
+        now = now or datetime.utcnow()
+        candidates = [key]
+        if key.outputsize == "compact":
+            candidates.append(key.with_outputsize("full"))
+
+        with self._lock:
+            headers = [entry for entry in (self._read(candidate, with_body=False) for candidate in candidates) if entry]
+            fresh = [entry for entry in headers if entry.expires_at > now]
+            stale = False
+            if fresh:
+                chosen = max(fresh, key=lambda entry: entry.stored_at)
+            elif allow_stale and headers:
+                chosen = max(headers, key=lambda entry: entry.stored_at)
+                stale = True
+            else:
+                return None
+            entry = self._read(chosen.key, with_body=True)
+
+        if entry is not None:
+            entry.stale = stale
+        return entry
+
+    def store(self, key: CacheKey, body: bytes, now: Optional[datetime] = None) -> CacheEntry:
+        now = now or datetime.utcnow()
+        entry = CacheEntry(key=key, body=body, stored_at=now, expires_at=next_daily_close(now))
+        header = {
+            "key": [key.function, key.from_symbol, key.to_symbol, key.outputsize],
+            "stored_at": entry.stored_at.strftime(_TIMESTAMP_FORMAT),
+            "expires_at": entry.expires_at.strftime(_TIMESTAMP_FORMAT),
+        }
+        path = self._path_for(key)
+        tmp_path = path.with_suffix(".tmp")
+        with self._lock:
+            try:
+                self._cache_dir.mkdir(parents=True, exist_ok=True)
+                with tmp_path.open("wb") as fh:
+                    fh.write(json.dumps(header).encode("utf-8"))
+                    fh.write(b"\n")
+                    fh.write(body)
+                os.replace(tmp_path, path)
+            except OSError:
+                # 缓存写入失败不影响主流程。
+                tmp_path.unlink(missing_ok=True)
+                return entry
+            self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        files: List[tuple[float, int, Path]] = []
+        total = 0
+        for path in self._cache_dir.glob("*.cache"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        files.sort()
+        for _, size, path in files:
+            if total <= self._max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self._cache_dir.glob("*.cache"):
+                path.unlink(missing_ok=True)
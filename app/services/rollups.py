@@ -0,0 +1,196 @@
+"""把日线聚合为周线、月线、季线与年线。
+
+每个周期取首日开盘、末日收盘、最高价的最大值与最低价的最小值，振幅按聚合后的高低价重新计算；
+聚合后的 K 线以周期内最后一个交易日作为日期，因此尚未结束的周期会随新日线一起变化。
+长区间图表按可用宽度自动选择周期（见 ``select_view``），避免把数千根日线塞进一张图。
+K 线预算与 LTTB 降采样共用同一像素密度：日线数不超过降采样的点数预算时仍以日线展示。
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+from app.models.rate import RateColumns, RatesSnapshot, _amplitude
+from app.services.downsample import point_budget_for_width
+from app.services.tracing import traced
+
+DAILY = "daily"
+RESOLUTIONS = ("weekly", "monthly", "quarterly", "yearly")
+RESOLUTION_LABELS = {DAILY: "日线", "weekly": "周线", "monthly": "月线", "quarterly": "季线", "yearly": "年线"}
+# 估算各周期 K 线数量时使用的平均自然日长度。
+_PERIOD_DAYS = {"weekly": 7, "monthly": 30.44, "quarterly": 91.31, "yearly": 365.25}
+
+
+def _to_date(value: int) -> date:
+    year, rest = divmod(value, 10000)
+    return date(year, *divmod(rest, 100))
+
+
+def period_start(value: int, resolution: str) -> int:
+    """``value``（YYYYMMDD）所在周期的起始日期，同时作为周期的分组键；周线从周一开始。"""
+    year, rest = divmod(value, 10000)
+    month = rest // 100
+    if resolution == "weekly":
+        current = _to_date(value)
+        monday = current - timedelta(days=current.weekday())
+        return monday.year * 10000 + monday.month * 100 + monday.day
+    if resolution == "monthly":
+        return year * 10000 + month * 100 + 1
+    if resolution == "quarterly":
+        return year * 10000 + ((month - 1) // 3 * 3 + 1) * 100 + 1
+    if resolution == "yearly":
+        return year * 10000 + 101
+    raise ValueError(f"不支持的周期：{resolution}")
+
+
+def _next_period(start: int, resolution: str) -> int:
+    if resolution == "weekly":
+        following = _to_date(start) + timedelta(days=7)
+        return following.year * 10000 + following.month * 100 + following.day
+    year, rest = divmod(start, 10000)
+    month = rest // 100
+    step = {"monthly": 1, "quarterly": 3, "yearly": 12}[resolution]
+    year, month = divmod(year * 12 + month - 1 + step, 12)
+    return year * 10000 + (month + 1) * 100 + 1
+
+
+def rollup_window_start(value: int) -> int:
+    """重算 ``value`` 起受影响的各周期时，需要读取的最早日线日期。"""
+    return min(period_start(value, resolution) for resolution in RESOLUTIONS)
+
+
+def rollup_columns(columns: RateColumns, resolution: str, start: int = 0) -> RateColumns:
+    """把 ``columns[start:]`` 中的日线按周期聚合。"""
+    result = RateColumns()
+    size = len(columns)
+    if start >= size:
+        return result
+
+    dates, opens, closes, highs, lows = columns.dates, columns.open, columns.close, columns.high, columns.low
+    # 同一周期内的日期均早于 boundary，跨过边界时才需要重新计算分组键。
+    boundary = _next_period(period_start(dates[start], resolution), resolution)
+    open_price, high_price, low_price = opens[start], highs[start], lows[start]
+    for index in range(start + 1, size):
+        value = dates[index]
+        if value >= boundary:
+            result.append((dates[index - 1], open_price, closes[index - 1], high_price, low_price, _amplitude(high_price, low_price)))
+            boundary = _next_period(period_start(value, resolution), resolution)
+            open_price, high_price, low_price = opens[index], highs[index], lows[index]
+            continue
+        if highs[index] > high_price:
+            high_price = highs[index]
+        if lows[index] < low_price:
+            low_price = lows[index]
+    result.append((dates[-1], open_price, closes[-1], high_price, low_price, _amplitude(high_price, low_price)))
+    return result
+
+
+def rollup(snapshot: RatesSnapshot, resolution: str) -> RatesSnapshot:
+    if resolution == DAILY:
+        return snapshot
+    return RatesSnapshot(source=snapshot.source, fetched_at=snapshot.fetched_at, columns=rollup_columns(snapshot.columns, resolution))
+
+
+@dataclass
+class RollupSet:
+    """各周期的聚合 K 线，以及它们对应的日线范围（``rows`` 个交易日，``first`` 至 ``through``）。"""
+
+    bars: Dict[str, RatesSnapshot] = field(default_factory=dict)
+    rows: int = 0
+    first: int = 0
+    through: int = 0
+
+    @classmethod
+    @traced("rollups.build")
+    def build(cls, daily: RatesSnapshot) -> "RollupSet":
+        rollups = cls(bars={resolution: rollup(daily, resolution) for resolution in RESOLUTIONS})
+        rollups._cover(daily, len(daily.columns))
+        return rollups
+
+    def _cover(self, daily: RatesSnapshot, rows: int) -> None:
+        dates = daily.columns.dates
+        self.rows = rows
+        if dates:
+            self.first = min(self.first, dates[0]) if self.first else dates[0]
+        self.through = max(self.through, dates[-1]) if dates else self.through
+
+    def is_current(self, daily: RatesSnapshot) -> bool:
+        """是否由与 ``daily`` 相同范围的日线聚合而来。"""
+        dates = daily.columns.dates
+        if not dates:
+            return self.rows == 0
+        return (self.rows, self.first, self.through) == (len(dates), dates[0], dates[-1]) and set(self.bars) == set(RESOLUTIONS)
+
+    def covers(self, first: int, last: int) -> bool:
+        return bool(self.rows) and self.first <= first and last <= self.through
+
+    @traced("rollups.merge")
+    def merge(self, daily_tail: RatesSnapshot, since: int) -> None:
+        """日期不早于 ``since`` 的日线新增或修订后，只重算受影响的周期。
+
+        ``daily_tail`` 须包含自 ``rollup_window_start(since)`` 起的全部日线。
+        """
+        tail = daily_tail.columns
+        appended = len(tail) - bisect_left(tail.dates, self.through + 1) if self.rows else len(tail)
+        for resolution in RESOLUTIONS:
+            start = period_start(since, resolution)
+            existing = self.bars.get(resolution)
+            if existing is None:
+                self.bars[resolution] = rollup(daily_tail, resolution)
+                continue
+            kept = existing.columns
+            keep = bisect_left(kept.dates, start)
+            fresh = rollup_columns(tail, resolution, bisect_left(tail.dates, start))
+            columns = RateColumns(kept.dates[:keep], *(column[:keep] for column in kept.value_columns()))
+            for index in range(len(fresh)):
+                columns.append(fresh.row(index))
+            self.bars[resolution] = RatesSnapshot(source=daily_tail.source, fetched_at=daily_tail.fetched_at, columns=columns)
+        self._cover(daily_tail, self.rows + appended)
+
+    def window(self, resolution: str, first: int, last: int) -> RatesSnapshot:
+        """``resolution`` 周期中覆盖 [first, last] 的 K 线（首尾周期按整周期给出）。"""
+        # 结束边界取 last 所在周期的最后一天，尚未覆盖完的末个周期同样给出。
+        upper = _next_period(period_start(last, resolution), resolution) - 1
+        return self.bars[resolution].range(period_start(first, resolution), upper)
+
+
+def bar_budget_for_width(width: int) -> int:
+    """自动选择周期时的 K 线上限，与 ``point_budget_for_width`` 一致。"""
+    return point_budget_for_width(width)
+
+
+def pick_resolution(snapshot: RatesSnapshot, bar_budget: int) -> str:
+    """在 K 线数量不超过 ``bar_budget`` 的前提下选择最细的周期。"""
+    dates = snapshot.columns.dates
+    if len(dates) <= bar_budget:
+        return DAILY
+    span_days = (_to_date(dates[-1]) - _to_date(dates[0])).days + 1
+    for resolution in RESOLUTIONS:
+        if span_days / _PERIOD_DAYS[resolution] <= bar_budget:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+def select_view(
+    snapshot: RatesSnapshot,
+    resolution: str = "auto",
+    bar_budget: Optional[int] = None,
+    rollups: Optional[RollupSet] = None,
+) -> Tuple[RatesSnapshot, str]:
+    """返回用于展示的快照及其周期。
+
+    ``resolution="auto"`` 时按 ``bar_budget`` 选择周期；``rollups`` 为同一份日线的已缓存聚合结果，
+    覆盖当前区间时直接取用，否则按需从 ``snapshot`` 聚合。
+    """
+    if resolution == "auto":
+        resolution = DAILY if bar_budget is None else pick_resolution(snapshot, bar_budget)
+    if resolution == DAILY or snapshot.is_empty():
+        return snapshot, DAILY
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"不支持的周期：{resolution}")
+    dates = snapshot.columns.dates
+    if rollups is not None and resolution in rollups.bars and rollups.covers(dates[0], dates[-1]):
+        return rollups.window(resolution, dates[0], dates[-1]), resolution
+    return rollup(snapshot, resolution), resolution
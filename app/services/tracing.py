@@ -0,0 +1,281 @@
+"""轻量级耗时追踪。
+
+``span(name)`` 作为上下文管理器记录一段操作的耗时，嵌套调用会自动记录父子关系；
+``traced(name)`` 是等价的装饰器。每次结束的 span 会写入：
+
+- 最近 N 条操作的环形缓冲区（调试面板展示用）；
+- 按名称聚合的直方图注册表，可导出为 JSON 或 Prometheus 文本格式。
+
+关闭追踪时 ``span`` 直接返回共享的空上下文管理器，开销仅为一次属性判断。
+"""
+from __future__ import annotations
+
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from app.config import TRACE_HISTORY, TRACING_ENABLED
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# 直方图桶上限（毫秒），与 Prometheus 常用的秒级桶一致。
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+@dataclass(frozen=True)
+class SpanRecord:
+    name: str
+    started_at: datetime
+    duration_ms: float
+    depth: int
+    parent: Optional[str]
+    thread: str
+    error: Optional[str] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class Histogram:
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self.buckets_ms = tuple(sorted(buckets_ms))
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.min_ms = math.inf
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect_left(self.buckets_ms, value_ms)] += 1
+        self.count += 1
+        self.sum_ms += value_ms
+        self.min_ms = min(self.min_ms, value_ms)
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def quantile(self, q: float) -> float:
+        """按桶线性插值估算分位数。"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.counts):
+            upper = self.buckets_ms[index] if index < len(self.buckets_ms) else self.max_ms
+            if bucket_count and seen + bucket_count >= rank:
+                fraction = (rank - seen) / bucket_count
+                return min(max(lower + (upper - lower) * fraction, self.min_ms), self.max_ms)
+            seen += bucket_count
+            lower = upper
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "min_ms": round(self.min_ms, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": round(self.quantile(0.5), 3),
+            "p95_ms": round(self.quantile(0.95), 3),
+            "p99_ms": round(self.quantile(0.99), 3),
+            "buckets": {
+                **{f"{bound:g}": count for bound, count in zip(self.buckets_ms, self._cumulative())},
+                "+Inf": self.count,
+            },
+        }
+
+    def _cumulative(self) -> List[int]:
+        total = 0
+        cumulative = []
+        for bucket_count in self.counts[:-1]:
+            total += bucket_count
+            cumulative.append(total)
+        return cumulative
+
+
+class MetricsRegistry:
+    """按 span 名称聚合耗时的直方图集合。"""
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self._buckets_ms = tuple(buckets_ms)
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value_ms: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self._buckets_ms)
+            histogram.observe(value_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def to_prometheus(self, metric: str = "fx_span_duration_seconds") -> str:
+        lines = [
+            f"# HELP {metric} Duration of traced operations.",
+            f"# TYPE {metric} histogram",
+        ]
+        for name, data in self.snapshot().items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for bound, count in data["buckets"].items():
+                le = bound if bound == "+Inf" else f"{float(bound) / 1000:g}"
+                lines.append(f'{metric}_bucket{{span="{label}",le="{le}"}} {count}')
+            lines.append(f'{metric}_sum{{span="{label}"}} {data["sum_ms"] / 1000:.6f}')
+            lines.append(f'{metric}_count{{span="{label}"}} {data["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("_tracer", "name", "attrs", "_started", "_started_at", "_parent", "_depth")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "_Span":
+        stack = self._tracer._stack()
+        self._parent = stack[-1].name if stack else None
+        self._depth = len(stack)
+        stack.append(self)
+        self._started_at = datetime.now()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        stack = self._tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        error = None
+        if exc_type is not None:
+            error = f"{exc_type.__name__}: {exc}"
+        self._tracer._finish(
+            SpanRecord(
+                name=self.name,
+                started_at=self._started_at,
+                duration_ms=duration_ms,
+                depth=self._depth,
+                parent=self._parent,
+                thread=threading.current_thread().name,
+                error=error,
+                attrs=self.attrs,
+            )
+        )
+
+
+class Tracer:
+    def __init__(self, enabled: bool = True, history: int = 200, registry: Optional[MetricsRegistry] = None) -> None:
+        self.enabled = enabled
+        self.registry = registry or MetricsRegistry()
+        self._recent: Deque[SpanRecord] = deque(maxlen=max(int(history), 1))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name: str, **attrs: Any) -> Any:
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name, attrs)
+
+    def observe(self, name: str, duration_ms: float) -> None:
+        """记录一段在别处（如子进程）测得的耗时，只计入直方图。"""
+        if self.enabled:
+            self.registry.observe(name, duration_ms)
+
+    def recent(self, limit: Optional[int] = None) -> List[SpanRecord]:
+        """最近结束的 span，按结束时间从新到旧排列。"""
+        with self._lock:
+            records = list(self._recent)
+        records.reverse()
+        return records[:limit] if limit else records
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recent.clear()
+        self.registry.reset()
+
+    def export_json(self) -> Dict[str, Any]:
+        return {
+            "histograms": self.registry.snapshot(),
+            "recent": [
+                {
+                    "name": record.name,
+                    "started_at": record.started_at.isoformat(timespec="milliseconds"),
+                    "duration_ms": round(record.duration_ms, 3),
+                    "parent": record.parent,
+                    "thread": record.thread,
+                    "error": record.error,
+                    "attrs": {key: str(value) for key, value in record.attrs.items()},
+                }
+                for record in self.recent()
+            ],
+        }
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _finish(self, record: SpanRecord) -> None:
+        with self._lock:
+            self._recent.append(record)
+        self.registry.observe(record.name, record.duration_ms)
+
+
+_TRACER = Tracer(enabled=TRACING_ENABLED, history=TRACE_HISTORY)
+
+
+def get_tracer() -> Tracer:
+    return _TRACER
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """以上下文管理器记录 ``name`` 的耗时；追踪关闭时几乎没有开销。"""
+    if not _TRACER.enabled:
+        return _NOOP_SPAN
+    return _Span(_TRACER, name, attrs)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """装饰器形式的 ``span``。"""
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _TRACER.enabled:
+                return fn(*args, **kwargs)
+            with _Span(_TRACER, name, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,321 @@
+"""独立进程中的图表宿主。
+
+pywebview 的事件循环必须占用所在进程的主线程，直接在 Tk 回调里调用会让界面卡死到图表关闭。
+``ChartHost`` 预先启动一个子进程承载全部图表窗口，主进程只通过管道发送消息：
+
+- ``("open", key, title, theme, option_json, width, height)``：新建窗口；
+- ``("eval", key, script, title)``：向已打开的窗口推送增量（见 ``LiveChart``）；
+- ``("close", key)`` / ``("shutdown",)``。
+
+子进程回传 ``("opened", key, elapsed_ms)``、``("closed", key)`` 与 ``("error", key, message)``，
+由 ``ChartHost.poll`` 在 Tk 事件循环中非阻塞地取回。
+
+选择展示周期、构建 option（含 LTTB 降采样）与规划增量都在 ``ChartHost`` 自己的渲染线程中完成，
+Tk 线程只负责排队；渲染线程中的异常同样以 ``("error", key, message)`` 经 ``poll`` 返回。
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.models.rate import RatesSnapshot
+from app.services.downsample import point_budget_for_width
+from app.services.indicators import IndicatorSpec
+from app.services.rollups import bar_budget_for_width
+from app.services.tracing import get_tracer, traced
+from app.ui.webview import _RENDER_CACHE, DEFAULT_CHART_HEIGHT, DEFAULT_CHART_WIDTH, LiveChart, chart_view
+
+if TYPE_CHECKING:
+    from app.services.rollups import RollupSet
+
+HostEvent = Tuple[Any, ...]
+
+
+class _RemoteWindow:
+    """在主进程中代表子进程里的某个窗口，供 ``LiveChart`` 推送脚本。"""
+
+    def __init__(self, host: "ChartHost", key: str) -> None:
+        self._host = host
+        self._key = key
+        self._title: Optional[str] = None
+
+    def set_title(self, title: str) -> None:
+        self._title = title
+
+    def evaluate_js(self, script: str) -> None:
+        title, self._title = self._title, None
+        self._host._send(("eval", self._key, script, title))
+
+
+class ChartHost:
+    def __init__(self) -> None:
+        self._process: Any = None
+        self._conn: Any = None
+        self._charts: Dict[str, LiveChart] = {}
+        self._send_lock = Lock()
+        # 保护 _charts 与 _events，二者同时被 Tk 线程与渲染线程访问。
+        self._state_lock = Lock()
+        # 已取回但尚未经 poll 交给调用方的事件。
+        self._events: List[HostEvent] = []
+        # 单线程保证同一窗口的打开与各次增量按提交顺序执行。
+        self._renderer: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> None:
+        """启动（预热）宿主进程；已在运行时不做任何事。"""
+        if self.alive:
+            return
+        import multiprocessing
+
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=_host_main, args=(child_conn,), name="fx-chart-host", daemon=True)
+        process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self._process = process
+        with self._state_lock:
+            self._charts.clear()
+
+    @traced("chart_host.show")
+    def show(
+        self,
+        snapshot: RatesSnapshot,
+        title: str,
+        key: str,
+        overlays: Sequence[IndicatorSpec] = (),
+        theme: str = "light",
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        resolution: str = "auto",
+        rollups: Optional[RollupSet] = None,
+    ) -> "Future[str]":
+        """在 ``key`` 对应的窗口中展示快照，立即返回。
+
+        渲染在后台线程中进行，返回的 Future 结果为 ``"open"``、``"append"``、``"replace"`` 或 ``"unchanged"``；
+        ``resolution`` / ``rollups`` 见 ``render_rates``。
+        """
+        if snapshot.is_empty():
+            raise ValueError("没有可视化的数据。")
+        if not self.alive:
+            self.start()
+        # 先取回已到达的事件，避免把增量推给刚被用户关闭的窗口；事件留给下一次 poll。
+        self._drain_pipe()
+        return self._submit(
+            key, self._render, snapshot, title, key, tuple(overlays), theme, width, height, resolution, rollups
+        )
+
+    @traced("chart_host.render")
+    def _render(
+        self,
+        snapshot: RatesSnapshot,
+        title: str,
+        key: str,
+        overlays: Tuple[IndicatorSpec, ...],
+        theme: str,
+        width: Optional[int],
+        height: Optional[int],
+        resolution: str,
+        rollups: Optional[RollupSet],
+    ) -> str:
+        with self._state_lock:
+            chart = self._charts.get(key)
+        if chart is not None:
+            return chart.update(snapshot, title=title, overlays=overlays)
+
+        width = width or DEFAULT_CHART_WIDTH
+        height = height or DEFAULT_CHART_HEIGHT
+        point_budget = point_budget_for_width(width)
+        bar_budget = bar_budget_for_width(width)
+        view, display_title, chosen = chart_view(snapshot, title, resolution, bar_budget, rollups)
+        option_json = _RENDER_CACHE.option_json(view, overlays, point_budget, chosen)
+        chart = LiveChart(
+            key,
+            _RemoteWindow(self, key),
+            view,
+            title,
+            overlays,
+            point_budget,
+            resolution,
+            bar_budget,
+            rollups,
+            display_title,
+            chosen,
+        )
+        with self._state_lock:
+            self._charts[key] = chart
+        self._send(("open", key, display_title, theme, option_json, width, height))
+        return "open"
+
+    def update(self, key: str, snapshot: RatesSnapshot) -> bool:
+        """若 ``key`` 对应的窗口仍打开，则在渲染线程中推送新数据并返回 True。"""
+        chart = self._chart(key)
+        if chart is None or snapshot.is_empty() or not self.alive:
+            return False
+        self._submit(key, chart.update, snapshot)
+        return True
+
+    def is_open(self, key: str) -> bool:
+        return self._chart(key) is not None
+
+    def close(self, key: str) -> None:
+        with self._state_lock:
+            chart = self._charts.pop(key, None)
+        if chart is not None and self.alive:
+            self._send(("close", key))
+
+    def _chart(self, key: str) -> Optional[LiveChart]:
+        with self._state_lock:
+            return self._charts.get(key)
+
+    def _submit(self, key: str, fn: Callable[..., str], *args: Any) -> "Future[str]":
+        if self._renderer is None:
+            self._renderer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-render")
+
+        def run() -> str:
+            try:
+                return fn(*args)
+            except Exception as exc:  # 交由 poll 以 error 事件报告，不在渲染线程中静默丢失
+                with self._state_lock:
+                    self._charts.pop(key, None)
+                    self._events.append(("error", key, str(exc)))
+                raise
+
+        return self._renderer.submit(run)
+
+    def poll(self) -> List[HostEvent]:
+        """返回子进程与渲染线程的全部待处理事件（不阻塞），并据此更新窗口登记。"""
+        self._drain_pipe()
+        with self._state_lock:
+            events, self._events = self._events, []
+        return events
+
+    def _drain_pipe(self) -> None:
+        """读出管道中已到达的事件并更新窗口登记，事件暂存到 ``_events``。"""
+        if self._conn is None:
+            return
+        events: List[HostEvent] = []
+        try:
+            while self._conn.poll():
+                events.append(self._conn.recv())
+        except (EOFError, OSError):
+            # 子进程已退出，所有窗口随之关闭。
+            with self._state_lock:
+                events.extend(("closed", key) for key in self._charts)
+                self._charts.clear()
+                self._events.extend(events)
+            self._conn = None
+            return
+
+        with self._state_lock:
+            for event in events:
+                if event[0] in {"closed", "error"}:
+                    self._charts.pop(event[1], None)
+                elif event[0] == "opened":
+                    # 窗口在子进程中创建到页面加载完成的耗时，计入同一直方图注册表。
+                    get_tracer().observe("chart_host.window_loaded", event[2])
+            self._events.extend(events)
+
+    def shutdown(self, timeout: float = 2.0) -> None:
+        if self._renderer is not None:
+            self._renderer.shutdown(wait=False, cancel_futures=True)
+            self._renderer = None
+        if self._process is None:
+            return
+        if self.alive:
+            try:
+                self._send(("shutdown",))
+            except OSError:
+                pass
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._process = None
+        self._conn = None
+        with self._state_lock:
+            self._charts.clear()
+
+    def _send(self, message: HostEvent) -> None:
+        with self._send_lock:
+            self._conn.send(message)
+
+
+def _host_main(conn: Any) -> None:
+    """子进程入口：主线程运行 GUI 事件循环，后台线程读取管道消息。"""
+    import webview
+
+    from app.ui.webview import _load_echarts_js, _load_template, render_html
+
+    # 预热：提前读取并校验 ECharts 资源与模板，首个图表无需再等。
+    _load_template()
+    _load_echarts_js()
+
+    windows: Dict[str, Any] = {}
+    send_lock = Lock()
+
+    def reply(*event: Any) -> None:
+        with send_lock:
+            try:
+                conn.send(event)
+            except OSError:
+                pass
+
+    def open_window(key: str, title: str, theme: str, option_json: str, width: int, height: int) -> None:
+        started = time.perf_counter()
+        window = webview.create_window(title, html=render_html(option_json, title, theme), width=width, height=height)
+
+        def on_loaded() -> None:
+            reply("opened", key, (time.perf_counter() - started) * 1000)
+
+        def on_closed() -> None:
+            if windows.get(key) is window:
+                del windows[key]
+            reply("closed", key)
+
+        window.events.loaded += on_loaded
+        window.events.closed += on_closed
+        windows[key] = window
+
+    def listen() -> None:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            command, args = message[0], message[1:]
+            if command == "shutdown":
+                break
+            key = args[0]
+            try:
+                if command == "open":
+                    if key in windows:
+                        windows.pop(key).destroy()
+                    open_window(*args)
+                elif command == "eval":
+                    _, script, title = args
+                    window = windows.get(key)
+                    if window is None:
+                        reply("closed", key)
+                        continue
+                    if title:
+                        window.set_title(title)
+                    window.evaluate_js(script)
+                elif command == "close":
+                    window = windows.pop(key, None)
+                    if window is not None:
+                        window.destroy()
+            except Exception as exc:  # 单个窗口出错不应拖垮宿主进程
+                reply("error", key, str(exc))
+
+        for window in list(windows.values()):
+            window.destroy()
+        placeholder.destroy()
+
+    # pywebview 至少需要一个窗口才能启动事件循环，用隐藏窗口保持宿主常驻。
+    placeholder = webview.create_window("fx-chart-host", html="<html></html>", hidden=True)
+    webview.start(listen)
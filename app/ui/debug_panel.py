@@ -0,0 +1,132 @@
+"""耗时追踪调试面板：展示最近的操作与各 span 的耗时分布。"""
+from __future__ import annotations
+
+import json
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+from typing import Optional
+
+from app.config import TRACE_HISTORY
+from app.services.tracing import Tracer, get_tracer
+
+REFRESH_INTERVAL_MS = 1000
+
+
+class TracePanel(tk.Toplevel):
+    def __init__(self, master: tk.Misc, tracer: Optional[Tracer] = None, limit: int = TRACE_HISTORY) -> None:
+        super().__init__(master)
+        self.title("调试 · 耗时追踪")
+        self.geometry("860x560")
+        self.configure(bg="#e9eef6")
+        self.tracer = tracer or get_tracer()
+        self.limit = limit
+        self._refresh_job: Optional[str] = None
+        self.summary_var = tk.StringVar()
+
+        self._build_layout()
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def _build_layout(self) -> None:
+        container = ttk.Frame(self, padding=16, style="App.TFrame")
+        container.pack(fill="both", expand=True)
+        container.columnconfigure(0, weight=1)
+        container.rowconfigure(1, weight=3)
+        container.rowconfigure(3, weight=2)
+
+        ttk.Label(container, text="最近操作", style="Subtitle.TLabel").grid(row=0, column=0, sticky="w")
+        self.recent_tree = self._create_tree(
+            container,
+            row=1,
+            columns=(("time", "时间", 110), ("name", "操作", 260), ("ms", "耗时 (ms)", 90), ("thread", "线程", 120), ("error", "错误", 220)),
+        )
+
+        ttk.Label(container, text="耗时分布", style="Subtitle.TLabel").grid(row=2, column=0, sticky="w", pady=(12, 0))
+        self.histogram_tree = self._create_tree(
+            container,
+            row=3,
+            columns=(("name", "操作", 260), ("count", "次数", 70), ("p50", "p50 (ms)", 90), ("p95", "p95 (ms)", 90), ("max", "最大 (ms)", 90)),
+        )
+
+        actions = ttk.Frame(container, style="App.TFrame")
+        actions.grid(row=4, column=0, sticky="ew", pady=(12, 0))
+        actions.columnconfigure(0, weight=1)
+        ttk.Label(actions, textvariable=self.summary_var, style="Status.TLabel").grid(row=0, column=0, sticky="w")
+        ttk.Button(actions, text="清空", style="Ghost.TButton", command=self._clear).grid(row=0, column=1, padx=(8, 0))
+        ttk.Button(actions, text="导出 JSON", style="Ghost.TButton", command=self._export_json).grid(row=0, column=2, padx=(8, 0))
+        ttk.Button(actions, text="导出 Prometheus", style="Ghost.TButton", command=self._export_prometheus).grid(row=0, column=3, padx=(8, 0))
+
+    @staticmethod
+    def _create_tree(parent: tk.Misc, row: int, columns: tuple) -> ttk.Treeview:
+        frame = ttk.Frame(parent)
+        frame.grid(row=row, column=0, sticky="nsew", pady=(6, 0))
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+
+        tree = ttk.Treeview(frame, columns=[name for name, _, _ in columns], show="headings")
+        for name, heading, width in columns:
+            tree.heading(name, text=heading)
+            tree.column(name, width=width, anchor="e" if name in {"ms", "count", "p50", "p95", "max"} else "w")
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        return tree
+
+    def refresh(self) -> None:
+        """重新读取追踪数据；面板打开期间每秒调用一次。"""
+        self.recent_tree.delete(*self.recent_tree.get_children())
+        for record in self.tracer.recent(self.limit):
+            self.recent_tree.insert(
+                "",
+                "end",
+                values=(
+                    record.started_at.strftime("%H:%M:%S.%f")[:-3],
+                    "  " * record.depth + record.name,
+                    f"{record.duration_ms:.2f}",
+                    record.thread,
+                    record.error or "",
+                ),
+            )
+
+        histograms = self.tracer.registry.snapshot()
+        self.histogram_tree.delete(*self.histogram_tree.get_children())
+        for name, data in histograms.items():
+            self.histogram_tree.insert(
+                "",
+                "end",
+                values=(name, data["count"], f"{data['p50_ms']:.2f}", f"{data['p95_ms']:.2f}", f"{data['max_ms']:.2f}"),
+            )
+
+        state = "已开启" if self.tracer.enabled else "已关闭（设置 TRACING_ENABLED=1 开启）"
+        self.summary_var.set(f"追踪{state} · 共 {sum(data['count'] for data in histograms.values())} 次操作")
+        self._refresh_job = self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def close(self) -> None:
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        self.destroy()
+
+    def _clear(self) -> None:
+        self.tracer.clear()
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+        self.refresh()
+
+    def _export_json(self) -> None:
+        text = json.dumps(self.tracer.export_json(), ensure_ascii=False, indent=2)
+        self._save(text, ".json", [("JSON", "*.json")])
+
+    def _export_prometheus(self) -> None:
+        self._save(self.tracer.registry.to_prometheus(), ".prom", [("Prometheus", "*.prom"), ("文本", "*.txt")])
+
+    def _save(self, text: str, extension: str, filetypes: list) -> None:
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=extension, filetypes=filetypes)
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(text)
+        except OSError as exc:
+            messagebox.showerror("导出失败", str(exc), parent=self)
@@ -3,13 +3,24 @@ from __future__ import annotations
 import os
 import tkinter as tk
 from tkinter import messagebox, ttk
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, List, Optional
 
-from app.config import DEFAULT_BASE_DAYS, load_env_defaults
+from app.config import AUTO_REFRESH_ENABLED, CHART_OVERLAYS_TEXT, DEFAULT_BASE_DAYS, load_env_defaults
 from app.models.rate import RatesSnapshot
-from app.services.alpha_vantage import AlphaVantageClient, AlphaVantageError
 from app.services.base_rates_service import BaseRatesRefreshError, BaseRatesService
-from app.ui.webview import render_rates
+from app.services.indicators import IndicatorSpec, parse_indicator_list
+from app.services.rate_limiter import get_default_limiter
+from app.services.refresh_scheduler import AutoRefreshScheduler
+from app.services.response_cache import ResponseCache
+from app.ui.chart_host import ChartHost
+from app.ui.worker import BackgroundWorker, TaskHandle
+
+if TYPE_CHECKING:
+    from app.services.providers import ProviderChain
+    from app.ui.debug_panel import TracePanel
+
+
+CHART_POLL_INTERVAL_MS = 200
 
 
 class RatesApp(tk.Tk):
@@ -21,12 +32,31 @@ class RatesApp(tk.Tk):
         self.configure(bg="#e9eef6")
 
         self.base_rates_service = base_rates_service
+        self.response_cache = ResponseCache()
+        self.rate_limiter = get_default_limiter()
         self._base_snapshot: Optional[RatesSnapshot] = None
+        self.worker = BackgroundWorker(self)
+        # 图表在独立进程中渲染，启动时预热，首次打开无需等待进程创建。
+        self.chart_host = ChartHost()
+        self._trace_panel: Optional[TracePanel] = None
+        self.chart_overlays: List[IndicatorSpec] = []
+        overlay_error: Optional[str] = None
+        try:
+            self.chart_overlays = parse_indicator_list(CHART_OVERLAYS_TEXT)
+        except ValueError as exc:
+            overlay_error = f"指标配置已忽略：{exc}"
+        self.auto_refresh = AutoRefreshScheduler(
+            snapshot_provider=lambda: self._base_snapshot,
+            trigger=self._auto_refresh,
+            schedule=self.after,
+            limiter=self.rate_limiter,
+        )
 
         self.env_defaults = load_env_defaults()
         self.api_key_var = tk.StringVar(value=os.getenv("ALPHAVANTAGE_API_KEY", self.env_defaults.get("ALPHAVANTAGE_API_KEY", "")))
         self.outputsize_var = tk.StringVar(value=os.getenv("ALPHAVANTAGE_OUTPUTSIZE", self.env_defaults.get("ALPHAVANTAGE_OUTPUTSIZE", "compact")))
         self.days_var = tk.StringVar()
+        self.incremental_var = tk.BooleanVar(value=True)
         self.status_var = tk.StringVar(value="欢迎体验现代化的汇率洞察面板")
         self.base_title_var = tk.StringVar()
         self.base_desc_var = tk.StringVar()
@@ -38,7 +68,10 @@ class RatesApp(tk.Tk):
 
         self._configure_style()
         self._build_layout()
-        self._load_local_snapshot()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._startup_notice = overlay_error
+        # 首帧绘制完成后再读取快照、预热图表进程，窗口尽早出现。
+        self.after_idle(self._after_first_frame)
 
     # region UI
     def _configure_style(self) -> None:
@@ -58,6 +91,7 @@ class RatesApp(tk.Tk):
         style.configure("MetricValue.TLabel", font=("Microsoft YaHei", 14, "bold"), background="#ffffff", foreground="#0f172a")
         style.configure("Input.TEntry", padding=6, fieldbackground="#f8fafc")
         style.configure("TCombobox", padding=6)
+        style.configure("Card.TCheckbutton", font=("Microsoft YaHei", 10), background="#ffffff", foreground="#1f2937")
         style.configure("Accent.TButton", padding=10, font=("Microsoft YaHei", 10, "bold"), background="#2563eb", foreground="#ffffff")
         style.map(
             "Accent.TButton",
@@ -137,21 +171,30 @@ class RatesApp(tk.Tk):
         days_entry = ttk.Entry(form_card, textvariable=self.days_var, style="Input.TEntry")
         days_entry.grid(row=7, column=0, sticky="ew")
 
-        ttk.Separator(form_card).grid(row=8, column=0, sticky="ew", pady=18)
+        ttk.Checkbutton(
+            form_card,
+            text="增量刷新（仅同步本地缺失的交易日）",
+            variable=self.incremental_var,
+            style="Card.TCheckbutton",
+        ).grid(row=8, column=0, sticky="w", pady=(14, 0))
+
+        ttk.Separator(form_card).grid(row=9, column=0, sticky="ew", pady=18)
 
         actions = ttk.Frame(form_card, style="CardInner.TFrame")
-        actions.grid(row=9, column=0, sticky="ew")
+        actions.grid(row=10, column=0, sticky="ew")
         actions.columnconfigure(0, weight=1)
         actions.columnconfigure(1, weight=1)
 
-        ttk.Button(actions, text="打开走势 / 查询", style="Primary.TButton", command=self._on_submit).grid(
+        self.query_btn = ttk.Button(actions, text="打开走势 / 查询", style="Primary.TButton", command=self._on_submit)
+        self.query_btn.grid(
             row=0,
             column=0,
             sticky="ew",
             padx=(0, 8),
         )
 
-        ttk.Button(actions, text="刷新基础数据", style="Accent.TButton", command=self._refresh_base_data).grid(
+        self.refresh_btn = ttk.Button(actions, text="刷新基础数据", style="Accent.TButton", command=self._refresh_base_data)
+        self.refresh_btn.grid(
             row=0,
             column=1,
             sticky="ew",
@@ -207,47 +250,123 @@ class RatesApp(tk.Tk):
         status_frame.grid(row=2, column=0, sticky="ew", pady=(16, 0))
         status_frame.columnconfigure(1, weight=1)
 
-        ttk.Separator(status_frame).grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 12))
+        ttk.Separator(status_frame).grid(row=0, column=0, columnspan=4, sticky="ew", pady=(0, 12))
         ttk.Label(status_frame, text="状态", style="MetricTitle.TLabel").grid(row=1, column=0, sticky="w", padx=(0, 8))
         ttk.Label(status_frame, textvariable=self.status_var, style="Status.TLabel").grid(row=1, column=1, sticky="w")
+        self.cancel_btn = ttk.Button(status_frame, text="取消", style="Ghost.TButton", command=self._cancel_tasks)
+        self.cancel_btn.grid(row=1, column=2, sticky="e")
+        self.cancel_btn.state(["disabled"])
+        self.debug_btn = ttk.Button(status_frame, text="调试", style="Ghost.TButton", command=self._show_trace_panel)
+        self.debug_btn.grid(row=1, column=3, sticky="e", padx=(8, 0))
 
         self._reset_base_summary()
     # endregion
 
     # region Data
+    def _after_first_frame(self) -> None:
+        self._load_local_snapshot()
+        self.chart_host.start()
+        self.after(CHART_POLL_INTERVAL_MS, self._poll_chart_host)
+
     def _load_local_snapshot(self) -> None:
-        try:
-            snapshot = self.base_rates_service.load_snapshot()
-        except BaseRatesRefreshError as exc:
+        """在后台线程读取并解析本地快照，完成后再启动自动刷新。"""
+        self.status_var.set("正在加载本地基础数据…")
+
+        def on_success(snapshot: Optional[RatesSnapshot]) -> None:
+            if snapshot:
+                self._sync_base_snapshot(snapshot)
+            else:
+                self._reset_base_summary()
+                self.status_var.set("未找到本地基础数据，请尝试刷新。")
+
+        def on_error(exc: BaseException) -> None:
+            if not isinstance(exc, BaseRatesRefreshError):
+                raise exc
             self._reset_base_summary()
             self.status_var.set(str(exc))
-            return
 
-        if snapshot:
-            self._sync_base_snapshot(snapshot)
-        else:
-            self._reset_base_summary()
-            self.status_var.set("未找到本地基础数据，请尝试刷新。")
+        def on_finally() -> None:
+            if self._startup_notice:
+                self.status_var.set(self._startup_notice)
+            if AUTO_REFRESH_ENABLED:
+                # 先展示本地缓存，再在后台按需重新验证。
+                self.auto_refresh.start()
+
+        self.worker.submit(
+            "加载本地数据",
+            lambda task: self.base_rates_service.load_latest(DEFAULT_BASE_DAYS),
+            on_success,
+            on_error,
+            on_finally=on_finally,
+        )
 
     def _refresh_base_data(self) -> None:
         api_key = self.api_key_var.get().strip()
-        if not api_key:
-            messagebox.showerror("错误", "请先输入 API Key！")
+        if not self._check_providers(api_key):
             return
 
-        client = AlphaVantageClient(api_key)
-        try:
+        incremental = self.incremental_var.get()
+        outputsize = self.outputsize_var.get().strip() or "compact"
+
+        def work(task: TaskHandle) -> tuple:
+            client = self._create_client(api_key, task)
+            if incremental:
+                result = self.base_rates_service.refresh_incremental(client=client, days=DEFAULT_BASE_DAYS, cancel=task.cancel_event)
+                prefix = f"基础数据已增量更新（{result.outputsize}，变更 {result.delta.trading_days()} 条）"
+                return result.snapshot, result.stale, prefix
             snapshot = self.base_rates_service.refresh_snapshot(
-                client=client,
-                outputsize=self.outputsize_var.get().strip() or "compact",
-                days=DEFAULT_BASE_DAYS,
+                client=client, outputsize=outputsize, days=DEFAULT_BASE_DAYS, cancel=task.cancel_event
             )
-        except BaseRatesRefreshError as exc:
+            return snapshot, snapshot.stale, "基础数据已更新"
+
+        def on_success(outcome: tuple) -> None:
+            snapshot, stale, prefix = outcome
+            if stale:
+                prefix = "接口限流，已使用缓存数据"
+            self._sync_base_snapshot(snapshot, status_message=self._snapshot_status_text(snapshot, prefix=prefix))
+            if stale:
+                messagebox.showwarning("提示", "数据源当前限流，已使用本地缓存的最近一次响应。")
+            else:
+                messagebox.showinfo("完成", "基础数据刷新完成，快去探索最新走势吧！")
+
+        def on_error(exc: BaseException) -> None:
+            if not isinstance(exc, BaseRatesRefreshError):
+                raise exc
+            self.status_var.set("基础数据刷新失败。")
             messagebox.showerror("刷新失败", str(exc))
-            return
 
-        self._sync_base_snapshot(snapshot, status_message=self._snapshot_status_text(snapshot, prefix="基础数据已更新"))
-        messagebox.showinfo("完成", "基础数据刷新完成，快去探索最新走势吧！")
+        self._start_task("正在刷新基础数据…", self.refresh_btn, work, on_success, on_error)
+
+    def _auto_refresh(self) -> bool:
+        """由自动刷新调度器调用：静默执行一次增量刷新，返回是否已发起。"""
+        api_key = self.api_key_var.get().strip()
+        if self.refresh_btn.instate(["disabled"]) or not self._check_providers(api_key, quiet=True):
+            return False
+
+        def work(task: TaskHandle) -> tuple:
+            client = self._create_client(api_key, task)
+            result = self.base_rates_service.refresh_incremental(client=client, days=DEFAULT_BASE_DAYS, cancel=task.cancel_event)
+            return result.snapshot, result.stale
+
+        def on_success(outcome: tuple) -> None:
+            snapshot, stale = outcome
+            prefix = "接口限流，暂用缓存数据" if stale else "已在后台自动更新"
+            self._sync_base_snapshot(snapshot, status_message=self._snapshot_status_text(snapshot, prefix=prefix))
+            self.auto_refresh.report_result(success=not stale)
+
+        def on_error(exc: BaseException) -> None:
+            self.auto_refresh.report_result(success=False)
+            if not isinstance(exc, BaseRatesRefreshError):
+                raise exc
+            self.status_var.set(f"自动刷新失败，将稍后重试：{exc}")
+
+        def on_finally() -> None:
+            # 被取消时不会回调成功或失败，按失败处理以进入退避。
+            if self.auto_refresh.running:
+                self.auto_refresh.report_result(success=False)
+
+        self._start_task("正在后台检查最新行情…", self.refresh_btn, work, on_success, on_error, on_finally)
+        return True
 
     def _on_submit(self) -> None:
         days_value = self.days_var.get().strip()
@@ -256,25 +375,38 @@ class RatesApp(tk.Tk):
             return
 
         api_key = self.api_key_var.get().strip()
-        if not api_key:
-            messagebox.showerror("错误", "请先输入 API Key！")
+        if not self._check_providers(api_key):
             return
 
-        try:
-            client = AlphaVantageClient(api_key)
-            snapshot = client.fetch_rates(days=days_value, outputsize=self.outputsize_var.get())
-        except (AlphaVantageError, ValueError) as exc:
+        outputsize = self.outputsize_var.get()
+
+        def work(task: TaskHandle) -> RatesSnapshot:
+            client = self._create_client(api_key, task)
+            return client.fetch_rates(days=days_value, outputsize=outputsize)
+
+        def on_success(snapshot: RatesSnapshot) -> None:
+            self.status_var.set("数据已就绪，正在打开图表…")
+            try:
+                self.chart_host.show(snapshot, title="自定义数据走势", key="custom", overlays=self.chart_overlays)
+            except (OSError, RuntimeError) as exc:
+                messagebox.showinfo("提示", f"图表窗口无法打开：{exc}")
+            except ValueError as exc:
+                messagebox.showwarning("提示", str(exc))
+            else:
+                message = f"已展示近 {snapshot.trading_days()} 天的自定义走势。"
+                if snapshot.stale:
+                    message = f"{message}（接口限流，数据来自 {snapshot.fetched_at:%Y-%m-%d %H:%M} 的缓存）"
+                self.status_var.set(message)
+
+        def on_error(exc: BaseException) -> None:
+            from app.services.providers import ProviderError
+
+            if not isinstance(exc, (ProviderError, ValueError)):
+                raise exc
+            self.status_var.set("查询失败。")
             messagebox.showerror("查询失败", str(exc))
-            return
 
-        try:
-            render_rates(snapshot, title="自定义数据走势")
-        except RuntimeError as exc:
-            messagebox.showinfo("提示", str(exc))
-        except ValueError as exc:
-            messagebox.showwarning("提示", str(exc))
-        else:
-            self.status_var.set(f"已展示近 {snapshot.trading_days()} 天的自定义走势。")
+        self._start_task("正在查询自定义区间…", self.query_btn, work, on_success, on_error)
 
     def _show_base_snapshot(self) -> None:
         if not self._base_snapshot:
@@ -282,9 +414,9 @@ class RatesApp(tk.Tk):
             return
 
         try:
-            render_rates(self._base_snapshot, title="基础数据走势")
-        except RuntimeError as exc:
-            messagebox.showinfo("提示", str(exc))
+            self.chart_host.show(self._base_snapshot, title="基础数据走势", key="base", overlays=self.chart_overlays)
+        except (OSError, RuntimeError) as exc:
+            messagebox.showinfo("提示", f"图表窗口无法打开：{exc}")
         except ValueError as exc:
             messagebox.showwarning("提示", str(exc))
         else:
@@ -334,10 +466,101 @@ class RatesApp(tk.Tk):
 
         status_text = status_message or self._snapshot_status_text(snapshot)
         self.status_var.set(status_text)
+        # 基础走势窗口仍打开时直接推送增量，无需重新打开。
+        try:
+            self.chart_host.update("base", snapshot)
+        except OSError:
+            pass
+
+    # endregion
+
+    # region Tasks
+    def _start_task(
+        self,
+        message: str,
+        button: ttk.Button,
+        work: Callable[[TaskHandle], Any],
+        on_success: Callable[[Any], None],
+        on_error: Callable[[BaseException], None],
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> None:
+        button.state(["disabled"])
+        self.cancel_btn.state(["!disabled"])
+        self.status_var.set(message)
+
+        def on_finally() -> None:
+            button.state(["!disabled"])
+            if not self.worker.busy:
+                self.cancel_btn.state(["disabled"])
+            if on_done is not None:
+                on_done()
+
+        self.worker.submit(
+            message,
+            work,
+            on_success=on_success,
+            on_error=on_error,
+            on_progress=self.status_var.set,
+            on_finally=on_finally,
+        )
+
+    def _cancel_tasks(self) -> None:
+        if not self.worker.busy:
+            return
+        self.worker.cancel_all()
+        self.status_var.set("已取消进行中的请求，尚未写入的数据不会保存。")
+
+    def _poll_chart_host(self) -> None:
+        for event in self.chart_host.poll():
+            if event[0] == "error":
+                self.status_var.set(f"图表窗口出错：{event[2]}")
+        self.after(CHART_POLL_INTERVAL_MS, self._poll_chart_host)
 
+    def _show_trace_panel(self) -> None:
+        from app.ui.debug_panel import TracePanel
+
+        if self._trace_panel is not None and self._trace_panel.winfo_exists():
+            self._trace_panel.lift()
+            return
+        self._trace_panel = TracePanel(self)
+
+    def _on_close(self) -> None:
+        self.auto_refresh.stop()
+        self.worker.shutdown()
+        self.chart_host.shutdown()
+        self.destroy()
     # endregion
 
     # region Helpers
+    def _check_providers(self, api_key: str, quiet: bool = False) -> bool:
+        """确认至少有一个数据源凭证齐全；界面输入的 API Key 之外，也可在 .env 中配置 NowAPI。"""
+        from app.services.providers import configured_providers, load_credentials
+
+        try:
+            ready = bool(configured_providers(load_credentials(ALPHAVANTAGE_API_KEY=api_key)))
+        except ValueError as exc:
+            if not quiet:
+                messagebox.showerror("错误", str(exc))
+            return False
+        if not ready and not quiet:
+            messagebox.showerror("错误", "请先输入 API Key！")
+        return ready
+
+    def _create_client(self, api_key: str, task: TaskHandle) -> ProviderChain:
+        """在工作线程中调用：按 RATE_PROVIDERS 组合数据源，排队等待额度时把预计等待时间推送到状态栏。"""
+        from app.services.providers import create_provider_chain, load_credentials
+
+        def on_wait(seconds: float) -> None:
+            task.report(f"请求排队中，预计等待 {seconds:.0f} 秒（今日剩余 {self.rate_limiter.remaining_today()} 次）…")
+
+        return create_provider_chain(
+            load_credentials(ALPHAVANTAGE_API_KEY=api_key),
+            cache=self.response_cache,
+            limiter=self.rate_limiter,
+            on_wait=on_wait,
+            cancel=task.cancel_event,
+        )
+
     @staticmethod
     def _snapshot_status_text(snapshot: RatesSnapshot, prefix: str = "本地基础数据") -> str:
         formatted = snapshot.fetched_at.strftime("%Y-%m-%d %H:%M:%S")
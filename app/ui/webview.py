@@ -1,18 +1,37 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import math
+import time
+from array import array
+from collections import OrderedDict
 from importlib import resources
 from string import Template
 from threading import Lock
-from typing import Optional, Tuple
-
-import webview
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Optional, Sequence, Tuple
 
 from app.models.rate import RatesSnapshot
+from app.services.downsample import downsample_chart_payload, point_budget_for_width
+from app.services.indicators import PRICE_INDICATORS, IndicatorResult, IndicatorSpec, compute_indicator
+from app.services.rollups import DAILY, RESOLUTION_LABELS, bar_budget_for_width, select_view
+from app.services.tracing import span, traced
+
+if TYPE_CHECKING:
+    from app.services.rollups import RollupSet
 
 _TEMPLATE_CACHE: Optional[Template] = None
 _TEMPLATE_LOCK = Lock()
-_WINDOW_OPEN = False
+_ECHARTS_JS: Optional[str] = None
+
+# 随包分发的 ECharts 版本及其 SHA-256，图表打开时不再依赖 CDN。
+ECHARTS_VERSION = "5.4.3"
+ECHARTS_SHA256 = "1156429a16a38cb8604dcc6518c19406d4226142d908f8edd2e3531443c54d19"
+
+DEFAULT_CHART_WIDTH = 1100
+DEFAULT_CHART_HEIGHT = 720
+# 原始数据点超过该数量时关闭平滑与动画，并启用渐进渲染。
+LARGE_DATASET_POINTS = 2000
 
 
 def _load_template() -> Template:
@@ -27,12 +46,32 @@ def _load_template() -> Template:
     return _TEMPLATE_CACHE
 
 
-def _calculate_axis_bounds(values: list[float], pad_ratio: float = 0.08, keep_zero_floor: bool = False) -> Tuple[Optional[float], Optional[float]]:
-    if not values:
+def _load_echarts_js() -> str:
+    """读取内置的 echarts.min.js 并校验完整性，结果在进程内缓存。"""
+    global _ECHARTS_JS
+    if _ECHARTS_JS is not None:
+        return _ECHARTS_JS
+
+    with _TEMPLATE_LOCK:
+        if _ECHARTS_JS is None:
+            raw = resources.files("app.ui.templates").joinpath("echarts.min.js").read_bytes()
+            if hashlib.sha256(raw).hexdigest() != ECHARTS_SHA256:
+                raise RuntimeError("内置的 ECharts 资源校验失败，请重新安装应用。")
+            _ECHARTS_JS = raw.decode("utf-8")
+    return _ECHARTS_JS
+
+
+def _calculate_axis_bounds(
+    columns: Sequence[Sequence[float]],
+    pad_ratio: float = 0.08,
+    keep_zero_floor: bool = False,
+) -> Tuple[Optional[float], Optional[float]]:
+    non_empty = [column for column in columns if len(column)]
+    if not non_empty:
         return None, None
 
-    minimum = min(values)
-    maximum = max(values)
+    minimum = min(min(column) for column in non_empty)
+    maximum = max(max(column) for column in non_empty)
 
     if minimum == maximum:
         padding = abs(minimum) * 0.05 or 0.01
@@ -48,23 +87,102 @@ def _calculate_axis_bounds(values: list[float], pad_ratio: float = 0.08, keep_ze
     return round(lower, 4), round(upper, 4)
 
 
-def _build_option(snapshot: RatesSnapshot) -> dict:
+def _copy_column(values: Sequence[float]) -> array:
+    copied = array("d")
+    copied.frombytes(memoryview(values).cast("B"))
+    return copied
+
+
+def _finite(values: Sequence[float]) -> list:
+    return [value for value in values if not math.isnan(value)]
+
+
+def _series_data(values: Sequence[float]) -> list:
+    # NaN 不是合法 JSON，ECharts 以 null 表示缺失点。
+    return [None if math.isnan(value) else round(value, 6) for value in values]
+
+
+def _overlay_series(
+    results: Sequence[IndicatorResult],
+    indicator_axis: int,
+    indices: Optional[Sequence[int]] = None,
+    resolution: str = DAILY,
+) -> list:
+    series = []
+    for result in results:
+        on_price_axis = result.spec.name in PRICE_INDICATORS
+        # 指标按展示的 K 线计算，聚合周期下参数的单位随之变为周、月等，名称中注明周期。
+        label = result.spec.label if resolution == DAILY else f"{result.spec.label} · {RESOLUTION_LABELS[resolution]}"
+        for output, values in result.series.items():
+            if indices is not None:
+                values = [values[index] for index in indices]
+            name = label if output == "value" else f"{label} {output}"
+            series.append(
+                {
+                    "name": name,
+                    "type": "line",
+                    "yAxisIndex": 0 if on_price_axis else indicator_axis,
+                    "smooth": False,
+                    "showSymbol": False,
+                    "connectNulls": False,
+                    "lineStyle": {"width": 1.5, "type": "solid" if output in {"value", "mid"} else "dotted"},
+                    "data": _series_data(values),
+                }
+            )
+    return series
+
+
+def _large_series_options() -> dict:
+    return {
+        "smooth": False,
+        "showSymbol": False,
+        "sampling": "lttb",
+        "progressive": 1000,
+        "progressiveThreshold": LARGE_DATASET_POINTS,
+    }
+
+
+@traced("chart.build_option")
+def _build_option(
+    snapshot: RatesSnapshot,
+    overlays: Sequence[IndicatorSpec] = (),
+    point_budget: Optional[int] = None,
+    resolution: str = DAILY,
+) -> dict:
+    """构建 ECharts option；``point_budget`` 给定时按 LTTB 将各序列降采样到该点数以内。
+
+    ``resolution`` 为 ``snapshot`` 的 K 线周期，非日线时指标序列名称带上周期。
+    """
     data = snapshot.to_chart_payload()
+    large = len(data["dates"]) > LARGE_DATASET_POINTS
+    indices: Optional[Sequence[int]] = None
+    if point_budget is not None and len(data["dates"]) > point_budget:
+        data, indices = downsample_chart_payload(data, point_budget)
+    # to_chart_payload 直接引用快照的列，upsert 就地追加后会改变已缓存的 option，这里复制一份。
+    data = {name: list(values) if name == "dates" else _copy_column(values) for name, values in data.items()}
+    overlay_results = [compute_indicator(snapshot, spec) for spec in overlays]
+    price_overlays = [
+        _finite(values)
+        for result in overlay_results
+        if result.spec.name in PRICE_INDICATORS
+        for values in result.series.values()
+    ]
     price_min, price_max = _calculate_axis_bounds(
-        data["open"] + data["close"] + data["high"] + data["low"],
+        (data["open"], data["close"], data["high"], data["low"], *price_overlays),
         pad_ratio=0.06,
     )
     amplitude_min, amplitude_max = _calculate_axis_bounds(
-        data["amplitude"],
+        (data["amplitude"],),
         pad_ratio=0.1,
         keep_zero_floor=True,
     )
     color_palette = ["#2563eb", "#0ea5e9", "#f97316", "#a855f7", "#ef4444"]
     base_text_style = {"fontFamily": "'Inter', 'Helvetica Neue', 'PingFang SC', sans-serif"}
-    return {
+    option = {
         "backgroundColor": "transparent",
         "color": color_palette,
         "textStyle": base_text_style,
+        "animation": not large,
         "animationDuration": 900,
         "tooltip": {
             "trigger": "axis",
@@ -194,33 +312,349 @@ def _build_option(snapshot: RatesSnapshot) -> dict:
         ],
     }
 
+    if overlay_results:
+        indicator_axis = 1
+        if any(result.spec.name not in PRICE_INDICATORS for result in overlay_results):
+            option["yAxis"].append(
+                {
+                    "type": "value",
+                    "name": "指标",
+                    "position": "right",
+                    "offset": 56,
+                    "scale": True,
+                    "axisLine": {"show": True, "lineStyle": {"color": "#a855f7"}},
+                    "axisLabel": {"color": "#475569"},
+                    "splitLine": {"show": False},
+                }
+            )
+            indicator_axis = len(option["yAxis"]) - 1
+        extra = _overlay_series(overlay_results, indicator_axis, indices, resolution)
+        option["series"].extend(extra)
+        option["legend"]["data"].extend(item["name"] for item in extra)
 
-def render_rates(snapshot: RatesSnapshot, title: str = "汇率走势", theme: str = "light") -> None:
-    global _WINDOW_OPEN
+    if large:
+        for series in option["series"]:
+            series.update(_large_series_options())
+    return option
 
-    if snapshot.is_empty():
-        raise ValueError("没有可视化的数据。")
 
-    if _WINDOW_OPEN:
-        raise RuntimeError("图表窗口已打开，请先关闭后再试。")
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (array, memoryview)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dump_option(option: dict) -> str:
+    return json.dumps(option, ensure_ascii=False, default=_json_default)
+
 
-    option = _build_option(snapshot)
-    template = _load_template()
-    html_content = template.substitute(
+@traced("chart.render_html")
+def render_html(option_json: str, title: str, theme: str = "light") -> str:
+    """把已序列化的 option 填入页面模板（内联 ECharts 资源）。"""
+    return _load_template().substitute(
         title=title,
         theme=theme,
-        option_json=json.dumps(option, ensure_ascii=False),
+        echarts_js=_load_echarts_js(),
+        option_json=option_json,
     )
 
-    window = webview.create_window(title, html=html_content)
+
+class ChartRenderCache:
+    """按 (快照指纹, 指标, 点数预算, 周期) 缓存构建好的 option 及渲染后的 HTML。
+
+    同一份数据重复打开图表时无需再次计算坐标轴、序列化 JSON 与替换模板。
+    缓存的 option 由多个调用方共享，应视为只读。
+    """
+
+    def __init__(self, max_options: int = 8, max_html: int = 4) -> None:
+        self._options: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._json: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._html: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._max_options = max_options
+        self._max_html = max_html
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def option(
+        self,
+        snapshot: RatesSnapshot,
+        overlays: Sequence[IndicatorSpec] = (),
+        point_budget: Optional[int] = None,
+        resolution: str = DAILY,
+    ) -> dict:
+        key = (snapshot.fingerprint(), tuple(overlays), point_budget, resolution)
+        cached = self._get(self._options, key)
+        if cached is not None:
+            return cached
+        option = _build_option(snapshot, overlays, point_budget=point_budget, resolution=resolution)
+        self._put(self._options, key, option, self._max_options)
+        return option
+
+    def option_json(
+        self,
+        snapshot: RatesSnapshot,
+        overlays: Sequence[IndicatorSpec] = (),
+        point_budget: Optional[int] = None,
+        resolution: str = DAILY,
+    ) -> str:
+        key = (snapshot.fingerprint(), tuple(overlays), point_budget, resolution)
+        cached = self._get(self._json, key)
+        if cached is not None:
+            return cached
+        option_json = _dump_option(self.option(snapshot, overlays, point_budget, resolution))
+        self._put(self._json, key, option_json, self._max_options)
+        return option_json
+
+    def html(
+        self,
+        snapshot: RatesSnapshot,
+        title: str,
+        theme: str,
+        overlays: Sequence[IndicatorSpec] = (),
+        point_budget: Optional[int] = None,
+        resolution: str = DAILY,
+    ) -> str:
+        key = (snapshot.fingerprint(), tuple(overlays), point_budget, resolution, title, theme)
+        cached = self._get(self._html, key)
+        if cached is not None:
+            return cached
+        html_content = render_html(self.option_json(snapshot, overlays, point_budget, resolution), title, theme)
+        self._put(self._html, key, html_content, self._max_html)
+        return html_content
+
+    def clear(self) -> None:
+        with self._lock:
+            self._options.clear()
+            self._json.clear()
+            self._html.clear()
+
+    def _get(self, store: "OrderedDict[Hashable, Any]", key: Hashable) -> Any:
+        with self._lock:
+            cached = store.get(key)
+            if cached is None:
+                self.misses += 1
+                return None
+            store.move_to_end(key)
+            self.hits += 1
+            return cached
+
+    def _put(self, store: "OrderedDict[Hashable, Any]", key: Hashable, value: Any, limit: int) -> None:
+        with self._lock:
+            store[key] = value
+            store.move_to_end(key)
+            while len(store) > limit:
+                store.popitem(last=False)
+
+
+_RENDER_CACHE = ChartRenderCache()
+
+
+def chart_view(
+    snapshot: RatesSnapshot,
+    title: str,
+    resolution: str = "auto",
+    bar_budget: Optional[int] = None,
+    rollups: Optional[RollupSet] = None,
+) -> Tuple[RatesSnapshot, str, str]:
+    """按周期选择实际展示的快照（见 ``select_view``），返回该快照、带周期后缀的窗口标题及所选周期。"""
+    view, chosen = select_view(snapshot, resolution, bar_budget, rollups)
+    if chosen != DAILY:
+        title = f"{title} · {RESOLUTION_LABELS[chosen]}"
+    return view, title, chosen
+
+
+class LiveChart:
+    """长期存在的图表窗口。
+
+    首次打开后不再重建页面：新增日线以增量方式追加，其余变化（区间、指标、标题、
+    降采样结果、周期）整体替换 option，均经由 ``evaluate_js`` 推送给页面内的 ``window.fxChart``。
+    ``update`` 可在任意线程调用，传入的始终是日线，展示周期按 ``resolution`` 重新选择。
+    构造时的 ``view`` / ``display_title`` / ``view_resolution`` 为 ``chart_view`` 的结果，即窗口当前展示的内容。
+    """
+
+    def __init__(
+        self,
+        key: str,
+        window: Any,
+        view: RatesSnapshot,
+        title: str,
+        overlays: Sequence[IndicatorSpec] = (),
+        point_budget: Optional[int] = None,
+        resolution: str = "auto",
+        bar_budget: Optional[int] = None,
+        rollups: Optional[RollupSet] = None,
+        display_title: Optional[str] = None,
+        view_resolution: str = DAILY,
+    ) -> None:
+        self.key = key
+        self.window = window
+        self.title = title
+        self.display_title = display_title or title
+        self.view_resolution = view_resolution
+        self.overlays = tuple(overlays)
+        self.point_budget = point_budget
+        self.resolution = resolution
+        self.bar_budget = bar_budget
+        self.rollups = rollups
+        # 最近一次推送从调用到页面完成 setOption 的耗时（毫秒）。
+        self.last_update_ms: Optional[float] = None
+        self._lock = Lock()
+        self._remember(view)
+
+    def update(
+        self,
+        snapshot: RatesSnapshot,
+        title: Optional[str] = None,
+        overlays: Optional[Sequence[IndicatorSpec]] = None,
+    ) -> str:
+        """推送新数据，返回 ``"unchanged"``、``"append"`` 或 ``"replace"``。"""
+        if snapshot.is_empty():
+            raise ValueError("没有可视化的数据。")
+
+        with self._lock, span("chart.live_update", key=self.key) as current:
+            title = title or self.title
+            overlays = self.overlays if overlays is None else tuple(overlays)
+            view, display_title, chosen = chart_view(snapshot, title, self.resolution, self.bar_budget, self.rollups)
+            kind, script = self._plan(view, display_title, overlays, chosen)
+            current.set(kind=kind)
+            if kind == "unchanged":
+                return kind
+
+            started = time.perf_counter()
+            if display_title != self.display_title:
+                self.window.set_title(display_title)
+            self.window.evaluate_js(script)
+            self.last_update_ms = (time.perf_counter() - started) * 1000
+
+            self.title = title
+            self.display_title = display_title
+            self.view_resolution = chosen
+            self.overlays = overlays
+            self._remember(view)
+            return kind
+
+    def _remember(self, snapshot: RatesSnapshot) -> None:
+        self._rows = snapshot.trading_days()
+        self._fingerprint = snapshot.fingerprint()
+
+    def _appendable(self, rows: int) -> bool:
+        # 已降采样的数据追加后分桶会整体变化；跨越大数据量阈值时序列样式也会变化。
+        if self.point_budget is not None and rows > self.point_budget:
+            return False
+        return (self._rows > LARGE_DATASET_POINTS) == (rows > LARGE_DATASET_POINTS)
+
+    def _plan(
+        self,
+        snapshot: RatesSnapshot,
+        title: str,
+        overlays: Tuple[IndicatorSpec, ...],
+        resolution: str = DAILY,
+    ) -> Tuple[str, str]:
+        same_view = title == self.display_title and overlays == self.overlays and resolution == self.view_resolution
+        if same_view and snapshot.fingerprint() == self._fingerprint:
+            return "unchanged", ""
+
+        option = _RENDER_CACHE.option(snapshot, overlays, self.point_budget, resolution)
+        rows = snapshot.trading_days()
+        if (
+            same_view
+            and self._rows < rows
+            and self._appendable(rows)
+            and snapshot.fingerprint(self._rows) == self._fingerprint
+        ):
+            start = self._rows
+            delta = {
+                "dates": option["xAxis"]["data"][start:],
+                "series": [series["data"][start:] for series in option["series"]],
+                "yAxis": [
+                    {bound: axis[bound] for bound in ("min", "max") if bound in axis}
+                    for axis in option["yAxis"]
+                ],
+            }
+            return "append", f"window.fxChart.append({_dump_option(delta)})"
+
+        option_json = _RENDER_CACHE.option_json(snapshot, overlays, self.point_budget, resolution)
+        return "replace", f"window.fxChart.replace({option_json}, {json.dumps(title, ensure_ascii=False)})"
+
+
+_LIVE_CHARTS: Dict[str, LiveChart] = {}
+_LIVE_LOCK = Lock()
+_LOOP_RUNNING = False
+
+
+def live_chart(key: str) -> Optional[LiveChart]:
+    with _LIVE_LOCK:
+        return _LIVE_CHARTS.get(key)
+
+
+def update_live_chart(
+    key: str,
+    snapshot: RatesSnapshot,
+    title: Optional[str] = None,
+    overlays: Optional[Sequence[IndicatorSpec]] = None,
+) -> bool:
+    """若 ``key`` 对应的图表窗口仍打开，则把新数据推送过去并返回 True。"""
+    chart = live_chart(key)
+    if chart is None or snapshot.is_empty():
+        return False
+    chart.update(snapshot, title=title, overlays=overlays)
+    return True
+
+
+def render_rates(
+    snapshot: RatesSnapshot,
+    title: str = "汇率走势",
+    theme: str = "light",
+    overlays: Sequence[IndicatorSpec] = (),
+    width: int = DEFAULT_CHART_WIDTH,
+    height: int = DEFAULT_CHART_HEIGHT,
+    key: str = "default",
+    resolution: str = "auto",
+    rollups: Optional[RollupSet] = None,
+) -> None:
+    """在 ``key`` 对应的窗口中展示快照。
+
+    窗口已打开时直接推送增量并返回；否则创建窗口，若 GUI 事件循环尚未运行则在此阻塞至所有窗口关闭。
+    ``resolution`` 默认按窗口宽度自动选择日线或周线、月线等聚合周期；``rollups`` 为同一份日线已缓存的聚合结果。
+    """
+    global _LOOP_RUNNING
+
+    if snapshot.is_empty():
+        raise ValueError("没有可视化的数据。")
+
+    if update_live_chart(key, snapshot, title=title, overlays=overlays):
+        return
+
+    # GUI 后端较重，直到真正需要打开窗口时才导入。
+    import webview
+
+    # 只计入窗口创建前的准备工作，webview.start 会阻塞到窗口关闭。
+    with span("chart.render_rates", key=key, rows=snapshot.trading_days()):
+        point_budget = point_budget_for_width(width)
+        bar_budget = bar_budget_for_width(width)
+        view, display_title, chosen = chart_view(snapshot, title, resolution, bar_budget, rollups)
+        html_content = _RENDER_CACHE.html(view, display_title, theme, overlays, point_budget=point_budget, resolution=chosen)
+        window = webview.create_window(display_title, html=html_content, width=width, height=height)
+        chart = LiveChart(
+            key, window, view, title, overlays, point_budget, resolution, bar_budget, rollups, display_title, chosen
+        )
 
     def on_closed() -> None:
-        global _WINDOW_OPEN
-        _WINDOW_OPEN = False
+        with _LIVE_LOCK:
+            if _LIVE_CHARTS.get(key) is chart:
+                del _LIVE_CHARTS[key]
 
     window.events.closed += on_closed
-    _WINDOW_OPEN = True
+    with _LIVE_LOCK:
+        _LIVE_CHARTS[key] = chart
+        if _LOOP_RUNNING:
+            return
+        _LOOP_RUNNING = True
+
     try:
         webview.start()
     finally:
-        _WINDOW_OPEN = False
+        with _LIVE_LOCK:
+            _LOOP_RUNNING = False
+            _LIVE_CHARTS.clear()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import itertools
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Event
+from typing import Any, Callable, Dict, Optional
+
+
+class TaskCancelled(Exception):
+    """任务在完成前被取消。"""
+
+
+@dataclass
+class TaskHandle:
+    """后台任务句柄：工作线程通过 ``report`` 上报进度，主线程可随时 ``cancel``。"""
+
+    task_id: int
+    name: str
+    _outbox: "queue.Queue[tuple]" = field(repr=False)
+    _cancelled: Event = field(default_factory=Event, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def cancel_event(self) -> Event:
+        """供阻塞等待的下层调用（如额度排队）感知取消。"""
+        return self._cancelled
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def check_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise TaskCancelled(self.name)
+
+    def report(self, message: str) -> None:
+        """线程安全地推送进度文本，由主线程在下一次轮询时交给 ``on_progress``。"""
+        if not self._cancelled.is_set():
+            self._outbox.put(("progress", self.task_id, message))
+
+
+@dataclass
+class _Callbacks:
+    on_success: Callable[[Any], None]
+    on_error: Callable[[BaseException], None]
+    on_progress: Optional[Callable[[str], None]] = None
+    on_finally: Optional[Callable[[], None]] = None
+
+
+class BackgroundWorker:
+    """在线程池中执行耗时任务，结果经线程安全队列回传并由 Tk 的 ``after`` 在主线程分发。"""
+
+    def __init__(self, root: tk.Misc, max_workers: int = 2, poll_interval_ms: int = 50) -> None:
+        self._root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rates-worker")
+        self._outbox: "queue.Queue[tuple]" = queue.Queue()
+        self._poll_interval_ms = poll_interval_ms
+        self._ids = itertools.count(1)
+        self._tasks: Dict[int, TaskHandle] = {}
+        self._callbacks: Dict[int, _Callbacks] = {}
+        self._poll_job: Optional[str] = None
+        self._closed = False
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._tasks)
+
+    def submit(
+        self,
+        name: str,
+        fn: Callable[[TaskHandle], Any],
+        on_success: Callable[[Any], None],
+        on_error: Callable[[BaseException], None],
+        on_progress: Optional[Callable[[str], None]] = None,
+        on_finally: Optional[Callable[[], None]] = None,
+    ) -> TaskHandle:
+        """提交任务；``fn`` 在工作线程中以任务句柄为参数执行，回调均在 Tk 主线程调用。"""
+        if self._closed:
+            raise RuntimeError("后台任务已停止。")
+
+        handle = TaskHandle(task_id=next(self._ids), name=name, _outbox=self._outbox)
+        self._tasks[handle.task_id] = handle
+        self._callbacks[handle.task_id] = _Callbacks(on_success, on_error, on_progress, on_finally)
+        self._executor.submit(self._run, handle, fn)
+        self._schedule_poll()
+        return handle
+
+    def cancel(self, handle: TaskHandle) -> None:
+        """标记取消并立即在主线程收尾；工作线程稍后返回的结果将被丢弃。"""
+        handle.cancel()
+        callbacks = self._callbacks.pop(handle.task_id, None)
+        self._tasks.pop(handle.task_id, None)
+        if callbacks is not None and callbacks.on_finally is not None:
+            callbacks.on_finally()
+
+    def cancel_all(self) -> None:
+        for handle in list(self._tasks.values()):
+            self.cancel(handle)
+
+    def shutdown(self) -> None:
+        self._closed = True
+        for handle in list(self._tasks.values()):
+            handle.cancel()
+        self._tasks.clear()
+        self._callbacks.clear()
+        if self._poll_job is not None:
+            try:
+                self._root.after_cancel(self._poll_job)
+            except tk.TclError:
+                pass
+            self._poll_job = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, handle: TaskHandle, fn: Callable[[TaskHandle], Any]) -> None:
+        try:
+            handle.check_cancelled()
+            result = fn(handle)
+            handle.check_cancelled()
+        except BaseException as exc:  # noqa: BLE001 - 异常需原样交还主线程处理
+            self._outbox.put(("error", handle.task_id, exc))
+        else:
+            self._outbox.put(("success", handle.task_id, result))
+
+    def _schedule_poll(self) -> None:
+        if self._poll_job is None and not self._closed:
+            self._poll_job = self._root.after(self._poll_interval_ms, self._poll)
+
+    def _poll(self) -> None:
+        self._poll_job = None
+        while True:
+            try:
+                kind, task_id, payload = self._outbox.get_nowait()
+            except queue.Empty:
+                break
+            self._dispatch(kind, task_id, payload)
+        if self._tasks:
+            self._schedule_poll()
+
+    def _dispatch(self, kind: str, task_id: int, payload: Any) -> None:
+        handle = self._tasks.get(task_id)
+        callbacks = self._callbacks.get(task_id)
+        if handle is None or callbacks is None:
+            return
+
+        if kind == "progress":
+            if callbacks.on_progress is not None and not handle.cancelled:
+                callbacks.on_progress(payload)
+            return
+
+        del self._tasks[task_id]
+        del self._callbacks[task_id]
+        try:
+            if handle.cancelled or isinstance(payload, TaskCancelled):
+                return
+            if kind == "success":
+                callbacks.on_success(payload)
+            else:
+                callbacks.on_error(payload)
+        finally:
+            if callbacks.on_finally is not None:
+                callbacks.on_finally()
@@ -0,0 +1,97 @@
+"""运行热点路径基准并与基线对比。
+
+    python -m benchmarks                      # 全部规模，与 benchmarks/baseline.json 对比
+    python -m benchmarks --sizes 1000 10000 --output results.json
+    python -m benchmarks --update-baseline    # 在当前机器上重新生成基线
+    python -m benchmarks --only range asof --update-baseline   # 新增用例后只补充或刷新这些条目
+
+存在回归或基线缺少某个用例时以状态码 1 退出。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+from benchmarks.datasets import SIZES
+from benchmarks.suite import BenchmarkResult, calibrate, compare, results_to_json, run_suite, wall_scale
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+
+def _print_progress(result: BenchmarkResult) -> None:
+    print(
+        f"{result.case:<28}{result.bars:>8} 条  {result.wall_ms:>10.2f} ms  "
+        f"峰值 {result.peak_kib:>10.1f} KiB  内存块 {result.allocated_blocks:>8}",
+        file=sys.stderr,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="运行汇率数据热点路径基准。")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="数据规模（日线条数）")
+    parser.add_argument("--repeat", type=int, help="每个用例的计时次数，默认按规模自动选择")
+    parser.add_argument("--only", nargs="+", help="只运行指定名称的用例")
+    parser.add_argument("--output", type=Path, help="把结果写入 JSON 文件（默认输出到标准输出）")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="对比用的基线文件")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的相对增幅，默认 25%%")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果更新基线中对应的条目")
+    args = parser.parse_args(argv)
+
+    # 前后各校准一次取较小值，减少套件运行期间负载波动的影响。
+    calibration_ms = calibrate()
+    results = run_suite(args.sizes, repeat=args.repeat, only=args.only, progress=_print_progress)
+    calibration_ms = min(calibration_ms, calibrate())
+    meta = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "calibration_ms": calibration_ms,
+    }
+    report = results_to_json(results, meta)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.update_baseline:
+        # 只替换本次运行的条目，配合 --only / --sizes 使用时其余基线保持不变。
+        merged = report
+        if args.baseline.exists():
+            merged = json.loads(args.baseline.read_text(encoding="utf-8"))
+            scale = wall_scale(merged, report)
+            if scale is None:
+                merged["meta"] = report["meta"]
+            else:
+                # 其余条目沿用原校准值，本次条目的墙钟时间先换算到原校准值对应的速度。
+                for entry in report["results"].values():
+                    entry["wall_ms"] *= scale
+                    entry["wall_min_ms"] *= scale
+            merged.setdefault("results", {}).update(report["results"])
+        args.baseline.write_text(json.dumps(merged, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"已更新基线：{args.baseline}", file=sys.stderr)
+        return 0
+
+    if not args.baseline.exists():
+        print(f"未找到基线 {args.baseline}，跳过对比。", file=sys.stderr)
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if wall_scale(report, baseline) is None:
+        print("基线未记录校准耗时，跳过墙钟时间对比，只比较峰值内存；可用 --update-baseline 重新生成。", file=sys.stderr)
+    regressions = compare(report, baseline, tolerance=args.tolerance)
+    for regression in regressions:
+        print(f"回归：{regression.describe()}", file=sys.stderr)
+    if regressions:
+        return 1
+    print("未发现性能回归。", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
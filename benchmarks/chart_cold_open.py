@@ -0,0 +1,126 @@
+"""图表冷启动耗时基准。
+
+在全新的子进程中计时“导入图表模块 → 读取并校验内置 ECharts → 生成 HTML”，
+并与旧版从 CDN 下载 echarts.min.js 的耗时对比；``--gui`` 时额外打开真实窗口，
+计时到页面 ``loaded`` 事件（此时内联脚本已执行完毕）。
+
+    python -m benchmarks.chart_cold_open --runs 5 --gui
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+CDN_URL = "https://cdn.bootcdn.net/ajax/libs/echarts/5.4.3/echarts.min.js"
+
+
+def _child(days: int) -> Dict[str, float]:
+    started = time.perf_counter()
+    from app.ui import webview as chart
+
+    imported = time.perf_counter()
+    from benchmarks.datasets import synthetic_snapshot
+
+    snapshot = synthetic_snapshot(days)
+    prepared = time.perf_counter()
+    chart._load_echarts_js()
+    asset_loaded = time.perf_counter()
+    html = chart._RENDER_CACHE.html(snapshot, "冷启动", "light", point_budget=chart.point_budget_for_width(1100))
+    finished = time.perf_counter()
+    # 合成数据的耗时不计入结果。
+    timings = {
+        "import_ms": (imported - started) * 1000,
+        "asset_ms": (asset_loaded - prepared) * 1000,
+        "html_ms": (finished - asset_loaded) * 1000,
+    }
+    return {**timings, "total_ms": sum(timings.values()), "html_bytes": len(html.encode("utf-8"))}
+
+
+def _cold_runs(runs: int, days: int) -> List[Dict[str, float]]:
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.chart_cold_open", "--child", "--days", str(days)],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output))
+    return results
+
+
+def _cdn_fetch_ms(timeout: float) -> Optional[float]:
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(CDN_URL, timeout=timeout) as response:
+            response.read()
+    except OSError:
+        return None
+    return (time.perf_counter() - started) * 1000
+
+
+def _window_loaded_ms(html: str) -> float:
+    import webview
+
+    result: Dict[str, float] = {}
+    started = time.perf_counter()
+    window = webview.create_window("冷启动基准", html=html)
+
+    def on_loaded() -> None:
+        result["ms"] = (time.perf_counter() - started) * 1000
+        window.destroy()
+
+    window.events.loaded += on_loaded
+    webview.start()
+    return result.get("ms", float("nan"))
+
+
+def _summary(values: Sequence[float]) -> Dict[str, float]:
+    return {"median": statistics.median(values), "min": min(values), "max": max(values)}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="测量图表窗口的冷启动耗时。")
+    parser.add_argument("--runs", type=int, default=5, help="冷启动子进程次数")
+    parser.add_argument("--days", type=int, default=5000, help="合成数据的交易日数量")
+    parser.add_argument("--gui", action="store_true", help="打开真实窗口，计时到页面加载完成")
+    parser.add_argument("--cdn-timeout", type=float, default=10.0, help="对比 CDN 下载时的超时秒数")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_child(args.days)))
+        return 0
+
+    samples = _cold_runs(max(args.runs, 1), args.days)
+    report: Dict[str, object] = {
+        "runs": len(samples),
+        "days": args.days,
+        "html_bytes": samples[0]["html_bytes"],
+        **{key: _summary([sample[key] for sample in samples]) for key in ("import_ms", "asset_ms", "html_ms", "total_ms")},
+        "cdn_fetch_ms": _cdn_fetch_ms(args.cdn_timeout),
+    }
+
+    if args.gui:
+        from app.ui import webview as chart
+        from benchmarks.datasets import synthetic_snapshot
+
+        snapshot = synthetic_snapshot(args.days)
+        html = chart._RENDER_CACHE.html(snapshot, "冷启动", "light", point_budget=chart.point_budget_for_width(1100))
+        report["window_loaded_ms"] = _window_loaded_ms(html)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""确定性的合成汇率数据集。
+
+按交易日（跳过周末）生成随机游走的 OHLC 日线，同一 ``bars`` 与 ``seed`` 总是得到相同的数据，
+可分别输出 Alpha Vantage ``FX_DAILY`` 响应格式与本地存储格式（``RatesSnapshot.to_storage``）。
+"""
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+from typing import Any, Dict
+
+from app.models.rate import RatesSnapshot
+
+SIZES = (1_000, 10_000, 100_000)
+_FETCHED_AT = "2024-01-02T00:00:00Z"
+
+
+def _trading_days(bars: int, end: date = date(2024, 1, 1)):
+    # 从 end 往前倒推，保证不同规模的数据集都以同一天结束。
+    day = end
+    collected = []
+    while len(collected) < bars:
+        if day.weekday() < 5:
+            collected.append(day)
+        day -= timedelta(days=1)
+    return reversed(collected)
+
+
+def synthetic_api_payload(bars: int, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    price = 7.0
+    series: Dict[str, Dict[str, str]] = {}
+    for day in _trading_days(bars):
+        open_price = price
+        price = max(price * (1 + rng.gauss(0, 0.004)), 0.5)
+        high = max(open_price, price) * (1 + abs(rng.gauss(0, 0.002)))
+        low = min(open_price, price) * (1 - abs(rng.gauss(0, 0.002)))
+        series[day.isoformat()] = {
+            "1. open": f"{open_price:.4f}",
+            "2. high": f"{high:.4f}",
+            "3. low": f"{low:.4f}",
+            "4. close": f"{price:.4f}",
+        }
+    return {
+        "source": "benchmarks.synthetic",
+        "fetched_at": _FETCHED_AT,
+        "Meta Data": {
+            "1. Information": "Forex Daily Prices (open, high, low, close)",
+            "2. From Symbol": "USD",
+            "3. To Symbol": "CNY",
+            "4. Output Size": "Full size",
+        },
+        "Time Series FX (Daily)": series,
+    }
+
+
+def synthetic_snapshot(bars: int, seed: int = 7) -> RatesSnapshot:
+    return RatesSnapshot.from_api_response(synthetic_api_payload(bars, seed), bars)
+
+
+def synthetic_storage_payload(bars: int, seed: int = 7) -> Dict[str, Any]:
+    return synthetic_snapshot(bars, seed).to_storage()
@@ -0,0 +1,113 @@
+"""数据源故障转移与对冲请求的尾延迟对比（离线，基于 ``StubProvider``）。
+
+模拟首选数据源偶发长尾或被限流、备用数据源稳定但略慢的情形，
+分别以“仅故障转移”和“对冲请求”两种策略重复刷新，输出 p50 / p95 / p99。
+对冲策略的 p99 超出 ``--budget-ms`` 时以非零状态退出。
+
+    python -m benchmarks.providers --runs 200 --hedge-after-ms 40 --budget-ms 150
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from app.services.providers import ProviderChain, ProviderError, ProviderRateLimitError, StubProvider
+from benchmarks.datasets import synthetic_snapshot
+
+
+def _percentile(samples: Sequence[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _latency(rng: random.Random, fast_s: float, slow_s: float, slow_ratio: float) -> Callable[[], float]:
+    return lambda: slow_s if rng.random() < slow_ratio else fast_s * rng.uniform(0.8, 1.2)
+
+
+def run_scenario(
+    name: str,
+    providers: Sequence[StubProvider],
+    runs: int,
+    hedge_after: Optional[float],
+    deadline: Optional[float],
+) -> Dict[str, object]:
+    chain = ProviderChain(providers, hedge_after=hedge_after, deadline=deadline)
+    timings: List[float] = []
+    winners: Dict[str, int] = {}
+    failures = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        try:
+            chain.fetch_rates(30)
+        except ProviderError:
+            failures += 1
+        else:
+            winners[chain.last_provider or "?"] = winners.get(chain.last_provider or "?", 0) + 1
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "scenario": name,
+        "runs": runs,
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(_percentile(timings, 0.95), 2),
+        "p99_ms": round(_percentile(timings, 0.99), 2),
+        "max_ms": round(max(timings), 2),
+        "failures": failures,
+        "winners": winners,
+        "calls": {provider.name: provider.calls for provider in providers},
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="对比故障转移与对冲请求下的刷新尾延迟。")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--fast-ms", type=float, default=10.0, help="首选数据源的常规延迟")
+    parser.add_argument("--slow-ms", type=float, default=500.0, help="首选数据源长尾请求的延迟")
+    parser.add_argument("--slow-ratio", type=float, default=0.05, help="长尾请求占比")
+    parser.add_argument("--backup-ms", type=float, default=30.0, help="备用数据源的延迟")
+    parser.add_argument("--hedge-after-ms", type=float, default=40.0)
+    parser.add_argument("--deadline-ms", type=float, default=0.0, help="总时限，0 表示不限")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="对冲策略 p99 预算")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    snapshot = synthetic_snapshot(1000)
+    hedge_after = args.hedge_after_ms / 1000
+    deadline = args.deadline_ms / 1000 or None
+
+    def providers(primary_error: Optional[Exception] = None) -> List[StubProvider]:
+        rng = random.Random(args.seed)
+        return [
+            StubProvider(
+                snapshot,
+                name="primary",
+                latency=_latency(rng, args.fast_ms / 1000, args.slow_ms / 1000, args.slow_ratio),
+                error=primary_error,
+            ),
+            StubProvider(snapshot, name="backup", latency=args.backup_ms / 1000),
+        ]
+
+    limited = ProviderRateLimitError("模拟限流")
+    reports = [
+        run_scenario("slow_primary/failover", providers(), args.runs, None, deadline),
+        run_scenario("slow_primary/hedged", providers(), args.runs, hedge_after, deadline),
+        run_scenario("rate_limited_primary/failover", providers(limited), args.runs, None, deadline),
+        run_scenario("rate_limited_primary/hedged", providers(limited), args.runs, hedge_after, deadline),
+    ]
+
+    failures = [
+        f"{report['scenario']} p99 {report['p99_ms']} ms 超出预算 {args.budget_ms:.0f} ms"
+        for report in reports
+        if str(report["scenario"]).endswith("/hedged") and float(report["p99_ms"]) > args.budget_ms  # type: ignore[arg-type]
+    ]
+    print(json.dumps({"results": reports, "failures": failures}, ensure_ascii=False, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
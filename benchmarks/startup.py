@@ -0,0 +1,131 @@
+"""启动耗时回归检查。
+
+用 ``python -X importtime`` 在全新进程中导入 ``app.main``，统计累计导入耗时，
+并确认 GUI 后端、HTTP 客户端等重量级模块没有在首个窗口出现前被加载；
+``--window`` 时额外计时“导入 → 创建 RatesApp → 首帧绘制”（需要图形环境）。
+任一项超出预算时以非零状态退出，可直接接入 CI。
+
+    python -m benchmarks.startup --import-budget-ms 300 --window --window-budget-ms 800
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# 首个窗口出现前不应导入的模块：均应在首次使用时再加载。
+DEFERRED_MODULES = ("webview", "requests", "urllib3", "asyncio", "sqlite3", "multiprocessing")
+
+DEFAULT_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "300"))
+DEFAULT_WINDOW_BUDGET_MS = float(os.getenv("STARTUP_WINDOW_BUDGET_MS", "800"))
+
+# 首帧计时截止于 after_idle 排队的 ``_after_first_frame`` 开始执行之时：先刷新其后仍在排队的
+# 几何与重绘任务，再记录时间戳，图表进程预热与后台加载等延后工作不计入首帧耗时。
+_WINDOW_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from app.ui.tk_app import RatesApp
+marks = {}
+deferred = RatesApp._after_first_frame
+
+def _mark_first_frame(self):
+    self.update_idletasks()
+    marks.setdefault("first_frame", time.perf_counter())
+    deferred(self)
+
+RatesApp._after_first_frame = _mark_first_frame
+from app.main import create_app
+app = create_app()
+app.update()
+finished = time.perf_counter()
+app._on_close()
+first_frame = marks.get("first_frame", finished)
+print(json.dumps({"first_window_ms": (first_frame - started) * 1000, "deferred_ms": (finished - first_frame) * 1000}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """解析 ``-X importtime`` 输出，返回 (模块, 自身微秒, 累计微秒)。"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_imports(module: str = "app.main") -> Dict[str, object]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    rows = parse_importtime(result.stderr)
+    imported = {name for name, _, _ in rows}
+    total_us = next((cumulative for name, _, cumulative in rows if name == module), 0)
+    slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:10]
+    return {
+        "module": module,
+        "import_ms": total_us / 1000,
+        "deferred_violations": [name for name in DEFERRED_MODULES if name in imported],
+        "slowest_self_ms": {name: self_us / 1000 for name, self_us, _ in slowest},
+    }
+
+
+def measure_first_window() -> Dict[str, float]:
+    """在全新进程中创建窗口，返回首帧耗时 ``first_window_ms`` 与随后延后工作的耗时 ``deferred_ms``。"""
+    result = subprocess.run(
+        [sys.executable, "-c", _WINDOW_SCRIPT],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return {name: float(value) for name, value in timings.items()}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="检查应用的冷启动耗时是否超出预算。")
+    parser.add_argument("--import-budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS)
+    parser.add_argument("--window", action="store_true", help="同时计时首个窗口的绘制（需要图形环境）")
+    parser.add_argument("--window-budget-ms", type=float, default=DEFAULT_WINDOW_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="重复次数，取中位数")
+    args = parser.parse_args(argv)
+
+    runs = max(args.runs, 1)
+    samples = [measure_imports() for _ in range(runs)]
+    samples.sort(key=lambda sample: sample["import_ms"])
+    report: Dict[str, object] = dict(samples[runs // 2])
+    report["import_budget_ms"] = args.import_budget_ms
+
+    failures = []
+    if report["import_ms"] > args.import_budget_ms:
+        failures.append(f"导入耗时 {report['import_ms']:.1f} ms 超出预算 {args.import_budget_ms:.0f} ms")
+    if report["deferred_violations"]:
+        failures.append(f"启动时提前导入了：{', '.join(report['deferred_violations'])}")
+
+    if args.window:
+        windows = sorted((measure_first_window() for _ in range(runs)), key=lambda sample: sample["first_window_ms"])
+        report.update(windows[runs // 2])
+        window_ms = report["first_window_ms"]
+        report["window_budget_ms"] = args.window_budget_ms
+        if window_ms > args.window_budget_ms:
+            failures.append(f"首个窗口耗时 {window_ms:.1f} ms 超出预算 {args.window_budget_ms:.0f} ms")
+
+    report["failures"] = failures
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
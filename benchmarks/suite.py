@@ -0,0 +1,218 @@
+"""热点路径基准。
+
+每个用例在每个数据规模上先做一次预热，再计时 ``repeat`` 次取中位数；
+最后在 tracemalloc 下额外执行一次，记录峰值内存与调用结束后仍存活的内存块数
+（即该调用分配并保留下来的对象，含返回值）。计时轮次不开启 tracemalloc，避免干扰。
+"""
+from __future__ import annotations
+
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from app.models.rate import RatesSnapshot
+from app.repository.base_rates import JsonBaseRatesRepository
+from app.services.downsample import point_budget_for_width
+from app.services.rollups import RollupSet
+from app.ui.webview import DEFAULT_CHART_WIDTH, _build_option, _dump_option
+from benchmarks.datasets import SIZES, synthetic_api_payload
+
+# 每次计时前调用 setup 得到新的参数，避免快照内部缓存（日期标签、指纹）让后续轮次失真。
+Setup = Callable[[], Sequence[Any]]
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    name: str
+    setup: Setup
+    fn: Callable[..., Any]
+
+
+@dataclass
+class BenchmarkResult:
+    case: str
+    bars: int
+    repeat: int
+    wall_ms: float
+    wall_min_ms: float
+    peak_kib: float
+    allocated_blocks: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}@{self.bars}"
+
+
+def _fresh(snapshot: RatesSnapshot) -> RatesSnapshot:
+    return RatesSnapshot(snapshot.source, snapshot.fetched_at, columns=snapshot.columns)
+
+
+def build_cases(bars: int, workdir: Path) -> List[BenchmarkCase]:
+    api_payload = synthetic_api_payload(bars)
+    snapshot = RatesSnapshot.from_api_response(api_payload, bars)
+    storage_payload = snapshot.to_storage()
+    compact_payload = snapshot.to_compact()
+    middle = snapshot.columns.dates[bars // 2]
+    option = _build_option(snapshot, point_budget=point_budget_for_width(DEFAULT_CHART_WIDTH))
+    repository = JsonBaseRatesRepository(workdir / f"bench_{bars}.json")
+    repository.save_snapshot(snapshot)
+
+    return [
+        BenchmarkCase("from_api_response", lambda: (api_payload, bars), RatesSnapshot.from_api_response),
+        BenchmarkCase("from_storage", lambda: (storage_payload,), RatesSnapshot.from_storage),
+        BenchmarkCase("to_storage", lambda: (_fresh(snapshot),), RatesSnapshot.to_storage),
+        BenchmarkCase("from_compact", lambda: (compact_payload,), RatesSnapshot.from_compact),
+        BenchmarkCase("to_compact", lambda: (_fresh(snapshot),), RatesSnapshot.to_compact),
+        BenchmarkCase("repository.save_snapshot", lambda: (_fresh(snapshot),), repository.save_snapshot),
+        BenchmarkCase("repository.load_snapshot", lambda: (), repository.load_snapshot),
+        BenchmarkCase("rollups.build", lambda: (_fresh(snapshot),), RollupSet.build),
+        BenchmarkCase("range", lambda: (snapshot, middle, snapshot.columns.dates[-1]), RatesSnapshot.range),
+        BenchmarkCase("asof", lambda: (snapshot, middle), RatesSnapshot.asof),
+        BenchmarkCase("to_chart_payload", lambda: (_fresh(snapshot),), RatesSnapshot.to_chart_payload),
+        BenchmarkCase(
+            "build_option",
+            lambda: (_fresh(snapshot),),
+            lambda fresh: _build_option(fresh, point_budget=point_budget_for_width(DEFAULT_CHART_WIDTH)),
+        ),
+        BenchmarkCase("json.dumps(option)", lambda: (option,), _dump_option),
+        BenchmarkCase("json.dumps(storage)", lambda: (storage_payload,), lambda payload: json.dumps(payload, ensure_ascii=False)),
+    ]
+
+
+def measure(case: BenchmarkCase, bars: int, repeat: int) -> BenchmarkResult:
+    case.fn(*case.setup())
+
+    timings = []
+    for _ in range(max(repeat, 1)):
+        args = case.setup()
+        started = time.perf_counter()
+        case.fn(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    args = case.setup()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline_bytes = tracemalloc.get_traced_memory()[0]
+        result = case.fn(*args)
+        peak_bytes = tracemalloc.get_traced_memory()[1] - baseline_bytes
+        after = tracemalloc.take_snapshot()
+        del result
+    finally:
+        tracemalloc.stop()
+    blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno"))
+
+    return BenchmarkResult(
+        case=case.name,
+        bars=bars,
+        repeat=len(timings),
+        wall_ms=statistics.median(timings),
+        wall_min_ms=min(timings),
+        peak_kib=peak_bytes / 1024,
+        allocated_blocks=blocks,
+    )
+
+
+def calibrate(rounds: int = 5) -> float:
+    """运行一段固定的纯 Python 工作量（构造、排序、序列化），返回最短耗时（毫秒）。
+
+    与基线中记录的校准值之比即为两台机器（或同一机器不同负载）的速度比，用来换算墙钟时间。
+    """
+    payload = [{"d": 20000101 + index, "v": index * 0.5} for index in range(20_000)]
+    timings = []
+    for _ in range(max(rounds, 1)):
+        started = time.perf_counter()
+        rows = sorted(((item["v"], item["d"]) for item in payload), reverse=True)
+        json.dumps(payload)
+        sum(value for value, _ in rows)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def run_suite(
+    sizes: Iterable[int] = SIZES,
+    repeat: Optional[int] = None,
+    only: Optional[Sequence[str]] = None,
+    progress: Optional[Callable[[BenchmarkResult], None]] = None,
+) -> List[BenchmarkResult]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="fx-bench-") as tmp:
+        for bars in sizes:
+            rounds = repeat or (3 if bars >= 100_000 else 7)
+            for case in build_cases(bars, Path(tmp)):
+                if only and case.name not in only:
+                    continue
+                result = measure(case, bars, rounds)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return results
+
+
+def results_to_json(results: Sequence[BenchmarkResult], meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "meta": meta,
+        "results": {result.key: {k: v for k, v in asdict(result).items() if k not in {"case", "bars"}} for result in results},
+    }
+
+
+MISSING = "missing"
+
+
+def wall_scale(current: Dict[str, Any], baseline: Dict[str, Any]) -> Optional[float]:
+    """当前结果与基线的校准耗时之比；任一方没有记录校准值时返回 None。"""
+    current_ms = current.get("meta", {}).get("calibration_ms")
+    baseline_ms = baseline.get("meta", {}).get("calibration_ms")
+    if not current_ms or not baseline_ms:
+        return None
+    return current_ms / baseline_ms
+
+
+@dataclass
+class Regression:
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    def describe(self) -> str:
+        if self.metric == MISSING:
+            return f"{self.key} 不在基线中，请以 --only 运行该用例并加 --update-baseline 补充"
+        change = (self.current / self.baseline - 1) * 100 if self.baseline else float("inf")
+        return f"{self.key} {self.metric}: {self.baseline:.2f} → {self.current:.2f}（+{change:.0f}%）"
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.25,
+    min_wall_ms: float = 1.0,
+    min_peak_kib: float = 64.0,
+) -> List[Regression]:
+    """对比两份结果；相对增幅超过 ``tolerance`` 且绝对差值超过噪声下限时视为回归。
+
+    墙钟时间先按 ``wall_scale`` 换算到当前机器的速度再比较；任一方缺少校准值时只比较峰值内存。
+    基线中缺少的用例同样视为失败，避免新增的热点路径没有回归门槛。
+    """
+    scale = wall_scale(current, baseline)
+    regressions = []
+    for key, entry in current["results"].items():
+        reference = baseline.get("results", {}).get(key)
+        if reference is None:
+            regressions.append(Regression(key, MISSING, 0.0, entry["wall_ms"]))
+            continue
+        for metric, floor in (("wall_ms", min_wall_ms), ("peak_kib", min_peak_kib)):
+            if metric == "wall_ms" and scale is None:
+                continue
+            base_value, value = reference[metric], entry[metric]
+            if metric == "wall_ms":
+                base_value *= scale
+            if value > base_value * (1 + tolerance) and value - base_value > floor:
+                regressions.append(Regression(key, metric, base_value, value))
+    return regressions
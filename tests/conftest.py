@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Callable
+
+import pytest
+
+from app.models.rate import RateColumns, RatesSnapshot
+
+SnapshotFactory = Callable[[date, int], RatesSnapshot]
+
+
+def _daily_snapshot(start: date, count: int) -> RatesSnapshot:
+    """从 ``start`` 起逐自然日生成 ``count`` 根平缓上行的 K 线，日期与价格都可预期。"""
+    columns = RateColumns()
+    for offset in range(count):
+        day = start + timedelta(days=offset)
+        price = 7.0 + offset / 1000
+        columns.append((int(day.strftime("%Y%m%d")), price, price, price + 0.01, price - 0.01, 0.2))
+    return RatesSnapshot(source="test", fetched_at=datetime(2024, 1, 1), columns=columns)
+
+
+@pytest.fixture
+def make_snapshot() -> SnapshotFactory:
+    return _daily_snapshot
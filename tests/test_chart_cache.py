@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from app.ui.webview import ChartRenderCache
+from benchmarks.datasets import synthetic_snapshot
+
+
+def test_cached_option_survives_upsert() -> None:
+    full = synthetic_snapshot(50)
+    snapshot = full.range(0, full.columns.dates[39]).copy()
+    cache = ChartRenderCache()
+    cache.option(snapshot)
+
+    snapshot.upsert(full.window(10))
+    assert snapshot.trading_days() == 50
+
+    option = cache.option(full.range(0, full.columns.dates[39]).copy())
+    assert cache.hits == 1
+    assert len(option["xAxis"]["data"]) == 40
+    assert all(len(series["data"]) == 40 for series in option["series"])
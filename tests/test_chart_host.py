@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import threading
+from datetime import date
+from typing import Any, List, Optional
+
+from app.ui.chart_host import ChartHost
+
+
+class FakeProcess:
+    def __init__(self) -> None:
+        self.alive = True
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self.alive = False
+
+
+class FakeConn:
+    def __init__(self) -> None:
+        self.sent: List[Any] = []
+        self.broken = False
+        self.incoming: List[Any] = []
+
+    def poll(self) -> bool:
+        return bool(self.incoming)
+
+    def recv(self) -> Any:
+        return self.incoming.pop(0)
+
+    def send(self, message: Any) -> None:
+        if self.broken:
+            raise BrokenPipeError("pipe closed")
+        self.sent.append((threading.current_thread(), message))
+
+
+def make_host() -> ChartHost:
+    host = ChartHost()
+    host._process, host._conn = FakeProcess(), FakeConn()
+    return host
+
+
+def test_show_builds_option_off_the_calling_thread(make_snapshot) -> None:
+    host = make_host()
+    try:
+        assert host.show(make_snapshot(date(2024, 1, 1), 50), title="走势", key="base").result(timeout=10) == "open"
+        assert host.update("base", make_snapshot(date(2024, 1, 1), 51))
+        host.show(make_snapshot(date(2024, 1, 1), 51), title="走势", key="base").result(timeout=10)
+
+        commands = [message[0] for _, message in host._conn.sent]
+        assert commands == ["open", "eval"]
+        assert all(thread is not threading.current_thread() for thread, _ in host._conn.sent)
+    finally:
+        host.shutdown()
+
+
+def test_render_errors_are_reported_through_poll(make_snapshot) -> None:
+    host = make_host()
+    host._conn.broken = True
+    try:
+        future = host.show(make_snapshot(date(2024, 1, 1), 50), title="走势", key="base")
+        assert future.exception(timeout=10) is not None
+        events = host.poll()
+        assert [event[:2] for event in events] == [("error", "base")]
+        assert not host.is_open("base")
+    finally:
+        host.shutdown()
+
+
+def test_show_keeps_pending_events_for_poll(make_snapshot) -> None:
+    host = make_host()
+    try:
+        host._conn.incoming.append(("error", "custom", "渲染失败"))
+        host.show(make_snapshot(date(2024, 1, 1), 50), title="走势", key="base").result(timeout=10)
+        assert host.poll() == [("error", "custom", "渲染失败")]
+        assert host.poll() == []
+    finally:
+        host.shutdown()
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+from app.cli import main
+from app.repository.base_rates import JsonBaseRatesRepository
+
+
+def test_export_with_resolution_does_not_write_rollups(tmp_path: Path, make_snapshot) -> None:
+    storage = tmp_path / "base.json"
+    repository = JsonBaseRatesRepository(storage)
+    repository.save_snapshot(make_snapshot(date(2024, 1, 1), 120))
+    output = tmp_path / "monthly.csv"
+
+    assert main(["--storage", str(storage), "export", "--resolution", "monthly", "--format", "csv", "--output", str(output)]) == 0
+
+    assert repository.rollup_path is not None and not repository.rollup_path.exists()
+    assert len(output.read_text(encoding="utf-8").splitlines()) == 1 + 4
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import pytest
+
+from app.models.rate import RatesSnapshot
+from app.services.downsample import downsample_chart_payload, point_budget_for_width
+from app.services.indicators import parse_indicator
+from app.ui.webview import DEFAULT_CHART_WIDTH, _build_option
+from benchmarks.datasets import synthetic_snapshot
+
+POINT_BUDGET = point_budget_for_width(DEFAULT_CHART_WIDTH)
+
+
+@pytest.fixture(scope="module", params=[10_000, 100_000], ids=["10k", "100k"])
+def snapshot(request: pytest.FixtureRequest) -> RatesSnapshot:
+    return synthetic_snapshot(request.param)
+
+
+def test_payload_within_budget_keeps_extremes_and_endpoints(snapshot: RatesSnapshot) -> None:
+    payload = snapshot.to_chart_payload()
+    sampled, indices = downsample_chart_payload(payload, POINT_BUDGET)
+
+    assert len(indices) <= POINT_BUDGET
+    for values in sampled.values():
+        assert len(values) == len(indices)
+
+    columns = snapshot.columns
+    assert max(sampled["high"]) == max(columns.high)
+    assert min(sampled["low"]) == min(columns.low)
+    assert sampled["dates"][0] == payload["dates"][0]
+    assert sampled["dates"][-1] == payload["dates"][-1]
+    assert sampled["close"][0] == columns.close[0]
+    assert sampled["close"][-1] == columns.close[-1]
+
+
+def test_option_series_within_budget(snapshot: RatesSnapshot) -> None:
+    option = _build_option(snapshot, (parse_indicator("sma:20"),), point_budget=POINT_BUDGET)
+
+    assert len(option["xAxis"]["data"]) <= POINT_BUDGET
+    for series in option["series"]:
+        assert len(series["data"]) <= POINT_BUDGET
+    assert option["xAxis"]["data"][0] == snapshot.date_labels()[0]
+    assert option["xAxis"]["data"][-1] == snapshot.date_labels()[-1]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import io
+import json
+import random
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pytest
+
+from app.models.rate import RatesSnapshot
+from app.services.alpha_vantage import AlphaVantageClient, AlphaVantageError, AlphaVantageRateLimitError
+from app.services.fx_stream import TIME_SERIES_KEY, parse_fx_daily_stream
+from benchmarks.datasets import synthetic_api_payload
+
+DAYS = 10
+
+
+def _api_body(bars: int, shuffle: bool = False) -> bytes:
+    payload = synthetic_api_payload(bars)
+    # 真实响应不含 source / fetched_at，由客户端补充。
+    del payload["source"], payload["fetched_at"]
+    if shuffle:
+        items = list(payload[TIME_SERIES_KEY].items())
+        random.Random(3).shuffle(items)
+        payload[TIME_SERIES_KEY] = dict(items)
+    return json.dumps(payload).encode("utf-8")
+
+
+CASES = {
+    "normal": _api_body(30),
+    "fewer-than-window": _api_body(DAYS - 4),
+    "unsorted-dates": _api_body(30, shuffle=True),
+    "note": json.dumps({"Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute."}).encode(),
+    "information": json.dumps({"Information": "The **demo** API key is for demo purposes only."}).encode(),
+    "error-message": json.dumps({"Error Message": "Invalid API call."}).encode(),
+    "truncated": _api_body(30)[:-25],
+}
+
+
+def legacy_fetch(body: bytes, days: int) -> RatesSnapshot:
+    """流式解析之前的实现：整体 json.loads 后校验并构建快照。"""
+    try:
+        data: Dict[str, Any] = json.loads(body)
+    except ValueError as exc:
+        raise AlphaVantageError("API 返回的内容不是有效的 JSON。") from exc
+    if "Error Message" in data:
+        raise AlphaVantageError(data["Error Message"])
+    for limit_key in ("Note", "Information"):
+        if limit_key in data and TIME_SERIES_KEY not in data:
+            raise AlphaVantageRateLimitError(data[limit_key])
+    return AlphaVantageClient._build_snapshot(data, days, datetime(2024, 1, 2))
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body: bytes) -> None:
+        self.content = body
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class FakeSession:
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+
+    def get(self, url: str, params: Optional[dict] = None, timeout: Any = None, stream: bool = False) -> FakeResponse:
+        return FakeResponse(self.body)
+
+
+def _outcome(call: Callable[[], RatesSnapshot]) -> Tuple[Any, Any]:
+    try:
+        snapshot = call()
+    except Exception as exc:  # noqa: BLE001 - 比较两条路径抛出的异常
+        return type(exc), str(exc)
+    columns = snapshot.columns
+    # fetched_at 为请求时刻，不属于解析结果。
+    return snapshot.source, [columns.row(index) for index in range(len(columns))]
+
+
+@pytest.mark.parametrize("body", CASES.values(), ids=CASES.keys())
+def test_streaming_client_matches_json_loads(body: bytes) -> None:
+    client = AlphaVantageClient("demo", session=FakeSession(body), max_retries=0)
+
+    expected = _outcome(lambda: legacy_fetch(body, DAYS))
+    assert _outcome(lambda: client.fetch_rates(days=DAYS)) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 64 * 1024])
+@pytest.mark.parametrize("body", [CASES["normal"], CASES["unsorted-dates"]], ids=["normal", "unsorted-dates"])
+def test_window_keeps_newest_entries_for_any_chunk_size(body: bytes, chunk_size: int) -> None:
+    parsed = parse_fx_daily_stream(io.BytesIO(body), window=DAYS, chunk_size=chunk_size)
+    full = json.loads(body)[TIME_SERIES_KEY]
+
+    newest = sorted(full)[-DAYS:]
+    assert parsed.time_series == {date_str: full[date_str] for date_str in newest}
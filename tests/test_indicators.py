@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from app.models.rate import RatesSnapshot
+from app.services.indicators import IndicatorEngine, IndicatorSpec, parse_indicator
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["sma:20,5", "sma:0", "sma:-3", "sma:2.5", "volatility:1", "bollinger:20,0", "bollinger:20,2,1", "rsi:inf"],
+)
+def test_parse_indicator_rejects_bad_params(text: str) -> None:
+    with pytest.raises(ValueError):
+        parse_indicator(text)
+
+
+@pytest.mark.parametrize("text", ["sma", "sma:20", "bollinger:20", "bollinger:20,2.5", "volatility:2"])
+def test_parse_indicator_accepts_valid_params(text: str) -> None:
+    assert parse_indicator(text).name == text.partition(":")[0]
+
+
+def test_compute_rejects_unvalidated_spec() -> None:
+    with pytest.raises(ValueError):
+        IndicatorEngine().compute(RatesSnapshot("test", datetime(2024, 1, 1)), IndicatorSpec("sma", (20.0, 5.0)))
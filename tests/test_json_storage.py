@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.models.rate import RatesSnapshot
+from app.repository import base_rates
+from app.repository.base_rates import JOURNAL_COMPACT_THRESHOLD, JsonBaseRatesRepository, write_atomic
+from benchmarks.datasets import synthetic_snapshot
+
+FULL = synthetic_snapshot(100 + JOURNAL_COMPACT_THRESHOLD)
+
+
+def rows(start: int, stop: int) -> RatesSnapshot:
+    return RatesSnapshot(source=FULL.source, fetched_at=FULL.fetched_at, columns=FULL.columns.view(start, stop)).copy()
+
+
+def test_raw_compact_raw_round_trip(tmp_path: Path) -> None:
+    raw = FULL.to_storage()
+    assert RatesSnapshot.from_compact(RatesSnapshot.from_storage(raw).to_compact()).to_storage() == raw
+
+    compact_path, raw_path = tmp_path / "compact.json", tmp_path / "raw.json"
+    compact_repo = JsonBaseRatesRepository(compact_path, encoding="compact")
+    compact_repo.save_snapshot(FULL)
+    assert json.loads(compact_path.read_bytes())["format"] == "fx-compact/1"
+
+    JsonBaseRatesRepository(raw_path, encoding="raw").save_snapshot(compact_repo.load_snapshot())
+    assert json.loads(raw_path.read_bytes()) == raw
+
+
+@pytest.mark.parametrize("suffix, magic", [(".json.gz", b"\x1f\x8b"), (".json.zz", b"\x78")])
+def test_compressed_paths_round_trip_and_are_detected_by_magic(tmp_path: Path, suffix: str, magic: bytes) -> None:
+    path = tmp_path / f"base{suffix}"
+    repository = JsonBaseRatesRepository(path, encoding="compact")
+    repository.save_snapshot(FULL)
+
+    data = path.read_bytes()
+    assert data.startswith(magic)
+    assert repository.load_snapshot().to_storage() == FULL.to_storage()
+
+    # 读取时按文件头而非扩展名识别压缩方式。
+    renamed = tmp_path / "renamed.json"
+    renamed.write_bytes(data)
+    assert JsonBaseRatesRepository(renamed).load_snapshot().to_storage() == FULL.to_storage()
+
+
+def test_write_atomic_keeps_old_file_when_replace_fails(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    target = tmp_path / "base.json"
+    write_atomic(target, b"old")
+
+    def fail(src: str, dst: str) -> None:
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(base_rates.os, "replace", fail)
+        with pytest.raises(OSError):
+            write_atomic(target, b"new")
+    assert target.read_bytes() == b"old"
+
+    write_atomic(target, b"new")
+    assert target.read_bytes() == b"new"
+    assert not target.with_name("base.json.tmp").exists()
+
+
+def test_journal_replays_after_crash_before_compaction(tmp_path: Path) -> None:
+    path = tmp_path / "base.json"
+    repository = JsonBaseRatesRepository(path)
+    repository.save_snapshot(rows(0, 100))
+    for index in range(100, 103):
+        repository.upsert_bars(rows(index, index + 1))
+    # 模拟写入日志途中断电：末行只写了一半。
+    with repository.journal_path.open("a", encoding="utf-8") as fh:
+        fh.write('{"source":"x","dtList":[{"d":"2024')
+
+    # 重启后由新实例读取：主文件未合并，日志中完整的条目全部重放。
+    reloaded = JsonBaseRatesRepository(path).load_snapshot()
+    assert reloaded.to_storage() == rows(0, 103).to_storage()
+
+
+def test_journal_compacts_at_threshold(tmp_path: Path) -> None:
+    path = tmp_path / "base.json"
+    repository = JsonBaseRatesRepository(path)
+    repository.save_snapshot(rows(0, 100))
+    for index in range(100, 100 + JOURNAL_COMPACT_THRESHOLD - 1):
+        repository.upsert_bars(rows(index, index + 1))
+    assert len(repository.journal_path.read_text(encoding="utf-8").splitlines()) == JOURNAL_COMPACT_THRESHOLD - 1
+
+    repository.upsert_bars(rows(99 + JOURNAL_COMPACT_THRESHOLD, 100 + JOURNAL_COMPACT_THRESHOLD))
+
+    assert not repository.journal_path.exists()
+    stored = RatesSnapshot.from_storage(json.loads(path.read_bytes()))
+    assert stored.to_storage() == FULL.to_storage()
+
+
+def test_explicit_compact_folds_journal_into_main_file(tmp_path: Path) -> None:
+    path = tmp_path / "base.json"
+    repository = JsonBaseRatesRepository(path)
+    repository.save_snapshot(rows(0, 100))
+    repository.upsert_bars(rows(100, 102))
+    assert repository.journal_path.exists()
+
+    repository.compact()
+
+    assert not repository.journal_path.exists()
+    stored = RatesSnapshot.from_storage(json.loads(path.read_bytes()))
+    assert stored.to_storage() == rows(0, 102).to_storage()
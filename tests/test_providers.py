@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.services.providers import ProviderChain, ProviderError, ProviderRateLimitError, StubProvider
+from benchmarks.datasets import synthetic_snapshot
+
+SNAPSHOT = synthetic_snapshot(50)
+
+
+def stub(name: str, **kwargs) -> StubProvider:
+    return StubProvider(SNAPSHOT, name=name, **kwargs)
+
+
+def test_failover_follows_configured_order() -> None:
+    first = stub("first", error=ProviderError("boom"))
+    second = stub("second", error=ValueError("bad payload"))
+    third = stub("third")
+    fourth = stub("fourth")
+    chain = ProviderChain([first, second, third, fourth])
+
+    snapshot = chain.fetch_rates(days=10)
+
+    assert chain.last_provider == "third"
+    assert snapshot.trading_days() == 10
+    assert (first.calls, second.calls, third.calls, fourth.calls) == (1, 1, 1, 0)
+
+
+def test_stale_result_only_used_as_fallback() -> None:
+    stale = stub("stale", stale=True)
+    fresh = stub("fresh")
+    chain = ProviderChain([stale, fresh])
+    assert not chain.fetch_rates(days=5).stale
+    assert chain.last_provider == "fresh"
+
+    chain = ProviderChain([stale, stub("down", error=ProviderError("boom"))])
+    assert chain.fetch_rates(days=5).stale
+    assert chain.last_provider == "stale"
+
+
+def test_hedge_starts_next_provider_after_delay() -> None:
+    slow = stub("slow", latency=1.0)
+    fast = stub("fast")
+    chain = ProviderChain([slow, fast], hedge_after=0.05)
+
+    started = time.perf_counter()
+    chain.fetch_rates(days=5)
+
+    assert chain.last_provider == "fast"
+    assert time.perf_counter() - started < 0.8
+    assert (slow.calls, fast.calls) == (1, 1)
+
+
+def test_no_hedge_before_threshold() -> None:
+    first = stub("first", latency=0.01)
+    second = stub("second")
+    chain = ProviderChain([first, second], hedge_after=2.0)
+
+    chain.fetch_rates(days=5)
+
+    assert chain.last_provider == "first"
+    assert second.calls == 0
+
+
+def test_deadline_expiry_raises() -> None:
+    chain = ProviderChain([stub("slow", latency=2.0)], deadline=0.1)
+
+    started = time.perf_counter()
+    with pytest.raises(ProviderError, match="slow"):
+        chain.fetch_rates(days=5)
+    assert time.perf_counter() - started < 1.5
+
+
+def test_deadline_returns_stale_fallback() -> None:
+    chain = ProviderChain([stub("stale", stale=True), stub("slow", latency=2.0)], deadline=0.2)
+
+    assert chain.fetch_rates(days=5).stale
+    assert chain.last_provider == "stale"
+
+
+def test_errors_are_aggregated() -> None:
+    limited = ProviderChain([stub("a", error=ProviderRateLimitError("quota")), stub("b", error=ProviderRateLimitError("429"))])
+    with pytest.raises(ProviderRateLimitError) as limited_info:
+        limited.fetch_rates(days=5)
+    assert "a：quota" in str(limited_info.value) and "b：429" in str(limited_info.value)
+
+    mixed = ProviderChain([stub("a", error=ProviderRateLimitError("quota")), stub("b", error=ProviderError("down"))])
+    with pytest.raises(ProviderError) as mixed_info:
+        mixed.fetch_rates(days=5)
+    assert not isinstance(mixed_info.value, ProviderRateLimitError)
+    assert "a：quota" in str(mixed_info.value) and "b：down" in str(mixed_info.value)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from app.services.rate_limiter import RateLimiter, RateLimitExceeded
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_limiters_share_quota_through_state_file(tmp_path: Path) -> None:
+    clock = FakeClock()
+    state_path = tmp_path / "quota.json"
+    first = RateLimiter(per_minute=5, per_day=3, state_path=state_path, clock=clock)
+    second = RateLimiter(per_minute=5, per_day=3, state_path=state_path, clock=clock)
+
+    first.reserve()
+    second.reserve()
+    first.reserve()
+
+    assert second.remaining_today() == 0
+    with pytest.raises(RateLimitExceeded):
+        second.reserve()
+
+
+def test_cancelled_reservation_returns_quota(tmp_path: Path) -> None:
+    clock = FakeClock()
+    state_path = tmp_path / "quota.json"
+    limiter = RateLimiter(per_minute=5, per_day=3, state_path=state_path, clock=clock)
+    other = RateLimiter(per_minute=5, per_day=3, state_path=state_path, clock=clock)
+
+    reservation = limiter.acquire()
+    assert other.remaining_today() == 2
+    reservation.cancel()
+    reservation.cancel()
+    assert other.remaining_today() == 3
+
+
+def test_acquire_stops_waiting_when_cancelled() -> None:
+    limiter = RateLimiter(per_minute=1, per_day=10)
+    limiter.acquire()
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(cancel=cancel)
+    assert limiter.remaining_today() == 9
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+
+from app.models.rate import RatesSnapshot
+
+
+def test_equality_follows_bar_content(make_snapshot) -> None:
+    snapshot = make_snapshot(date(2024, 1, 1), 30)
+    same = make_snapshot(date(2024, 1, 1), 30)
+    same.source, same.fetched_at = "other", datetime(2025, 1, 1)
+
+    assert snapshot == same
+    assert snapshot.window(10) == same.range(20240121, 20240130)
+    assert snapshot != make_snapshot(date(2024, 1, 1), 31)
+    assert snapshot != "not a snapshot"
+    with pytest.raises(TypeError):
+        hash(snapshot)
+
+
+def test_repr_is_short(make_snapshot) -> None:
+    assert repr(make_snapshot(date(2024, 1, 1), 30)) == "RatesSnapshot('test', 20240101..20240130, trading_days=30)"
+    assert repr(RatesSnapshot("test", datetime(2024, 1, 1))) == "RatesSnapshot('test', empty, trading_days=0)"
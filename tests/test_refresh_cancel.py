@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Callable, Optional
+
+import pytest
+
+from app.models.rate import RatesSnapshot
+from app.repository.base_rates import JsonBaseRatesRepository
+from app.services.base_rates_service import BaseRatesService, RefreshCancelled
+from app.services.providers import RatesProvider
+
+
+class CancellingProvider(RatesProvider):
+    """返回数据前置位取消事件，模拟用户在请求进行中点击取消。"""
+
+    def __init__(self, snapshot: RatesSnapshot, cancel: threading.Event) -> None:
+        self.snapshot = snapshot
+        self.cancel = cancel
+
+    def fetch_rates(
+        self,
+        days: int,
+        outputsize: str = "compact",
+        on_wait: Optional[Callable[[float], None]] = None,
+        from_symbol: str = "USD",
+        to_symbol: str = "CNY",
+    ) -> RatesSnapshot:
+        self.cancel.set()
+        return self.snapshot
+
+
+@pytest.fixture
+def service(tmp_path: Path, make_snapshot) -> BaseRatesService:
+    repository = JsonBaseRatesRepository(tmp_path / "base.json")
+    repository.save_snapshot(make_snapshot(date(2024, 1, 1), 5))
+    return BaseRatesService(repository=repository)
+
+
+def test_cancelled_full_refresh_keeps_storage(service: BaseRatesService, make_snapshot) -> None:
+    cancel = threading.Event()
+    provider = CancellingProvider(make_snapshot(date(2024, 2, 1), 3), cancel)
+    with pytest.raises(RefreshCancelled):
+        service.refresh_snapshot(client=provider, cancel=cancel)
+    assert service.load_snapshot().columns.dates[0] == 20240101
+
+
+def test_cancelled_incremental_refresh_keeps_storage(service: BaseRatesService, make_snapshot) -> None:
+    cancel = threading.Event()
+    provider = CancellingProvider(make_snapshot(date(2024, 1, 4), 5), cancel)
+    with pytest.raises(RefreshCancelled):
+        service.refresh_incremental(client=provider, cancel=cancel, today=date(2024, 1, 9))
+    assert service.load_snapshot().trading_days() == 5
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from app.services.downsample import point_budget_for_width
+from app.services.indicators import parse_indicator
+from app.services.rollups import DAILY, bar_budget_for_width
+from app.ui.webview import DEFAULT_CHART_WIDTH, LARGE_DATASET_POINTS, _build_option, chart_view
+from benchmarks.datasets import synthetic_snapshot
+
+POINT_BUDGET = point_budget_for_width(DEFAULT_CHART_WIDTH)
+BAR_BUDGET = bar_budget_for_width(DEFAULT_CHART_WIDTH)
+
+
+def test_bar_budget_matches_point_budget() -> None:
+    assert BAR_BUDGET == POINT_BUDGET
+
+
+def test_daily_within_point_budget_keeps_daily_and_large_path() -> None:
+    snapshot = synthetic_snapshot(LARGE_DATASET_POINTS + 100)
+    view, title, _ = chart_view(snapshot, "走势", "auto", BAR_BUDGET)
+
+    assert view is snapshot and title == "走势"
+    option = _build_option(view, point_budget=POINT_BUDGET)
+    assert option["animation"] is False
+    assert len(option["xAxis"]["data"]) == snapshot.trading_days()
+
+
+def test_5000_daily_bars_at_default_width() -> None:
+    snapshot = synthetic_snapshot(5_000)
+
+    view, title, _ = chart_view(snapshot, "走势", "auto", BAR_BUDGET)
+    assert title == "走势 · 周线"
+    assert view.trading_days() <= POINT_BUDGET
+    assert len(_build_option(view, point_budget=POINT_BUDGET)["xAxis"]["data"]) == view.trading_days()
+
+    # 显式要求日线时走 LTTB 降采样与大数据量渲染。
+    daily, _, _ = chart_view(snapshot, "走势", DAILY, BAR_BUDGET)
+    option = _build_option(daily, point_budget=POINT_BUDGET)
+    assert option["animation"] is False
+    assert len(option["xAxis"]["data"]) <= POINT_BUDGET
+    assert option["xAxis"]["data"][-1] == snapshot.date_labels()[-1]
+
+
+def test_overlay_labels_name_the_rolled_up_period() -> None:
+    view, _, chosen = chart_view(synthetic_snapshot(5_000), "走势", "auto", BAR_BUDGET)
+    option = _build_option(view, (parse_indicator("sma:20"), parse_indicator("rsi")), POINT_BUDGET, resolution=chosen)
+
+    assert {"SMA(20) · 周线", "RSI · 周线"} <= set(option["legend"]["data"])
+    assert "SMA(20)" not in option["legend"]["data"]